@@ -0,0 +1,6 @@
+"""
+Run any combination of the Milestone 1 tasks against one or more files,
+sharing one parsed tree per file (see milestone.runner).
+
+Usage: python -m milestone run --tasks 1,2,3 <input_file> [<input_file> ...]
+"""
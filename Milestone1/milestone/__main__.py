@@ -0,0 +1,5 @@
+import sys
+
+from milestone.runner import main
+
+sys.exit(main())
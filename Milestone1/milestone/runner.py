@@ -0,0 +1,158 @@
+"""
+Run several Milestone 1 tasks over the same parsed tree.
+
+Running task1.py ... task8.py one after another parses the input file
+eight times. This runner parses each file once and hands the tree to
+every selected task. When there are several input files, they're
+processed in parallel, one file per worker process.
+
+Some tasks still do some parsing of their own:
+
+- Task 1 prettifies an HTML file by parsing its markup again with
+  'html.parser', so its output doesn't depend on which parser built
+  the shared tree.
+- Tasks 6 and 7 read the file they wrote back in, to verify it.
+
+Usage: python -m milestone run --tasks 1,2,3 <input_file> [<input_file> ...]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import copy
+import io
+import os
+
+from util_parser import load_document
+import task1
+import task2
+import task3
+import task4
+import task5
+import task6
+import task7
+import task8
+
+# Each task's run() function takes a util_parser.Document.
+TASKS = {
+    1: task1.run,
+    2: task2.run,
+    3: task3.run,
+    4: task4.run,
+    5: task5.run,
+    6: task6.run,
+    7: task7.run,
+    8: task8.run,
+}
+
+# These tasks modify the tree, so any task that runs after them needs
+# a tree of its own.
+MODIFYING_TASKS = {6, 7}
+
+
+def parse_task_list(value):
+    """Turn a string like '1,2,5' (or 'all') into a list of task numbers."""
+    if value == 'all':
+        return sorted(TASKS)
+    tasks = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            number = int(item)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{item}' is not a task number")
+        if number not in TASKS:
+            raise argparse.ArgumentTypeError(
+                f"There is no task {number}; choose from 1-{len(TASKS)}"
+            )
+        if number not in tasks:
+            tasks.append(number)
+    if not tasks:
+        raise argparse.ArgumentTypeError("No tasks were selected")
+    return tasks
+
+
+def run_tasks(document, tasks):
+    """Run the given tasks, in order, against one parsed document."""
+    for position, number in enumerate(tasks):
+        task_document = document
+        if number in MODIFYING_TASKS and position < len(tasks) - 1:
+            # Copying the tree is much cheaper than parsing the file
+            # again, and keeps the later tasks' output the same as if
+            # they'd been run on their own.
+            task_document = document._replace(soup=copy.copy(document.soup))
+        print(f"\n===== Task {number}: {document.path} =====\n")
+        TASKS[number](task_document)
+
+
+def process_file(input_file, tasks):
+    """Parse one file and run the given tasks against it.
+
+    :return: True if every task succeeded, False otherwise.
+    """
+    try:
+        # Only task 1 needs the raw markup; don't hold on to it
+        # otherwise, since it can be as big as the file.
+        document = load_document(input_file, keep_content=1 in tasks)
+        run_tasks(document, tasks)
+    except FileNotFoundError:
+        print(f"Error: File '{input_file}' not found.")
+        return False
+    except Exception as e:
+        print(f"Error processing file: {e}")
+        return False
+    return True
+
+
+def _process_file_captured(input_file, tasks):
+    """Run process_file in a worker process, collecting its output so
+    output from different files doesn't get interleaved."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        success = process_file(input_file, tasks)
+    return success, output.getvalue()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m milestone',
+        description='Run Milestone 1 tasks, sharing one parsed tree per input file.',
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser(
+        'run', help='Run one or more tasks against one or more files.'
+    )
+    run_parser.add_argument(
+        '--tasks',
+        type=parse_task_list,
+        default=sorted(TASKS),
+        help="Comma-separated task numbers, e.g. '1,2,3' (default: all).",
+    )
+    run_parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help='How many files to process at once (default: one per CPU).',
+    )
+    run_parser.add_argument('files', nargs='+', metavar='input_file')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    jobs = min(len(args.files), args.jobs or os.cpu_count() or 1)
+
+    if jobs <= 1:
+        results = [process_file(input_file, args.tasks) for input_file in args.files]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # map() returns results in the order the files were given.
+            for success, output in executor.map(
+                _process_file_captured, args.files, [args.tasks] * len(args.files)
+            ):
+                print(output, end='')
+                results.append(success)
+    return 0 if all(results) else 1
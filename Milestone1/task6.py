@@ -5,58 +5,48 @@ Usage: python task6.py <input_file>
 """
 
 import sys
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
-import warnings
 import os
 
-def change_b_to_blockquote(input_file):
+from util_parser import load_document
+
+def run(document):
     """Replace all <b> tags with <blockquote> tags and save to file."""
-    try:
-      
-        with open(input_file, 'r', encoding='utf-8-sig') as f:
-            content = f.read()
-        content = content.lstrip()
-        try:
-            soup = BeautifulSoup(content, 'xml')
-        except Exception:
-            warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
-            soup = BeautifulSoup(content, 'html.parser')
-     
-        b_tags = soup.find_all('b')
-        
-        print(f"Processing '{input_file}'...")
-        print(f"Found {len(b_tags)} <b> tags to replace.\n")
+    input_file = document.path
+    soup = document.soup
 
-        for b_tag in b_tags:
-            b_tag.name = 'blockquote'
+    b_tags = soup.find_all('b')
 
-        base_name = os.path.splitext(input_file)[0]
-        # Use .xml extension if input was XML, else .html
-        output_file = f"{base_name}_b_to_blockquote{'.xml' if input_file.lower().endswith('.xml') else '.html'}"
+    print(f"Processing '{input_file}'...")
+    print(f"Found {len(b_tags)} <b> tags to replace.\n")
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
-        
-        print(f"Successfully replaced {len(b_tags)} <b> tags with <blockquote> tags.")
-        print(f"Output written to: {output_file}")
-        
-    
-        # Verify the changes by reloading with same parsing approach
-        with open(output_file, 'r', encoding='utf-8-sig') as f:
-            new_content = f.read()
-        new_content = new_content.lstrip()
-        try:
-            new_soup = BeautifulSoup(new_content, 'xml')
-        except Exception:
-            warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
-            new_soup = BeautifulSoup(new_content, 'html.parser')
-        new_b_count = len(new_soup.find_all('b'))
-        new_blockquote_count = len(new_soup.find_all('blockquote'))
-        
-        print(f"\nVerification:")
-        print(f"  <b> tags in output: {new_b_count}")
-        print(f"  <blockquote> tags in output: {new_blockquote_count}")
-        
+    for b_tag in b_tags:
+        b_tag.name = 'blockquote'
+
+    base_name = os.path.splitext(input_file)[0]
+    # Use .xml extension if input was XML, else .html
+    output_file = f"{base_name}_b_to_blockquote{'.xml' if input_file.lower().endswith('.xml') else '.html'}"
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(str(soup))
+
+    print(f"Successfully replaced {len(b_tags)} <b> tags with <blockquote> tags.")
+    print(f"Output written to: {output_file}")
+
+    # Verify the changes by reading the output file back in, the same
+    # way the input was read.
+    new_soup = load_document(output_file, keep_content=False).soup
+    new_b_count = len(new_soup.find_all('b'))
+    new_blockquote_count = len(new_soup.find_all('blockquote'))
+
+    print(f"\nVerification:")
+    print(f"  <b> tags in output: {new_b_count}")
+    print(f"  <blockquote> tags in output: {new_blockquote_count}")
+
+
+def change_b_to_blockquote(input_file):
+    """Replace all <b> tags with <blockquote> tags and save to file."""
+    try:
+        run(load_document(input_file))
     except FileNotFoundError:
         print(f"Error: File '{input_file}' not found.")
         sys.exit(1)
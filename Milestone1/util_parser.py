@@ -0,0 +1,47 @@
+"""
+Shared file loading for the Milestone 1 tasks.
+
+Every task reads its input the same way: strip any BOM and leading
+whitespace, try the 'xml' parser, and fall back to 'html.parser'.
+Keeping that here means a single parsed tree can be handed to any
+number of tasks (see the milestone package).
+"""
+
+from typing import NamedTuple, Optional
+import warnings
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+
+class Document(NamedTuple):
+    """An input file, parsed once and shared by the tasks."""
+
+    path: str
+    soup: BeautifulSoup
+    # The markup the tree was parsed from. Only task 1 needs it, so it
+    # may be None when the caller knows task 1 won't run.
+    content: Optional[str] = None
+
+
+def read_markup(input_file):
+    """Read a file, stripping any BOM and leading whitespace (which can
+    break XML parsers)."""
+    with open(input_file, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    return content.lstrip()
+
+
+def parse_markup(content):
+    """Parse markup as XML if possible, otherwise as HTML."""
+    try:
+        return BeautifulSoup(content, 'xml')
+    except Exception:
+        warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+        return BeautifulSoup(content, 'html.parser')
+
+
+def load_document(input_file, keep_content=True):
+    """Read and parse a file into a Document."""
+    content = read_markup(input_file)
+    soup = parse_markup(content)
+    return Document(input_file, soup, content if keep_content else None)
@@ -51,6 +51,7 @@ __all__ = [
     "XMLParsedAsHTMLWarning",
 ]
 
+from array import array
 from collections import Counter
 import sys
 import warnings
@@ -63,6 +64,8 @@ if sys.version_info.major < 3:
     )
 
 from .builder import (
+    AUTO,
+    FASTEST,
     builder_registry,
     TreeBuilder,
 )
@@ -72,13 +75,14 @@ from .css import CSS
 from ._deprecation import (
     _deprecated,
 )
-from .filter import SoupReplacer
 from .element import (
     CData,
     Comment,
+    CompactTag,
     DEFAULT_OUTPUT_ENCODING,
     Declaration,
     Doctype,
+    _FindMethodName,
     NavigableString,
     PageElement,
     ProcessingInstruction,
@@ -90,6 +94,7 @@ from .element import (
     TemplateString,
 )
 from .formatter import Formatter
+from ._index import TagIndex
 from .filter import (
     ElementFilter,
     SoupStrainer,
@@ -100,22 +105,31 @@ from typing import (
     cast,
     Counter as CounterType,
     Dict,
+    Iterable,
     Iterator,
     List,
     Sequence,
+    Tuple,
     Optional,
     Type,
     Union,
 )
 
 from bs4._typing import (
+    _AllowTagCreationFunction,
     _Encoding,
     _Encodings,
     _IncomingMarkup,
     _InsertableElement,
     _RawAttributeValue,
     _RawAttributeValues,
+    _QueryResults,
     _RawMarkup,
+    _StrainableAttribute,
+    _StrainableAttributes,
+    _StrainableElement,
+    _StrainableString,
+    _TagNameFilterFunction,
 )
 
 # Import all warnings and exceptions into the main package.
@@ -177,14 +191,24 @@ class BeautifulSoup(Tag):
     #: during parsing to detect data chunks that seem 'empty'.
     ASCII_SPACES: str = "\x20\x0a\x09\x0c\x0d"
 
+    #: The default size of the pieces `BeautifulSoup.iterparse` reads
+    #: from its source and passes into the tree builder.
+    ITERPARSE_CHUNK_SIZE: int = 64 * 1024
+
     # FUTURE PYTHON:
     element_classes: Dict[Type[PageElement], Type[PageElement]]  #: :meta private:
     builder: TreeBuilder  #: :meta private:
     is_xml: bool
     known_xml: Optional[bool]
+    compact: bool
     parse_only: Optional[SoupStrainer]  #: :meta private:
     replacer: Optional[SoupReplacer]
 
+    #: The index used to speed up `BeautifulSoup.find_all` and
+    #: `BeautifulSoup.select`, if one has been built.
+    #: :meta private:
+    _index: Optional[TagIndex] = None
+
     # These members are only used while parsing markup.
     markup: Optional[_RawMarkup]  #: :meta private:
     current_data: List[str]  #: :meta private:
@@ -194,6 +218,30 @@ class BeautifulSoup(Tag):
     preserve_whitespace_tag_stack: List[Tag]  #: :meta private:
     string_container_stack: List[Tag]  #: :meta private:
     _most_recent_element: Optional[PageElement]  #: :meta private:
+    _completed_tag_filter: Optional[ElementFilter]  #: :meta private:
+    _completed_tags: List[Tag]  #: :meta private:
+
+    #: The ``parse_only`` filter's decision about whether to create
+    #: each tag, compiled once per document.
+    _allow_tag_creation: Optional[_AllowTagCreationFunction]  #: :meta private:
+
+    #: If the ``parse_only`` filter can reject a tag based on its name
+    #: alone, a tree builder can use this function to avoid
+    #: processing the attributes of a tag that will be rejected.
+    _tag_name_filter: Optional[_TagNameFilterFunction]  #: :meta private:
+
+    #: True if the ``parse_only`` filter rejects every string, so that
+    #: strings outside of an allowed tag can be thrown away as soon as
+    #: they're seen.
+    _discard_strings: bool  #: :meta private:
+
+    #: Tag names and attribute keys seen while building this tree,
+    #: each mapped to the single copy used throughout the tree.
+    _interned_names: Dict[str, str]  #: :meta private:
+
+    #: The same, for the values of multi-valued attributes, if the
+    #: `TreeBuilder` was created with ``intern_attribute_values=True``.
+    _interned_values: Dict[str, str]  #: :meta private:
 
     #: Beautiful Soup's best guess as to the character encoding of the
     #: original document.
@@ -219,7 +267,9 @@ class BeautifulSoup(Tag):
         from_encoding: Optional[_Encoding] = None,
         exclude_encodings: Optional[_Encodings] = None,
         element_classes: Optional[Dict[Type[PageElement], Type[PageElement]]] = None,
-        replacer: Optional[SoupReplacer] = None,  # ADD THIS LINE
+        replacer: Optional[SoupReplacer] = None,
+        index: bool = False,
+        compact: bool = False,
         **kwargs: Any,
     ):
         """Constructor.
@@ -233,7 +283,10 @@ class BeautifulSoup(Tag):
          type of markup to be used ("html", "html5", "xml"). It's
          recommended that you name a specific parser, so that
          Beautiful Soup gives you the same results across platforms
-         and virtual environments.
+         and virtual environments. Or pass in "fastest" (or "auto")
+         and Beautiful Soup will look at the start of the markup and
+         choose the fastest installed parser that can handle it; see
+         `bs4.builder.TreeBuilderRegistry.fastest`.
 
         :param builder: A TreeBuilder subclass to instantiate (or
          instance to use) instead of looking one up based on
@@ -260,6 +313,22 @@ class BeautifulSoup(Tag):
          built. This is useful for subclassing Tag or NavigableString
          to modify default behavior.
 
+        :param replacer: A SoupReplacer. Tags and attributes will be
+         renamed (or removed) according to its rules as the tree is
+         built, whichever parser is used.
+
+        :param index: If this is True, tags will be indexed by name,
+         ``id`` and ``class`` as the tree is built, making searches
+         like ``find_all("a")``, ``find(id="main")`` and
+         ``select(".nav")`` much faster on large documents. See
+         `BeautifulSoup.build_index`.
+
+        :param compact: If this is True, the tree will be built out of
+         `CompactTag` objects, which use much less memory than `Tag`
+         objects. This is useful for very large documents. If
+         ``element_classes`` maps `Tag` to some other class, that
+         class is used instead.
+
         :param kwargs: For backwards compatibility purposes, the
          constructor accepts certain keyword arguments used in
          Beautiful Soup 3. None of these arguments do anything in
@@ -346,6 +415,9 @@ class BeautifulSoup(Tag):
             )
             from_encoding = None
 
+        self.compact = compact
+        if compact:
+            element_classes = {Tag: CompactTag, **(element_classes or {})}
         self.element_classes = element_classes or dict()
 
         # We need this information to track whether or not the builder
@@ -353,6 +425,7 @@ class BeautifulSoup(Tag):
         # specify a parser' warning.
         original_builder = builder
         original_features = features
+        chose_builder_for_markup = False
 
         builder_class: Type[TreeBuilder]
         if isinstance(builder, type):
@@ -364,7 +437,19 @@ class BeautifulSoup(Tag):
                 features = [features]
             if features is None or len(features) == 0:
                 features = self.DEFAULT_BUILDER_FEATURES
-            possible_builder_class = builder_registry.lookup(*features)
+            possible_builder_class: Optional[Type[TreeBuilder]]
+            if len(features) == 1 and features[0] in (FASTEST, AUTO):
+                # Choose a builder based on what the markup looks
+                # like. That means looking at the markup now, so a
+                # file has to be read in full.
+                if hasattr(markup, "read"):
+                    markup = markup.read()
+                chose_builder_for_markup = True
+                possible_builder_class = builder_registry.fastest(
+                    markup if isinstance(markup, (str, bytes)) else None
+                )
+            else:
+                possible_builder_class = builder_registry.lookup(*features)
             if possible_builder_class is None:
                 raise FeatureNotFound(
                     "Couldn't find a tree builder with the features you "
@@ -380,6 +465,7 @@ class BeautifulSoup(Tag):
             builder = builder_class(**kwargs)
             if (
                 not original_builder
+                and not chose_builder_for_markup
                 and not (
                     original_features == builder.NAME
                     or (
@@ -440,10 +526,13 @@ class BeautifulSoup(Tag):
         self.known_xml = self.is_xml
         self._namespaces = dict()
         self.parse_only = parse_only
-        self.replacer = replacer 
+        self.replacer = replacer
+        if index:
+            self._index = TagIndex()
 
         if hasattr(markup, "read"):  # It's a file-type object.
-            markup = markup.read()
+            if not self.builder.ACCEPTS_FILE_OBJECTS:
+                markup = markup.read()
         elif not isinstance(markup, (bytes, str)) and not hasattr(markup, "__len__"):
             raise TypeError(
                 f"Incoming markup is of an invalid type: {markup!r}. Markup must be a string, a bytestring, or an open filehandle."
@@ -460,7 +549,8 @@ class BeautifulSoup(Tag):
                 self._markup_resembles_filename(markup)
 
         # At this point we know markup is a string or bytestring.  If
-        # it was a file-type object, we've read from it.
+        # it was a file-type object, we've read from it, unless the
+        # builder prefers to read from it itself.
         markup = cast(_RawMarkup, markup)
 
         rejections = []
@@ -490,38 +580,249 @@ class BeautifulSoup(Tag):
                 + "\n ".join(other_exceptions)
             )
 
+        if getattr(self.builder, "encoding_cache", None) is not None:
+            self.builder._remember_encoding(
+                self.original_encoding, self.contains_replacement_characters
+            )
+
         # Clear out the markup and remove the builder's circular
         # reference to this object.
         self.markup = None
         self.builder.soup = None
 
+    @classmethod
+    def iterparse(
+        cls,
+        source: Union[_IncomingMarkup, Iterable[_RawMarkup]],
+        features: Optional[Union[str, Sequence[str]]] = None,
+        emit: Optional[Union[_StrainableElement, ElementFilter]] = None,
+        builder: Optional[Union[TreeBuilder, Type[TreeBuilder]]] = None,
+        from_encoding: Optional[_Encoding] = None,
+        release: bool = True,
+        chunk_size: Optional[int] = None,
+        element_classes: Optional[Dict[Type[PageElement], Type[PageElement]]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Tag]:
+        """Parse a document a piece at a time, yielding each `Tag` as
+        soon as its end tag has been seen.
+
+        This works like the ``iterparse()`` function found in
+        ElementTree and lxml. If the tree builder can parse
+        incrementally (see `TreeBuilder.FEEDS_INCREMENTALLY`), only
+        as much of the document as necessary is read before each
+        `Tag` is yielded. Otherwise, the whole document is parsed
+        first and then the tags are yielded in the same order.
+
+        :param source: The markup to parse. In addition to anything the
+          `BeautifulSoup` constructor accepts, this may be any iterable
+          of strings or bytestrings.
+
+        :param features: Desirable features of the parser to be used,
+          as with the `BeautifulSoup` constructor.
+
+        :param emit: Which tags to yield. This may be anything you could
+          pass in as the ``name`` argument to `Tag.find_all`, or an
+          `ElementFilter` such as a `SoupStrainer`. By default, every
+          tag is yielded.
+
+        :param builder: A TreeBuilder subclass to instantiate (or
+          instance to use), as with the `BeautifulSoup` constructor.
+
+        :param from_encoding: A string indicating the encoding of the
+          document to be parsed.
+
+        :param release: If this is True (the default), each `Tag` is
+          extracted from the tree as soon as the caller is done with
+          it, along with any whitespace immediately before it, so that
+          memory usage is bounded by the largest yielded subtree rather
+          than by the size of the document. Note that this means a
+          yielded tag won't contain any nested tags which were
+          themselves yielded earlier.
+
+        :param chunk_size: How many characters or bytes to read from
+          ``source`` at a time. Defaults to `ITERPARSE_CHUNK_SIZE`.
+
+        :param element_classes: As with the `BeautifulSoup` constructor.
+
+        :param kwargs: Any other arguments are passed into the
+          `BeautifulSoup` constructor, which will probably pass them
+          into the TreeBuilder constructor.
+        """
+        soup = cls(
+            "", features, builder, element_classes=element_classes, **kwargs
+        )
+        matcher: ElementFilter
+        if isinstance(emit, ElementFilter):
+            matcher = emit
+        elif emit is None:
+            matcher = ElementFilter()
+        else:
+            matcher = SoupStrainer(emit)
+
+        soup.reset()
+        soup.original_encoding = from_encoding
+        soup.builder.initialize_soup(soup)
+        chunks = cls._markup_chunks(source, chunk_size or cls.ITERPARSE_CHUNK_SIZE)
+        try:
+            if soup.builder.FEEDS_INCREMENTALLY:
+                soup._completed_tag_filter = matcher
+                for _ in soup.builder.feed_chunks(chunks):
+                    yield from soup._emit_completed_tags(release)
+                soup._close_open_tags()
+            else:
+                for _ in soup.builder.feed_chunks(chunks):
+                    pass
+                soup._close_open_tags()
+                soup._completed_tags = [
+                    tag for tag in soup._tags_in_closing_order() if matcher.match(tag)
+                ]
+            yield from soup._emit_completed_tags(release)
+        finally:
+            soup._completed_tag_filter = None
+            soup._completed_tags = []
+            soup.builder.soup = None
+
+    @classmethod
+    def _markup_chunks(
+        cls, source: Union[_IncomingMarkup, Iterable[_RawMarkup]], chunk_size: int
+    ) -> Iterator[_RawMarkup]:
+        """Split the source of a document into chunks suitable for
+        `TreeBuilder.feed_chunks`.
+
+        :param source: A string, bytestring, open filehandle, or
+          iterable of strings or bytestrings.
+        :param chunk_size: Split strings into pieces this big, and read
+          this much from a filehandle at a time.
+        """
+        if isinstance(source, (str, bytes)):
+            for i in range(0, len(source), chunk_size):
+                yield source[i : i + chunk_size]
+        elif hasattr(source, "read"):
+            while True:
+                data = source.read(chunk_size)
+                if not data:
+                    break
+                yield data
+        else:
+            yield from cast(Iterable[_RawMarkup], source)
+
+    def _tags_in_closing_order(self) -> List[Tag]:
+        """List every Tag in the tree in the order their end tags
+        appear in the document.
+        """
+        tags: List[Tag] = []
+        stack: List[Tuple[Tag, Iterator[PageElement]]] = [(self, iter(self.contents))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, Tag):
+                    stack.append((child, iter(child.contents)))
+                    break
+            else:
+                stack.pop()
+                if tag is not self:
+                    tags.append(tag)
+        return tags
+
+    def _emit_completed_tags(self, release: bool) -> Iterator[Tag]:
+        """Yield the tags iterparse() has been waiting for, optionally
+        releasing each one once the caller is done with it.
+        """
+        completed = self._completed_tags
+        self._completed_tags = []
+        for tag in completed:
+            yield tag
+            if release:
+                self._release(tag)
+
+    def _release(self, tag: Tag) -> None:
+        """Remove a completed `Tag`, and any whitespace immediately
+        before it, from a tree that is still being built.
+        """
+        parent = tag.parent
+        if parent is None:
+            # The caller already took it out of the tree.
+            return
+
+        # Tags are usually released shortly after they're parsed, so
+        # look for this one starting at the end.
+        contents = parent.contents
+        i = len(contents) - 1
+        while i >= 0 and contents[i] is not tag:
+            i -= 1
+        while i > 0:
+            previous = contents[i - 1]
+            if (
+                type(previous) is not NavigableString
+                or previous.strip(self.ASCII_SPACES) != ""
+            ):
+                break
+            previous.extract(_self_index=i - 1)
+            i -= 1
+
+        # If the most recently parsed element is about to leave the
+        # tree, the next element to be parsed needs to be linked to
+        # whatever came before this tag instead.
+        previous_element = tag.previous_element
+        last_descendant = tag._last_descendant()
+        tag.extract(_self_index=i)
+        if self._most_recent_element is last_descendant:
+            self._most_recent_element = previous_element
+
     def copy_self(self) -> "BeautifulSoup":
         """Create a new BeautifulSoup object with the same TreeBuilder,
         but not associated with any markup.
 
         This is the first step of the deepcopy process.
         """
-        clone = type(self)("", None, self.builder)
+        clone = type(self)("", None, self.builder, compact=self.compact)
 
         # Keep track of the encoding of the original document,
         # since we won't be parsing it again.
         clone.original_encoding = self.original_encoding
+        if self._index is not None:
+            clone._index = TagIndex()
         return clone
 
+    #: The version of the format `BeautifulSoup.__getstate__` uses to
+    #: store the parse tree.
+    #:
+    #: :meta private:
+    TREE_STATE_VERSION: int = 1
+
     def __getstate__(self) -> Dict[str, Any]:
         # Frequently a tree builder can't be pickled.
         d = dict(self.__dict__)
         if "builder" in d and d["builder"] is not None and not self.builder.picklable:
             d["builder"] = type(self.builder)
-        # Store the contents as a Unicode string.
+        # Store the parse tree in a compact structural form that can
+        # be turned back into objects without running a parser.
         d["contents"] = []
-        d["markup"] = self.decode()
+        d["markup"] = None
+        d["_tree_state"] = self._tree_state()
 
         # If _most_recent_element is present, it's a Tag object left
         # over from initial parse. It might not be picklable and we
         # don't need it.
         if "_most_recent_element" in d:
             del d["_most_recent_element"]
+
+        # The intern tables will be rebuilt along with the tree.
+        d.pop("_interned_names", None)
+        d.pop("_interned_values", None)
+
+        # A compiled parse_only filter is a closure, which can't be
+        # pickled. It's only needed while parsing.
+        d.pop("_allow_tag_creation", None)
+        d.pop("_tag_name_filter", None)
+
+        # The map of child positions refers to objects by id, so it
+        # will be rebuilt when it's needed.
+        d.pop("_child_positions", None)
+
+        # The index will be rebuilt along with the tree.
+        if d.get("_index") is not None:
+            d["_index"] = TagIndex()
         return d
 
     def __setstate__(self, state: Dict[str, Any]) -> None:
@@ -535,7 +836,190 @@ class BeautifulSoup(Tag):
             self.builder = HTMLParserTreeBuilder()
         self.builder.soup = self
         self.reset()
-        self._feed()
+        tree_state = state.pop("_tree_state", None)
+        if tree_state is None:
+            # This was pickled by an older version of Beautiful Soup,
+            # which stored the document as markup.
+            self._feed()
+        else:
+            self._restore_tree_state(tree_state)
+            self.markup = None
+            self.builder.soup = None
+
+    def _tree_state(self) -> Tuple[Any, ...]:
+        """Convert this document's parse tree into a compact form
+        for pickling.
+
+        The tree is stored as a flat array of integers, one record per
+        element in document order. Names, attribute keys and values,
+        and the contents of strings are stored once each in a table of
+        strings, and referred to by their position in that table.
+        Anything that can't be represented that way (a namespaced
+        attribute key, a multi-valued attribute, a ``<meta>`` charset)
+        goes into a table of
+        other objects, and is referred to by a negative number.
+
+        A `Tag` record is: class, name, source line, source position,
+        namespace information, number of attributes, a (key, value)
+        pair for each attribute, and number of children. A string
+        record is: class, text.
+
+        :meta private:
+        """
+        strings: List[str] = []
+        string_numbers: Dict[str, int] = {}
+        others: List[Any] = []
+        classes: List[type] = []
+        class_numbers: Dict[type, int] = {}
+        extras: List[Tuple[Optional[str], Optional[str], Dict[str, str]]] = []
+        extra_numbers: Dict[Tuple[Optional[str], Optional[str], int], int] = {}
+        records = array("i")
+
+        def string_number(value: str) -> int:
+            number = string_numbers.get(value)
+            if number is None:
+                number = string_numbers[value] = len(strings)
+                strings.append(value)
+            return number
+
+        def value_number(value: Any) -> int:
+            if type(value) is str:
+                return string_number(value)
+            if isinstance(value, list):
+                # Store multi-valued attributes as plain lists; they'll
+                # be converted back using the builder's
+                # attribute_value_list_class.
+                value = list(value)
+            # Anything else, such as a NamespacedAttribute or a
+            # CharsetMetaAttributeValue, is pickled as-is.
+            others.append(value)
+            return -len(others)
+
+        # Walk the tree without recursion; each stack entry is an
+        # iterator over the remaining children of an open tag.
+        stack = [iter(self.contents)]
+        records.append(len(self.contents))
+        while stack:
+            element = next(stack[-1], None)
+            if element is None:
+                stack.pop()
+                continue
+            cls = type(element)
+            class_number = class_numbers.get(cls)
+            if class_number is None:
+                class_number = class_numbers[cls] = len(classes)
+                classes.append(cls)
+            records.append(class_number)
+            if not isinstance(element, Tag):
+                records.append(string_number(str(element)))
+                continue
+
+            records.append(string_number(element.name))
+            records.append(-1 if element.sourceline is None else element.sourceline)
+            records.append(-1 if element.sourcepos is None else element.sourcepos)
+            if element.namespace is None and element.prefix is None and not element._namespaces:
+                records.append(-1)
+            else:
+                key = (element.namespace, element.prefix, id(element._namespaces))
+                extra_number = extra_numbers.get(key)
+                if extra_number is None:
+                    extra_number = extra_numbers[key] = len(extras)
+                    extras.append(
+                        (element.namespace, element.prefix, element._namespaces)
+                    )
+                records.append(extra_number)
+            records.append(len(element.attrs))
+            for key, value in element.attrs.items():
+                records.append(value_number(key))
+                records.append(value_number(value))
+            records.append(len(element.contents))
+            if element.contents:
+                stack.append(iter(element.contents))
+        if records and -(2**15) <= min(records) and max(records) < 2**15:
+            # Small documents don't need four bytes per number.
+            records = array("h", records)
+        return (self.TREE_STATE_VERSION, strings, others, classes, extras, records)
+
+    def _restore_tree_state(self, tree_state: Tuple[Any, ...]) -> None:
+        """Rebuild the parse tree from the output of `_tree_state`,
+        creating and linking the objects directly instead of running
+        the markup through a parser.
+
+        :meta private:
+        """
+        version, strings, others, classes, extras, records = tree_state
+        if version != self.TREE_STATE_VERSION:
+            raise ValueError(
+                f"Can't unpickle a parse tree stored in format version {version}."
+            )
+        builder = self.builder
+        attribute_dict_class = builder.attribute_dict_class
+        attribute_value_list_class = builder.attribute_value_list_class
+        is_tag = [issubclass(cls, Tag) for cls in classes]
+
+        def value(number: int) -> Any:
+            if number >= 0:
+                return strings[number]
+            obj = others[-number - 1]
+            if isinstance(obj, list):
+                obj = attribute_value_list_class(obj)
+            return obj
+
+        # Each stack entry is a Tag whose children are still being
+        # created, along with how many are left to create.
+        stack: List[Tuple[Tag, int]] = []
+        parent: Tag = self
+        remaining = records[0]
+        previous: Optional[PageElement] = None
+        i = 1
+        while remaining:
+            class_number = records[i]
+            element: PageElement
+            if is_tag[class_number]:
+                sourceline = records[i + 2]
+                sourcepos = records[i + 3]
+                extra_number = records[i + 4]
+                attribute_count = records[i + 5]
+                namespace = prefix = namespaces = None
+                if extra_number >= 0:
+                    namespace, prefix, namespaces = extras[extra_number]
+                attrs = attribute_dict_class()
+                end = i + 6 + attribute_count * 2
+                for j in range(i + 6, end, 2):
+                    attrs[value(records[j])] = value(records[j + 1])
+                children = records[end]
+                element = classes[class_number](
+                    self,
+                    builder,
+                    self._intern_name(strings[records[i + 1]]),
+                    namespace,
+                    prefix,
+                    attrs,
+                    parent,
+                    previous,
+                    sourceline=None if sourceline < 0 else sourceline,
+                    sourcepos=None if sourcepos < 0 else sourcepos,
+                    namespaces=namespaces,
+                )
+                i = end + 1
+            else:
+                children = 0
+                element = classes[class_number](strings[records[i + 1]])
+                element.setup(parent, previous)
+                i += 2
+            parent.contents.append(element)
+            previous = element
+            remaining -= 1
+            if children:
+                stack.append((parent, remaining))
+                parent = cast(Tag, element)
+                remaining = children
+            else:
+                while not remaining and stack:
+                    parent, remaining = stack.pop()
+        self._most_recent_element = previous
+        if self._index is not None:
+            self._index.rebuild(self)
 
     @classmethod
     @_deprecated(
@@ -662,7 +1146,10 @@ class BeautifulSoup(Tag):
 
         if self.markup is not None:
             self.builder.feed(self.markup)
-        # Close out any unfinished strings and close all the open tags.
+        self._close_open_tags()
+
+    def _close_open_tags(self) -> None:
+        """Close out any unfinished strings and close all the open tags."""
         self.endData()
         while (
             self.currentTag is not None and self.currentTag.name != self.ROOT_TAG_NAME
@@ -683,8 +1170,49 @@ class BeautifulSoup(Tag):
         self.preserve_whitespace_tag_stack = []
         self.string_container_stack = []
         self._most_recent_element = None
+        self._child_positions = None
+        self._completed_tag_filter = None
+        self._completed_tags = []
+        self._allow_tag_creation = None
+        self._tag_name_filter = None
+        self._discard_strings = False
+        if self.parse_only is not None:
+            self._allow_tag_creation = self.parse_only._tag_creation_function()
+            self._tag_name_filter = self.parse_only._tag_name_function()
+            self._discard_strings = self.parse_only._excludes_strings
+        self._interned_names = {}
+        self._interned_values = {}
+        if self._index is not None:
+            self._index.clear()
         self.pushTag(self)
 
+    def _intern_name(self, name: str) -> str:
+        """Find the copy of a tag name or attribute key that's shared
+        by every tag in this document.
+
+        Names are also run through `sys.intern`, so a tag name will
+        usually be the very same object as the string literal used
+        to search for it, and comparing the two is an identity check.
+
+        :meta private:
+        """
+        interned = self._interned_names.get(name)
+        if interned is None:
+            interned = self._interned_names[name] = sys.intern(name)
+        return interned
+
+    def _intern_value(self, value: str) -> str:
+        """Find the copy of an attribute value that's shared by every
+        tag in this document.
+
+        Unlike names, values are not run through `sys.intern`: there
+        can be any number of distinct values, and they should be
+        freed along with the document.
+
+        :meta private:
+        """
+        return self._interned_values.setdefault(value, value)
+
     def new_tag(
         self,
         name: str,
@@ -789,6 +1317,102 @@ class BeautifulSoup(Tag):
         """
         raise NotImplementedError("BeautifulSoup objects don't support insert_after().")
 
+    def build_index(self) -> None:
+        """Index every tag in this document by name, ``id`` and ``class``.
+
+        From then on, `Tag.find_all` and `Tag.find`, called on this
+        object, can answer a query on any of those three things by
+        looking at a few candidates instead of the whole document, as
+        can `BeautifulSoup.select` when given a selector like ``a``,
+        ``#main`` or ``li.item``. Results are exactly the same as
+        without the index.
+
+        The index is kept up to date as the tree is modified with
+        methods like `Tag.insert`, `PageElement.extract`,
+        `PageElement.replace_with` and `PageElement.decompose`, and
+        when ``id`` or ``class`` is set with ``tag[attribute] = value``.
+        If you rename a tag by assigning to `Tag.name`, or modify
+        `Tag.attrs` directly, call this method again afterwards.
+
+        Passing ``index=True`` into the `BeautifulSoup` constructor
+        builds the index while the document is parsed.
+        """
+        if self._index is None:
+            self._index = TagIndex()
+        self._index.rebuild(self)
+
+    def _current_index(self) -> Optional[TagIndex]:
+        """Return this document's `TagIndex`, rebuilding it first if
+        it's out of date.
+        """
+        index = self._index
+        if index is not None and index.stale:
+            index.rebuild(self)
+        return index
+
+    def _find_all_indexed(
+        self,
+        name: _FindMethodName,
+        attrs: _StrainableAttributes,
+        string: Optional[_StrainableString],
+        limit: Optional[int],
+        **kwargs: _StrainableAttribute,
+    ) -> Optional[_QueryResults]:
+        """Answer a `Tag.find_all` query from this document's index, if
+        it has one and the query is on tag name, ``id`` or ``class``.
+
+        :meta private:
+        """
+        if (
+            self._index is None
+            or string is not None
+            or "text" in kwargs
+            or "_class" in kwargs
+            or (isinstance(name, ElementFilter) and not isinstance(name, SoupStrainer))
+        ):
+            return None
+        if isinstance(name, SoupStrainer):
+            matcher = name
+        else:
+            matcher = SoupStrainer(name, attrs, **kwargs)
+        index = self._current_index()
+        assert index is not None
+        found = index.find_all(matcher, limit)
+        if found is None:
+            return None
+        return ResultSet(matcher, found)
+
+    def select(
+        self,
+        selector: str,
+        namespaces: Optional[Dict[str, str]] = None,
+        limit: int = 0,
+        **kwargs: Any,
+    ) -> ResultSet[Tag]:
+        """Perform a CSS selection operation on the document.
+
+        This works exactly like `Tag.select`, but if this is an HTML
+        document that has been indexed (see
+        `BeautifulSoup.build_index`), selectors like ``a``, ``#main``,
+        ``.nav``, ``a#main`` and ``li.item`` will use the index.
+        """
+        from bs4.css import soupsieve
+
+        if (
+            self._index is not None
+            and namespaces is None
+            and not kwargs
+            and not self.is_xml
+            and "" not in self._namespaces
+            and soupsieve is not None
+        ):
+            index = self._current_index()
+            assert index is not None
+            found = index.select(selector, limit)
+            if found is not None:
+                return ResultSet(None, found)
+        return super(BeautifulSoup, self).select(selector, namespaces, limit, **kwargs)
+
     def popTag(self) -> Optional[Tag]:
         """Internal method called by _popToTag when a tag is closed.
 
@@ -807,6 +1431,13 @@ class BeautifulSoup(Tag):
             self.preserve_whitespace_tag_stack.pop()
         if self.string_container_stack and tag == self.string_container_stack[-1]:
             self.string_container_stack.pop()
+        if (
+            self._completed_tag_filter is not None
+            and tag is not self
+            and self._completed_tag_filter.match(tag)
+        ):
+            # iterparse() is waiting for tags like this one.
+            self._completed_tags.append(tag)
         # print("Pop", tag.name)
         if self.tagStack:
             self.currentTag = self.tagStack[-1]
@@ -828,6 +1459,8 @@ class BeautifulSoup(Tag):
             self.preserve_whitespace_tag_stack.append(tag)
         if tag.name in self.builder.string_containers:
             self.string_container_stack.append(tag)
+        if self._index is not None and tag is not self:
+            self._index.add(tag)
 
     def endData(self, containerClass: Optional[Type[NavigableString]] = None) -> None:
         """Method called by the TreeBuilder when the end of a data segment
@@ -905,6 +1538,12 @@ class BeautifulSoup(Tag):
         self._most_recent_element = o
         parent.contents.append(o)
 
+        if self._index is not None and isinstance(o, Tag):
+            # Tree builders that use this method may attach tags out
+            # of document order, so index them all once parsing is
+            # done.
+            self._index.stale = True
+
         # Check if we are inserting into an already parsed node.
         if fix:
             self._linkage_fixer(parent)
@@ -1025,9 +1664,9 @@ class BeautifulSoup(Tag):
         self.endData()
 
         if (
-            self.parse_only
+            self._allow_tag_creation is not None
             and len(self.tagStack) <= 1
-            and not self.parse_only.allow_tag_creation(nsprefix, name, attrs)
+            and not self._allow_tag_creation(nsprefix, name, attrs)
         ):
             return None
 
@@ -1038,7 +1677,7 @@ class BeautifulSoup(Tag):
         tag = tag_class(
             self,
             self.builder,
-            name,
+            self._intern_name(name),
             namespace,
             nsprefix,
             attrs,
@@ -1074,8 +1713,28 @@ class BeautifulSoup(Tag):
 
         :meta private:
         """
+        if self._discard_strings and len(self.tagStack) <= 1:
+            # This string isn't inside any tag allowed by parse_only,
+            # so it would be rejected by endData() anyway.
+            return
         self.current_data.append(data)
 
+    def _document_prefix(self, eventual_encoding: Optional[_Encoding]) -> str:
+        """An XML document starts with an XML declaration."""
+        if not self.is_xml:
+            return ""
+        # Print the XML declaration
+        encoding_part = ""
+        declared_encoding: Optional[str] = eventual_encoding
+        if eventual_encoding in PYTHON_SPECIFIC_ENCODINGS:
+            # This is a special Python encoding; it can't actually
+            # go into an XML document because it means nothing
+            # outside of Python.
+            declared_encoding = None
+        if declared_encoding is not None:
+            encoding_part = ' encoding="%s"' % declared_encoding
+        return '<?xml version="1.0"%s?>\n' % encoding_part
+
     def decode(
         self,
         indent_level: Optional[int] = None,
@@ -1100,20 +1759,7 @@ class BeautifulSoup(Tag):
             parse tree. This is only used by `Tag.decode_contents` and
             you probably won't need to use it.
         """
-        if self.is_xml:
-            # Print the XML declaration
-            encoding_part = ""
-            declared_encoding: Optional[str] = eventual_encoding
-            if eventual_encoding in PYTHON_SPECIFIC_ENCODINGS:
-                # This is a special Python encoding; it can't actually
-                # go into an XML document because it means nothing
-                # outside of Python.
-                declared_encoding = None
-            if declared_encoding is not None:
-                encoding_part = ' encoding="%s"' % declared_encoding
-            prefix = '<?xml version="1.0"%s?>\n' % encoding_part
-        else:
-            prefix = ""
+        prefix = self._document_prefix(eventual_encoding)
 
         # Prior to 4.13.0, the first argument to this method was a
         # bool called pretty_print, which gave the method a different
@@ -0,0 +1,285 @@
+"""An index of the tags in a parse tree, keyed by tag name, ``id``
+and ``class``.
+
+A `TagIndex` lets `Tag.find_all` and `BeautifulSoup.select`
+answer simple queries by looking up a handful of candidates instead of
+walking the entire tree. Create one by passing ``index=True`` into the
+`BeautifulSoup` constructor or by calling `BeautifulSoup.build_index`.
+"""
+
+from __future__ import annotations
+
+import re
+from threading import RLock
+import weakref
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from bs4.element import PageElement, Tag
+
+if TYPE_CHECKING:
+    from bs4.filter import SoupStrainer
+    from bs4._typing import _AttributeValue
+
+#: The tags stored under a single key, in document order. A dict is
+#: used as an ordered set: tags are keyed by their `id` so that
+#: removal doesn't require a scan.
+_TagSet = Dict[int, Tag]
+
+#: A CSS selector simple enough to be answered by the index: an
+#: optional type selector followed by an optional ID or class selector.
+_SIMPLE_SELECTOR = re.compile(
+    r"(?P<name>[A-Za-z][A-Za-z0-9_-]*)?"
+    r"(?:#(?P<id>[A-Za-z_][A-Za-z0-9_-]*)|\.(?P<class>[A-Za-z_][A-Za-z0-9_-]*))?"
+)
+
+#: Guards `PageElement._indexes_in_use`. Reentrant, because the
+#: count can be lowered by a finalizer that runs while it's held.
+_indexes_in_use_lock = RLock()
+
+
+def _index_dropped() -> None:
+    with _indexes_in_use_lock:
+        PageElement._indexes_in_use -= 1
+
+
+#: How Soup Sieve splits a string-valued ``class`` attribute into tokens.
+_CLASS_TOKEN = re.compile(r"[^ \t\r\n\f]+")
+
+
+class TagIndex(object):
+    """Maps tag names, ``id`` values and ``class`` tokens to the tags
+    that have them, in document order.
+
+    The index is an accelerator, not an authority: every candidate it
+    produces is checked against the real query before being returned,
+    so a stale entry can never cause a wrong match. Changes made
+    through `Tag.insert`, `PageElement.extract` and the methods built
+    on them (`PageElement.replace_with`, `PageElement.decompose`,
+    etc.), and through ``tag[attribute]`` assignment, are tracked
+    automatically. Changes made by assigning to `Tag.name` or by
+    modifying `Tag.attrs` directly are not; call
+    `BeautifulSoup.build_index` after making them.
+    """
+
+    #: Tags keyed by name. A tag with a namespace prefix is also
+    #: stored under its prefixed name.
+    names: Dict[str, _TagSet]
+
+    #: Tags keyed by the value of their ``id`` attribute.
+    ids: Dict[str, _TagSet]
+
+    #: Tags keyed by each token in their ``class`` attribute.
+    classes: Dict[str, _TagSet]
+
+    #: If this is True, the index no longer reflects the document
+    #: order of the tree and must be rebuilt before it's used.
+    stale: bool
+
+    def __init__(self) -> None:
+        self.names = {}
+        self.ids = {}
+        self.classes = {}
+        self.stale = False
+        self._entries: Dict[int, Tuple[Tag, List[_TagSet]]] = {}
+
+        # As long as this index is alive, tree modifications need to
+        # look for an index to keep up to date.
+        with _indexes_in_use_lock:
+            PageElement._indexes_in_use += 1
+        weakref.finalize(self, _index_dropped)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        self.names.clear()
+        self.ids.clear()
+        self.classes.clear()
+        self._entries.clear()
+        self.stale = False
+
+    def rebuild(self, root: Tag) -> None:
+        """Index every tag beneath ``root``, in document order."""
+        self.clear()
+        for element in root.descendants:
+            if isinstance(element, Tag):
+                self.add(element)
+
+    def add(self, tag: Tag) -> None:
+        """Add a `Tag` to the index.
+
+        The `Tag` must come after everything already in the index;
+        otherwise the document order of the index will be wrong.
+        """
+        key = id(tag)
+        if key in self._entries:
+            return
+        sets: List[_TagSet] = []
+        sets.append(self.names.setdefault(tag.name, {}))
+        if tag.prefix:
+            sets.append(self.names.setdefault(f"{tag.prefix}:{tag.name}", {}))
+        for table, attribute in ((self.ids, "id"), (self.classes, "class")):
+            value = tag.attrs.get(attribute)
+            if value is not None:
+                for value_key in self._attribute_keys(value):
+                    sets.append(table.setdefault(value_key, {}))
+        for tag_set in sets:
+            tag_set[key] = tag
+        self._entries[key] = (tag, sets)
+
+    def discard(self, tag: Tag) -> None:
+        """Remove a `Tag` from the index, if it's present."""
+        entry = self._entries.pop(id(tag), None)
+        if entry is None:
+            return
+        for tag_set in entry[1]:
+            tag_set.pop(id(tag), None)
+
+    def subtree_inserted(self, top: PageElement) -> None:
+        """Note that a `PageElement` (and everything beneath it) was
+        inserted into the tree.
+        """
+        if self.stale or not isinstance(top, Tag):
+            return
+        last = top._last_descendant()
+        if last is not None and last.next_element is None:
+            # The new subtree is at the very end of the document, so
+            # its tags can simply be added to the end of the index.
+            for tag in self._tags(top):
+                self.add(tag)
+        else:
+            # Splicing tags into the middle of each ordered set is
+            # more trouble than rebuilding the index the next time
+            # it's needed.
+            self.stale = True
+
+    def subtree_extracted(self, top: PageElement) -> None:
+        """Note that a `PageElement` (and everything beneath it) was
+        removed from the tree.
+        """
+        if self.stale or not isinstance(top, Tag):
+            return
+        for tag in self._tags(top):
+            self.discard(tag)
+
+    def find_all(self, matcher: SoupStrainer, limit: Optional[int]) -> Optional[List[Tag]]:
+        """Use the index to find the tags that match a `SoupStrainer`.
+
+        :param matcher: The `SoupStrainer` to check candidates against.
+        :param limit: Stop looking after finding this many results.
+        :return: A list of matching tags, or None if the index can't
+            help with this `SoupStrainer`, in which case the caller
+            should search the tree itself.
+        """
+        candidates: List[_TagSet] = []
+        if len(matcher.name_rules) == 1:
+            name = matcher.name_rules[0].string
+            if name is not None:
+                candidates.append(self.names.get(name, {}))
+        for table, attribute in ((self.ids, "id"), (self.classes, "class")):
+            rules = matcher.attribute_rules.get(attribute)
+            if rules is not None and len(rules) == 1 and rules[0].string is not None:
+                candidates.append(table.get(rules[0].string, {}))
+        if not candidates:
+            return None
+
+        from bs4.filter import SoupStrainer
+
+        if type(matcher).matches_tag is SoupStrainer.matches_tag:
+            match = matcher.compile()
+
+            def matches_tag(tag: Tag) -> bool:
+                return match(tag.prefix, tag.name, tag.attrs, tag)
+
+        else:
+            matches_tag = matcher.matches_tag
+
+        results: List[Tag] = []
+        for tag in min(candidates, key=len).values():
+            if matches_tag(tag):
+                results.append(tag)
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+    def select(self, selector: str, limit: int) -> Optional[List[Tag]]:
+        """Use the index to find the tags in an HTML document that
+        match a simple CSS selector: ``tag``, ``#id``, ``.class``,
+        ``tag#id`` or ``tag.class``.
+
+        :return: A list of matching tags, or None if the selector is
+            too complicated for the index.
+        """
+        match = _SIMPLE_SELECTOR.fullmatch(selector)
+        if match is None or not any(match.groups()):
+            return None
+        name, id_value, class_token = match.group("name", "id", "class")
+
+        candidates: List[_TagSet] = []
+        if name is not None:
+            # Type selectors are case-insensitive in HTML documents.
+            # That's easy to honor as long as every tag name is
+            # lowercase, which is almost always the case.
+            if any(key != key.lower() for key in self.names):
+                return None
+            name = name.lower()
+            candidates.append(self.names.get(name, {}))
+        if id_value is not None:
+            candidates.append(self.ids.get(id_value, {}))
+        if class_token is not None:
+            candidates.append(self.classes.get(class_token, {}))
+
+        results: List[Tag] = []
+        for tag in min(candidates, key=len).values():
+            if name is not None and tag.name != name:
+                continue
+            if id_value is not None and tag.attrs.get("id") != id_value:
+                continue
+            if class_token is not None:
+                value = tag.attrs.get("class")
+                if value is None or class_token not in self._class_tokens(value):
+                    continue
+            results.append(tag)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    @classmethod
+    def _attribute_keys(cls, value: _AttributeValue) -> Iterator[str]:
+        """Every key under which a tag with this attribute value
+        should be found.
+
+        This is a superset of the values a `SoupStrainer` or a CSS
+        selector could match, since candidates are always checked
+        afterwards.
+        """
+        if isinstance(value, list):
+            yield from value
+            if len(value) > 1:
+                yield " ".join(value)
+        else:
+            yield value
+            tokens = cls._class_tokens(value)
+            if len(tokens) > 1:
+                yield from tokens
+
+    @classmethod
+    def _class_tokens(cls, value: _AttributeValue) -> List[str]:
+        """Split a ``class`` attribute into tokens the way Soup Sieve does."""
+        if isinstance(value, list):
+            return value
+        return _CLASS_TOKEN.findall(value)
+
+    @classmethod
+    def _tags(cls, top: Tag) -> Iterator[Tag]:
+        for element in top.self_and_descendants:
+            if isinstance(element, Tag):
+                yield element
@@ -137,8 +137,21 @@ _PageElementMatchFunction: TypeAlias = Callable[["PageElement"], bool]
 
 #: A function that takes the raw parsed ingredients of a markup tag
 #: and returns a yes-or-no answer.
-#  Not necessary at the moment.
-# _AllowTagCreationFunction:TypeAlias = Callable[[Optional[str], str, Optional[_RawAttributeValues]], bool]
+_AllowTagCreationFunction: TypeAlias = Callable[
+    [Optional[str], str, Optional[_RawAttributeValues]], bool
+]
+
+#: A function that takes a markup tag's namespace prefix and name,
+#: and returns a yes-or-no answer.
+_TagNameFilterFunction: TypeAlias = Callable[[Optional[str], str], bool]
+
+#: A function created by `SoupStrainer.compile`. It takes a tag's
+#: namespace prefix, name and attributes, plus the `Tag` itself if it
+#: has been created, and returns a yes-or-no answer.
+_CompiledTagMatchFunction: TypeAlias = Callable[
+    [Optional[str], str, Optional[_RawOrProcessedAttributeValues], Optional["Tag"]],
+    bool,
+]
 
 #: A function that takes the raw parsed ingredients of a markup string node
 #: and returns a yes-or-no answer.
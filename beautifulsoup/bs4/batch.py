@@ -0,0 +1,303 @@
+"""Parse many documents at once, using a pool of worker processes.
+
+Parsing is CPU-bound and holds the GIL, so a single process can only
+parse one document at a time. `parse_many` spreads a corpus of
+documents across a `concurrent.futures.ProcessPoolExecutor`. Each
+document is parsed in a worker process, and an extraction function
+you provide runs there too, so only its (hopefully small) result has
+to be sent back::
+
+    from bs4.batch import parse_many
+
+    def title(soup):
+        return soup.title.string if soup.title else None
+
+    for result in parse_many(paths, "html.parser", extract=title, workers=8):
+        if result.ok:
+            print(result.source, result.value)
+        else:
+            print(result.source, "failed:", result.error)
+
+The extraction function is sent to the worker processes, so it must
+be picklable: define it at the top level of a module, not inside
+another function or as a lambda.
+"""
+
+# Use of this source code is governed by the MIT license.
+__license__ = "MIT"
+
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+import itertools
+import os
+import pickle
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from bs4 import BeautifulSoup
+
+#: A document to be parsed: the path to a file, or the markup itself
+#: as a bytestring.
+_BatchSource = Union[str, "os.PathLike[str]", bytes, bytearray]
+
+#: A function that runs in a worker process and turns a parsed
+#: document into the value that's sent back.
+_Extractor = Callable[[BeautifulSoup], Any]
+
+
+class BatchResult(object):
+    """The outcome of parsing a single document with `parse_many`.
+
+    :param index: The position of the document in the input.
+    :param source: The path of the document, or None if its markup
+        was passed in directly.
+    :param value: The return value of the extraction function, if
+        the document was parsed successfully.
+    :param error: The exception raised while parsing the document or
+        extracting data from it, if there was one.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        source: Optional[str],
+        value: Any = None,
+        error: Optional[BaseException] = None,
+    ):
+        self.index = index
+        self.source = source
+        self.value = value
+        self.error = error
+
+    #: The position of the document in the input to `parse_many`.
+    index: int
+
+    #: The path of the document, or None if its markup was passed in
+    #: directly.
+    source: Optional[str]
+
+    #: The return value of the extraction function.
+    value: Any
+
+    #: The exception that prevented this document from being
+    #: processed, such as `bs4.ParserRejectedMarkup`.
+    error: Optional[BaseException]
+
+    @property
+    def ok(self) -> bool:
+        """Was this document parsed and processed without an error?"""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            outcome = f"value={self.value!r}"
+        else:
+            outcome = f"error={self.error!r}"
+        return f"<BatchResult index={self.index} source={self.source!r} {outcome}>"
+
+
+def parse_many(
+    sources: Iterable[_BatchSource],
+    features: Optional[Union[str, Sequence[str]]] = None,
+    extract: Optional[_Extractor] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    **kwargs: Any,
+) -> Iterator[BatchResult]:
+    """Parse a number of documents in parallel.
+
+    :param sources: The documents to parse. A string or path-like
+        object is treated as the path to a file; a bytestring is
+        treated as markup. ``sources`` is consumed lazily, so it can
+        be a generator over a very large corpus.
+    :param features: The parser to use, as with the `BeautifulSoup`
+        constructor.
+    :param extract: A function to call, in the worker process, on each
+        `BeautifulSoup` object. Its return value becomes
+        `BatchResult.value`. If this is None, the `BeautifulSoup`
+        object itself is sent back, which is much slower.
+    :param workers: The number of worker processes. Defaults to the
+        number of CPUs. If this is 0, every document is parsed in the
+        current process, which is useful for debugging.
+    :param chunksize: How many documents to send to a worker at a
+        time. Larger chunks reduce the overhead of talking to the
+        workers when documents are small.
+    :param ordered: If True (the default), results are yielded in the
+        same order as ``sources``. If False, each result is yielded as
+        soon as it's ready.
+    :param kwargs: Any other arguments are passed into the
+        `BeautifulSoup` constructor.
+
+    :yield: One `BatchResult` per document. A document that can't be
+        read, parsed or processed results in a `BatchResult` with an
+        `BatchResult.error`; the rest of the batch carries on.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    if workers is not None and workers < 0:
+        raise ValueError("workers cannot be negative")
+
+    chunks = _chunks(enumerate(sources), chunksize)
+    if workers == 0:
+        for chunk in chunks:
+            yield from _parse_chunk(chunk, features, extract, kwargs)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Keep a few chunks queued up for each worker, but don't submit
+    # the whole corpus at once: that would hold every document (or
+    # path) and every Future in memory.
+    max_pending = workers * 2
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Each Future is mapped to the chunk it's working on, so that
+        # if the whole chunk fails there's still a result for each
+        # document.
+        submitted: Dict[Future, List[Tuple[int, _BatchSource]]] = {}
+
+        def submit(chunk: List[Tuple[int, _BatchSource]]) -> Future:
+            nonlocal executor
+            try:
+                future = executor.submit(
+                    _parse_chunk, chunk, features, extract, kwargs
+                )
+            except BrokenProcessPool:
+                # A worker process died (it ran out of memory, say, or
+                # a parser crashed). Whatever was running in the old
+                # pool fails with BrokenProcessPool, but the rest of
+                # the batch can go to a new pool.
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                future = executor.submit(
+                    _parse_chunk, chunk, features, extract, kwargs
+                )
+            submitted[future] = chunk
+            return future
+
+        def results(future: Future) -> List[BatchResult]:
+            return _chunk_results(future, submitted.pop(future))
+
+        if ordered:
+            queue: Deque[Future] = deque()
+            for chunk in chunks:
+                queue.append(submit(chunk))
+                if len(queue) >= max_pending:
+                    yield from results(queue.popleft())
+            while queue:
+                yield from results(queue.popleft())
+        else:
+            pending: Set[Future] = set()
+            for chunk in chunks:
+                pending.add(submit(chunk))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from results(future)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from results(future)
+    finally:
+        executor.shutdown()
+
+
+def _chunks(
+    items: Iterator[Tuple[int, _BatchSource]], size: int
+) -> Iterator[List[Tuple[int, _BatchSource]]]:
+    """Group numbered sources into lists of ``size`` items."""
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunk_results(
+    future: Future, chunk: List[Tuple[int, _BatchSource]]
+) -> List[BatchResult]:
+    """Get the results of a chunk of work from a worker process.
+
+    Errors in individual documents are already part of the results.
+    If the chunk as a whole failed--because an extracted value
+    couldn't be pickled, say, or because the worker process died--
+    every document in the chunk gets that error.
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return [
+            BatchResult(
+                index,
+                None if isinstance(source, (bytes, bytearray)) else os.fspath(source),
+                error=e,
+            )
+            for index, source in chunk
+        ]
+
+
+def _parse_chunk(
+    chunk: List[Tuple[int, _BatchSource]],
+    features: Optional[Union[str, Sequence[str]]],
+    extract: Optional[_Extractor],
+    kwargs: Dict[str, Any],
+) -> List[BatchResult]:
+    """Parse a chunk of documents. This runs in a worker process."""
+    return [_parse_one(index, source, features, extract, kwargs) for index, source in chunk]
+
+
+def _parse_one(
+    index: int,
+    source: _BatchSource,
+    features: Optional[Union[str, Sequence[str]]],
+    extract: Optional[_Extractor],
+    kwargs: Dict[str, Any],
+) -> BatchResult:
+    """Parse one document and run the extraction function on it,
+    turning any exception into a `BatchResult`.
+    """
+    path: Optional[str] = None
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            soup = BeautifulSoup(bytes(source), features, **kwargs)
+        else:
+            path = os.fspath(source)
+            with open(path, "rb") as fp:
+                soup = BeautifulSoup(fp, features, **kwargs)
+        value = soup if extract is None else extract(soup)
+        return BatchResult(index, path, value=value)
+    except Exception as e:
+        return BatchResult(index, path, error=_picklable(e))
+
+
+def _picklable(e: Exception) -> Exception:
+    """Make sure an exception can be sent back from a worker process.
+
+    If it can't, a `RuntimeError` describing it is sent instead, so
+    that one odd exception can't break the whole batch.
+    """
+    try:
+        pickle.dumps(e)
+    except Exception:
+        return RuntimeError(f"{e.__class__.__name__}: {e}")
+    return e
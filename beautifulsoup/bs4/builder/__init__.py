@@ -3,21 +3,28 @@ from __future__ import annotations
 # Use of this source code is governed by the MIT license.
 __license__ = "MIT"
 
+import codecs
 from collections import defaultdict
+import importlib
 import re
+from threading import Lock
 from types import ModuleType
 from typing import (
     Any,
     cast,
     Dict,
+    Hashable,
     Iterable,
+    Iterator,
     List,
+    Mapping,
     Optional,
     Pattern,
     Set,
     Tuple,
     Type,
     TYPE_CHECKING,
+    Union,
 )
 import warnings
 import sys
@@ -47,9 +54,11 @@ from bs4._warnings import XMLParsedAsHTMLWarning
 
 if TYPE_CHECKING:
     from bs4 import BeautifulSoup
+    from bs4.dammit import EncodingCache
     from bs4.element import (
         NavigableString,
         Tag,
+        TagProfile,
     )
     from bs4._typing import (
         _AttributeValue,
@@ -74,6 +83,74 @@ XML = "xml"
 HTML = "html"
 HTML_5 = "html5"
 
+#: Pass either of these into the `BeautifulSoup` constructor as
+#: ``features`` to have it pick the fastest installed TreeBuilder that
+#: can handle the markup. See `TreeBuilderRegistry.fastest`.
+FASTEST = "fastest"
+AUTO = "auto"
+
+#: Rough parsing speeds, in characters per second, for the
+#: TreeBuilders that come with Beautiful Soup, keyed by
+#: `TreeBuilder.NAME`. Only the relative speeds matter. Run
+#: `bs4.diagnose.benchmark_parsers` to measure and record the speeds
+#: on your own system.
+DEFAULT_THROUGHPUT: Dict[str, float] = {
+    "lxml-xml": 8000000,
+    "lxml": 6000000,
+    "html.parser": 1500000,
+    "html5lib": 400000,
+}
+
+#: How much of a document `sniff_markup_type` looks at.
+SNIFF_LENGTH: int = 1024
+
+# The first DOCTYPE declaration or start tag in a document.
+_DOCTYPE_OR_ROOT: Pattern[str] = re.compile(
+    r"<(?:!DOCTYPE\s+(?P<doctype>[^\s>\[]+)|(?P<root>[A-Za-z_][^\s/>]*))", re.I
+)
+_COMMENT: Pattern[str] = re.compile("<!--.*?(?:-->|$)", re.S)
+
+
+def sniff_markup_type(markup: _RawMarkup) -> str:
+    """Guess whether a document is XML or HTML by looking at the
+    beginning of it.
+
+    A document is treated as XML if its DOCTYPE names something other
+    than "html", or if it starts with an XML declaration and its root
+    tag isn't <html>. Anything else is treated as HTML.
+
+    :param markup: The document, or the first `SNIFF_LENGTH` characters
+        or bytes of it.
+    :return: `XML` or `HTML`.
+    """
+    prefix = markup[:SNIFF_LENGTH]
+    if isinstance(prefix, bytes):
+        for bom, encoding in (
+            (codecs.BOM_UTF8, "utf-8"),
+            (codecs.BOM_UTF16_LE, "utf-16-le"),
+            (codecs.BOM_UTF16_BE, "utf-16-be"),
+        ):
+            if prefix.startswith(bom):
+                text = prefix[len(bom) :].decode(encoding, "ignore")
+                break
+        else:
+            # Only the ASCII characters matter, and every byte can be
+            # decoded as Latin-1.
+            text = prefix.decode("latin-1")
+    else:
+        text = prefix
+    text = _COMMENT.sub("", text.lstrip("\ufeff \t\r\n"))
+    has_declaration = text.startswith("<?xml")
+    match = _DOCTYPE_OR_ROOT.search(text)
+    if match is not None:
+        doctype, root = match.group("doctype", "root")
+        if doctype is not None:
+            return HTML if doctype.lower() == "html" else XML
+        if root.lower() == "html":
+            return HTML
+    return XML if has_declaration else HTML
+
+
 __all__ = [
     "TreeBuilderRegistry",
     "TreeBuilder",
@@ -83,17 +160,57 @@ __all__ = [
     "ParserRejectedMarkup", # backwards compatibility only as of 4.13.0
 ]
 
+class _DeferredRegistration(object):
+    """A module of TreeBuilders that will be registered the first
+    time one of them might be needed.
+
+    :param module_name: The module to import.
+    :param features: Every feature advertised by a TreeBuilder in
+        the module.
+    """
+
+    def __init__(self, module_name: str, features: Iterable[str]):
+        self.module_name = module_name
+        self.features = set(features)
+
+
 class TreeBuilderRegistry(object):
     """A way of looking up TreeBuilder subclasses by their name or by desired
     features.
     """
 
-    builders_for_feature: Dict[str, List[Type[TreeBuilder]]]
-    builders: List[Type[TreeBuilder]]
-
     def __init__(self) -> None:
-        self.builders_for_feature = defaultdict(list)
-        self.builders = []
+        self._builders_for_feature: Dict[str, List[Type[TreeBuilder]]] = defaultdict(
+            list
+        )
+        self._builders: List[Type[TreeBuilder]] = []
+
+        # Every registration in order, so that if a deferred module is
+        # imported after other builders were registered, its builders
+        # can be given the priority they would have had.
+        self._registrations: List[
+            Union[Type[TreeBuilder], _DeferredRegistration]
+        ] = []
+        self._deferred: List[_DeferredRegistration] = []
+        self._lock = Lock()
+
+        #: How fast each TreeBuilder parses, in characters per second,
+        #: keyed by `TreeBuilder.NAME`. Used by `TreeBuilderRegistry.fastest`.
+        self.throughput: Dict[str, float] = dict(DEFAULT_THROUGHPUT)
+
+    @property
+    def builders_for_feature(self) -> Dict[str, List[Type[TreeBuilder]]]:
+        """The registered TreeBuilder subclasses with each feature,
+        most recently registered first."""
+        self._import_deferred()
+        return self._builders_for_feature
+
+    @property
+    def builders(self) -> List[Type[TreeBuilder]]:
+        """The registered TreeBuilder subclasses, most recently
+        registered first."""
+        self._import_deferred()
+        return self._builders
 
     def register(self, treebuilder_class: type[TreeBuilder]) -> None:
         """Register a treebuilder based on its advertised features.
@@ -101,9 +218,82 @@ class TreeBuilderRegistry(object):
         :param treebuilder_class: A subclass of `TreeBuilder`. its
            `TreeBuilder.features` attribute should list its features.
         """
+        with self._lock:
+            self._registrations.append(treebuilder_class)
+            self._add(treebuilder_class)
+
+    def register_deferred(self, module_name: str, features: Iterable[str]) -> None:
+        """Register the TreeBuilders in a module without importing it yet.
+
+        The module is imported the first time a lookup asks for one
+        of ``features`` (or for no features at all). Its TreeBuilders
+        are then registered as though they'd been registered now. If
+        the module can't be imported, it's ignored.
+
+        :param module_name: The name of a module that lists its
+           TreeBuilder subclasses in ``__all__``.
+        :param features: Every feature advertised by a TreeBuilder in
+           the module.
+        """
+        deferred = _DeferredRegistration(module_name, features)
+        with self._lock:
+            self._registrations.append(deferred)
+            self._deferred.append(deferred)
+
+    def _add(
+        self,
+        treebuilder_class: type[TreeBuilder],
+        builders_for_feature: Optional[Dict[str, List[Type[TreeBuilder]]]] = None,
+        builders: Optional[List[Type[TreeBuilder]]] = None,
+    ) -> None:
+        if builders_for_feature is None:
+            builders_for_feature = self._builders_for_feature
+        if builders is None:
+            builders = self._builders
         for feature in treebuilder_class.features:
-            self.builders_for_feature[feature].insert(0, treebuilder_class)
-        self.builders.insert(0, treebuilder_class)
+            builders_for_feature[feature].insert(0, treebuilder_class)
+        builders.insert(0, treebuilder_class)
+
+    def _import_deferred(self, features: Iterable[str] = ()) -> None:
+        """Import any deferred modules that might have TreeBuilders
+        with the given features.
+
+        :param features: If this is empty, every deferred module is
+           imported.
+        """
+        if not self._deferred:
+            return
+        wanted = set(features)
+        with self._lock:
+            imported = False
+            for deferred in list(self._deferred):
+                if wanted and not (wanted & deferred.features):
+                    continue
+                self._deferred.remove(deferred)
+                position = self._registrations.index(deferred)
+                try:
+                    module = importlib.import_module(deferred.module_name)
+                except ImportError:
+                    # The library this module depends on isn't installed.
+                    builders = []
+                else:
+                    builders = _treebuilders_in(module)
+                self._registrations[position : position + 1] = builders
+                imported = True
+            if not imported:
+                return
+
+            # Rebuild the lookup tables in registration order. Lookups
+            # read the tables without taking the lock, so build new
+            # ones and swap them in rather than changing the old ones.
+            builders_for_feature: Dict[str, List[Type[TreeBuilder]]] = defaultdict(
+                list
+            )
+            builders: List[Type[TreeBuilder]] = []
+            for registration in self._registrations:
+                if not isinstance(registration, _DeferredRegistration):
+                    self._add(registration, builders_for_feature, builders)
+            self._builders_for_feature, self._builders = builders_for_feature, builders
 
     def lookup(self, *features: str) -> Optional[Type[TreeBuilder]]:
         """Look up a TreeBuilder subclass with the desired features.
@@ -114,14 +304,15 @@ class TreeBuilderRegistry(object):
         :return: A TreeBuilder subclass, or None if there's no
             registered subclass with all the requested features.
         """
-        if len(self.builders) == 0:
+        self._import_deferred(features)
+        if len(self._builders) == 0:
             # There are no builders at all.
             return None
 
         if len(features) == 0:
             # They didn't ask for any features. Give them the most
             # recently registered builder.
-            return self.builders[0]
+            return self._builders[0]
 
         # Go down the list of features in order, and eliminate any builders
         # that don't match every feature.
@@ -131,7 +322,7 @@ class TreeBuilderRegistry(object):
         candidate_set = None
         while len(feature_list) > 0:
             feature = feature_list.pop()
-            we_have_the_feature = self.builders_for_feature.get(feature, [])
+            we_have_the_feature = self._builders_for_feature.get(feature, [])
             if len(we_have_the_feature) > 0:
                 if candidates is None:
                     candidates = we_have_the_feature
@@ -151,6 +342,50 @@ class TreeBuilderRegistry(object):
         return None
 
 
+    def record_throughput(self, profile: Mapping[str, float]) -> None:
+        """Record how fast some TreeBuilders are, replacing any earlier
+        figures for them.
+
+        :param profile: A dictionary mapping `TreeBuilder.NAME` to a
+            parsing speed in characters per second, such as the one
+            returned by `bs4.diagnose.benchmark_parsers`.
+        """
+        self.throughput.update(profile)
+
+    def fastest(self, markup: Optional[_RawMarkup] = None) -> Optional[Type[TreeBuilder]]:
+        """Find the fastest installed TreeBuilder that can correctly
+        handle a document.
+
+        The document is run through `sniff_markup_type`. An XML
+        document needs a TreeBuilder with the `XML` feature, if one is
+        installed; otherwise the fastest TreeBuilder with the `HTML`
+        feature is used. Speeds are looked up in
+        `TreeBuilderRegistry.throughput`; a TreeBuilder with no
+        recorded speed is only chosen if there's nothing else.
+
+        :param markup: The document, or the beginning of it. If this is
+            None, the document is assumed to be HTML.
+        :return: A TreeBuilder subclass, or None if no suitable
+            TreeBuilder is registered.
+        """
+        features = [HTML]
+        if markup is not None and sniff_markup_type(markup) == XML:
+            features.insert(0, XML)
+        for feature in features:
+            self._import_deferred([feature])
+            candidates = self._builders_for_feature.get(feature)
+            if candidates:
+                # max() returns the first of several equally fast
+                # builders, which is the most recently registered.
+                return max(
+                    candidates,
+                    key=lambda builder: self.throughput.get(
+                        getattr(builder, "NAME", ""), 0
+                    ),
+                )
+        return None
+
+
 #: The `BeautifulSoup` constructor will take a list of features
 #: and use it to look up `TreeBuilder` classes in this registry.
 builder_registry: TreeBuilderRegistry = TreeBuilderRegistry()
@@ -203,6 +438,24 @@ class TreeBuilder(object):
       `AttributeValueList`, which is a normal Python list, and you
       will probably never need to change it.
 
+    :param intern_attribute_values: Tag names and attribute keys are
+      always interned, so that a document with a million <div> tags
+      contains one copy of the string "div". If this is True, the
+      individual values of multi-valued attributes (such as the
+      tokens in HTML's 'class') will be interned as well, which
+      saves memory when the same classes are used over and over.
+
+    :param sniff_limit: Only look at this many bytes at the start of
+      a document when searching it for an encoding declaration or
+      running it through chardet. See `bs4.dammit.EncodingDetector`.
+
+    :param encoding_cache: A `bs4.dammit.EncodingCache` recording which
+      encodings worked for earlier documents.
+
+    :param cache_key: Identifies the source of the document in
+      ``encoding_cache``. If the cache has an encoding for this
+      source, it's tried before any encoding detection is done, and
+      whichever encoding works is stored in the cache.
     """
 
     USE_DEFAULT: Any = object()  #: :meta private:
@@ -216,6 +469,10 @@ class TreeBuilder(object):
         empty_element_tags: Set[str] = USE_DEFAULT,
         attribute_dict_class: Type[AttributeDict] = AttributeDict,
         attribute_value_list_class: Type[AttributeValueList] = AttributeValueList,
+        intern_attribute_values: bool = False,
+        sniff_limit: Optional[int] = None,
+        encoding_cache: Optional[EncodingCache] = None,
+        cache_key: Optional[Hashable] = None,
     ):
         self.soup = None
         if multi_valued_attributes is self.USE_DEFAULT:
@@ -239,6 +496,11 @@ class TreeBuilder(object):
         self.string_containers = string_containers
         self.attribute_dict_class = attribute_dict_class
         self.attribute_value_list_class = attribute_value_list_class
+        self.intern_attribute_values = intern_attribute_values
+        self.sniff_limit = sniff_limit
+        self.encoding_cache = encoding_cache
+        self.cache_key = cache_key
+        self._tag_profiles = {}
 
     NAME: str = "[Unknown tree builder]"
     ALTERNATE_NAMES: Iterable[str] = []
@@ -256,6 +518,15 @@ class TreeBuilder(object):
     preserve_whitespace_tags: Set[str]  #: :meta private:
     string_containers: Dict[str, Type[NavigableString]]  #: :meta private:
     tracks_line_numbers: bool  #: :meta private:
+    intern_attribute_values: bool  #: :meta private:
+    sniff_limit: Optional[int]  #: :meta private:
+    encoding_cache: Optional[EncodingCache]  #: :meta private:
+    cache_key: Optional[Hashable]  #: :meta private:
+
+    #: The `bs4.element.TagProfile` objects shared by the
+    #: `bs4.element.CompactTag` objects this builder creates, keyed by
+    #: tag name.
+    _tag_profiles: Dict[str, TagProfile]  #: :meta private:
 
     #: A value for these tag/attribute combinations is a space- or
     #: comma-separated list of CDATA, rather than a single CDATA.
@@ -277,6 +548,18 @@ class TreeBuilder(object):
     #: Most parsers don't keep track of line numbers.
     TRACKS_LINE_NUMBERS: bool = False
 
+    #: Most parsers need to see the whole document at once. A
+    #: TreeBuilder that can turn markup into BeautifulSoup events
+    #: a piece at a time (see `TreeBuilder.feed_chunks`) should
+    #: set this to True.
+    FEEDS_INCREMENTALLY: bool = False
+
+    #: Most parsers need the BeautifulSoup constructor to read an
+    #: open filehandle into memory before calling `prepare_markup`. A
+    #: TreeBuilder that can work from the filehandle itself should
+    #: set this to True.
+    ACCEPTS_FILE_OBJECTS: bool = False
+
     def initialize_soup(self, soup: BeautifulSoup) -> None:
         """The BeautifulSoup object has been initialized and is now
         being associated with the TreeBuilder.
@@ -320,6 +603,27 @@ class TreeBuilder(object):
         """Run incoming markup through some parsing process."""
         raise NotImplementedError()
 
+    def feed_chunks(self, chunks: Iterable[_RawMarkup]) -> Iterator[None]:
+        """Run a document through some parsing process, one piece at a time.
+
+        This is a generator which yields once after each chunk has been
+        processed, so the caller can inspect the partially built tree
+        in between chunks.
+
+        The default implementation can't parse incrementally: it joins
+        all the chunks together and passes the result into `feed`.
+
+        :param chunks: The document, split into strings or bytestrings.
+        """
+        pieces = list(chunks)
+        markup: _RawMarkup
+        if pieces and isinstance(pieces[0], bytes):
+            markup = b"".join(cast(List[bytes], pieces))
+        else:
+            markup = "".join(cast(List[str], pieces))
+        self.feed(markup)
+        yield None
+
     def prepare_markup(
         self,
         markup: _RawMarkup,
@@ -356,6 +660,34 @@ class TreeBuilder(object):
         """
         yield markup, None, None, False
 
+    def _cached_encoding(self) -> Optional[_Encoding]:
+        """Find the encoding that worked for the last document from
+        this TreeBuilder's ``cache_key``, if there is one.
+
+        :meta private:
+        """
+        if self.encoding_cache is None or self.cache_key is None:
+            return None
+        return self.encoding_cache.get(self.cache_key)
+
+    def _remember_encoding(
+        self, encoding: Optional[_Encoding], contains_replacement_characters: bool
+    ) -> None:
+        """Record the encoding a document was successfully parsed
+        with in the ``encoding_cache``.
+
+        :meta private:
+        """
+        if self.encoding_cache is None or self.cache_key is None:
+            return
+        if encoding is None:
+            # The document was Unicode to begin with.
+            return
+        if contains_replacement_characters:
+            self.encoding_cache.discard(self.cache_key)
+        else:
+            self.encoding_cache.set(self.cache_key, encoding)
+
     def test_fragment_to_document(self, fragment: str) -> str:
         """Wrap an HTML fragment to make it look like a document.
 
@@ -426,9 +758,11 @@ class TreeBuilder(object):
                     # needs to be split and converted to a
                     # AttributeValueList so it can be an
                     # _AttributeValue.
-                    modified_value = self.attribute_value_list_class(
-                        nonwhitespace_re.findall(original_value)
-                    )
+                    values = nonwhitespace_re.findall(original_value)
+                    if self.intern_attribute_values and self.soup is not None:
+                        intern = self.soup._intern_value
+                        values = [intern(value) for value in values]
+                    modified_value = self.attribute_value_list_class(values)
                 else:
                     # html5lib calls setAttributes twice for the
                     # same tag when rearranging the parse tree. On
@@ -818,17 +1152,39 @@ class DetectsXMLParsedAsHTML(object):
             self._warn(stacklevel=10)
 
 
-def register_treebuilders_from(module: ModuleType) -> None:
-    """Copy TreeBuilders from the given module into this module."""
+def _treebuilders_in(module: ModuleType) -> List[Type[TreeBuilder]]:
+    """Copy TreeBuilders from the given module into this module.
+
+    :return: The TreeBuilders, in the order they're listed in the
+        module's ``__all__``.
+    """
     this_module = sys.modules[__name__]
+    builders = []
     for name in module.__all__:
         obj = getattr(module, name)
 
         if issubclass(obj, TreeBuilder):
             setattr(this_module, name, obj)
-            this_module.__all__.append(name)
-            # Register the builder while we're at it.
-            this_module.builder_registry.register(obj)
+            if name not in this_module.__all__:
+                this_module.__all__.append(name)
+            builders.append(obj)
+    return builders
+
+
+def register_treebuilders_from(module: ModuleType) -> None:
+    """Copy TreeBuilders from the given module into this module."""
+    for obj in _treebuilders_in(module):
+        # Register the builder while we're at it.
+        builder_registry.register(obj)
+
+
+def __getattr__(name: str) -> Any:
+    # The TreeBuilders for third-party parsers become attributes of
+    # this module when they're imported.
+    builder_registry._import_deferred()
+    if name in globals():
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Builders are registered in reverse order of priority, so that custom
@@ -838,17 +1194,15 @@ def register_treebuilders_from(module: ModuleType) -> None:
 from . import _htmlparser # noqa: E402
 
 register_treebuilders_from(_htmlparser)
-try:
-    from . import _html5lib
-
-    register_treebuilders_from(_html5lib)
-except ImportError:
-    # They don't have html5lib installed.
-    pass
-try:
-    from . import _lxml
-
-    register_treebuilders_from(_lxml)
-except ImportError:
-    # They don't have lxml installed.
-    pass
+
+#: Importing lxml or html5lib takes a while, so those builders aren't
+#: imported until a lookup might need them. Each module's entry must
+#: list every feature of the TreeBuilders in that module.
+#:
+#: :meta private:
+DEFERRED_BUILDER_MODULES: Dict[str, List[str]] = {
+    "bs4.builder._html5lib": ["html5lib", PERMISSIVE, HTML_5, HTML],
+    "bs4.builder._lxml": ["lxml", "lxml-xml", "lxml-html", XML, HTML, FAST, PERMISSIVE],
+}
+for _module_name, _features in DEFERRED_BUILDER_MODULES.items():
+    builder_registry.register_deferred(_module_name, _features)
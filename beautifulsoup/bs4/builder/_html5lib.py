@@ -230,11 +230,21 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
             sourceline, sourcepos = self.parser.tokenizer.stream.position()
             assert sourcepos is not None
             sourcepos = sourcepos - 1
+        tag_name = name
+        if self.soup.replacer is not None:
+            tag_name = self.soup.replacer.replace_if_needed(name)
         tag = self.soup.new_tag(
-            name, namespace, sourceline=sourceline, sourcepos=sourcepos
+            self.soup._intern_name(tag_name),
+            namespace,
+            sourceline=sourceline,
+            sourcepos=sourcepos,
         )
 
-        return Element(tag, self.soup, namespace)
+        element = Element(tag, self.soup, namespace)
+        # html5lib's tree construction algorithm needs to see the
+        # original tag name, even if the Tag has been renamed.
+        element.name = name
+        return element
 
     def commentClass(self, data: str) -> "TextNode":
         return TextNode(Comment(data), self.soup)
@@ -348,9 +358,11 @@ class Element(BeautifulSoupNode):
     def __init__(
         self, element: Tag, soup: "BeautifulSoup", namespace: Optional[_NamespaceURL]
     ):
-        treebuilder_base.Node.__init__(self, element.name)
+        # Node.__init__ assigns to self.attributes, which calls
+        # setAttributes, which needs self.soup and self.element.
         self.element = element
         self.soup = soup
+        treebuilder_base.Node.__init__(self, element.name)
         self.namespace = namespace
 
     def appendChild(self, node: "BeautifulSoupNode") -> None:
@@ -417,6 +429,11 @@ class Element(BeautifulSoupNode):
     _Html5libAttributes: TypeAlias = Dict[_Html5libAttributeName, str]
 
     def setAttributes(self, attributes: Optional[_Html5libAttributes]) -> None:
+        if attributes is not None and self.soup.replacer is not None:
+            # This happens even if there are no attributes, since
+            # the SoupReplacer may want to add some.
+            attributes = self.soup.replacer.replace_attributes(attributes, self.name)
+
         if attributes is not None and len(attributes) > 0:
             # Replace any namespaced attributes with
             # NamespacedAttribute objects.
@@ -433,12 +450,15 @@ class Element(BeautifulSoupNode):
             # Values for tags like 'class' came in as single strings;
             # replace them with lists of strings as appropriate.
             self.soup.builder._replace_cdata_list_attribute_values(
-                self.name, normalized_attributes
+                self.element.name, normalized_attributes
             )
 
             # Then set the attributes on the Tag associated with this
             # BeautifulSoupNode.
+            intern = self.soup._intern_name
             for name, value_or_values in list(normalized_attributes.items()):
+                if type(name) is str:
+                    name = intern(name)
                 self.element[name] = value_or_values
 
             # The attributes may contain variables that need substitution.
@@ -572,6 +592,7 @@ class Element(BeautifulSoupNode):
     def cloneNode(self) -> treebuilder_base.Node:
         tag = self.soup.new_tag(self.element.name, self.namespace)
         node = Element(tag, self.soup, self.namespace)
+        node.name = self.name
         for key, value in self.attributes:
             node.attributes[key] = value
         return node
@@ -9,7 +9,9 @@ __all__ = [
     "HTMLParserTreeBuilder",
 ]
 
+import codecs
 from html.parser import HTMLParser
+from itertools import chain
 
 from typing import (
     Any,
@@ -17,8 +19,10 @@ from typing import (
     cast,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
+    IO,
     TYPE_CHECKING,
     Tuple,
     Type,
@@ -33,7 +37,7 @@ from bs4.element import (
     Doctype,
     ProcessingInstruction,
 )
-from bs4.dammit import EntitySubstitution, UnicodeDammit
+from bs4.dammit import EncodingDetector, EntitySubstitution, UnicodeDammit
 
 from bs4.builder import (
     DetectsXMLParsedAsHTML,
@@ -136,13 +140,9 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
         # just because its name matches a known empty-element tag. We
         # know that this is an empty-element tag, and we want to call
         # handle_endtag ourselves.
-        if self.soup.replacer:
-            name = self.soup.replacer.replace_if_needed(name)
-    
         self.handle_starttag(name, attrs, handle_empty_element=False)
         self.handle_endtag(name)
 
-
     def handle_starttag(
         self,
         name: str,
@@ -155,13 +155,27 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
             an empty-element tag (i.e. there is not expected to be any
             closing tag).
         """
-        # Apply tag replacement if configured
-        if self.soup.replacer:
-            name = self.soup.replacer.replace_if_needed(name)
-            
+        soup = self.soup
+        name_filter = soup._tag_name_filter
+        if (
+            name_filter is not None
+            and soup.replacer is None
+            and len(soup.tagStack) <= 1
+            and not name_filter(None, name)
+        ):
+            # parse_only is going to reject this tag whatever its
+            # attributes are, so don't bother processing them. This
+            # tag's contents will still be considered.
+            soup.endData()
+            if self._root_tag_name is None:
+                self._root_tag_encountered(name)
+            return
+
         # TODO: handle namespaces here?
         attr_dict: AttributeDict = self.attribute_dict_class()
+        intern = self.soup._intern_name
         for key, value in attrs:
+            key = intern(key)
             # Change None attribute values to the empty string
             # for consistency with the other tree builders.
             if value is None:
@@ -180,6 +194,10 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
                     on_dupe(attr_dict, key, value)
             else:
                 attr_dict[key] = value
+        replacer = self.soup.replacer
+        if replacer is not None:
+            attr_dict = replacer.replace_attributes(attr_dict, name)
+            name = replacer.replace_if_needed(name)
         # print("START", name)
         sourceline: Optional[int]
         sourcepos: Optional[int]
@@ -199,8 +217,11 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
             # So we need to call handle_endtag() ourselves. Since we
             # know the start event is identical to the end event, we
             # don't want handle_endtag() to cross off any previous end
-            # events for tags of this name.
-            self.handle_endtag(name, check_already_closed=False)
+            # events for tags of this name. (And since `name` has
+            # already been through the SoupReplacer, if any, we skip
+            # handle_endtag() and go straight to the BeautifulSoup
+            # object.)
+            self.soup.handle_endtag(name)
 
             # But we might encounter an explicit closing tag for this tag
             # later on. If so, we want to ignore it.
@@ -218,9 +239,9 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
            e.g. '<tag></tag>'.
         """
         # print("END", name)
-        if self.soup.replacer:
+        if self.soup.replacer is not None:
             name = self.soup.replacer.replace_if_needed(name)
-    
+
         if check_already_closed and name in self.already_closed_empty_element:
             # This is a redundant end tag for an empty-element tag.
             # We've already called handle_endtag() for it, so just
@@ -245,6 +266,10 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
         # HTMLParser. (http://bugs.python.org/issue13633) The bug has
         # been fixed, but removing this code still makes some
         # Beautiful Soup tests fail. This needs investigation.
+        if self.soup._discard_strings and len(self.soup.tagStack) <= 1:
+            # There's no point in converting a character reference
+            # that's going to be thrown away.
+            return
         if name.startswith("x"):
             real_name = int(name.lstrip("x"), 16)
         elif name.startswith("X"):
@@ -355,6 +380,17 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
     #: original file is the source of an element.
     TRACKS_LINE_NUMBERS: bool = True
 
+    #: HTMLParser.feed can be called repeatedly with consecutive
+    #: pieces of a document.
+    FEEDS_INCREMENTALLY: bool = True
+
+    #: An open filehandle is decoded and fed to the parser a chunk
+    #: at a time, rather than read into memory all at once.
+    ACCEPTS_FILE_OBJECTS: bool = True
+
+    #: When reading from an open filehandle, read this much at a time.
+    CHUNK_SIZE: int = 64 * 1024
+
     def __init__(
         self,
         parser_args: Optional[Iterable[Any]] = None,
@@ -387,15 +423,18 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
 
     def prepare_markup(
         self,
-        markup: _RawMarkup,
+        markup: Union[_RawMarkup, IO[str], IO[bytes]],
         user_specified_encoding: Optional[_Encoding] = None,
         document_declared_encoding: Optional[_Encoding] = None,
         exclude_encodings: Optional[_Encodings] = None,
-    ) -> Iterable[Tuple[str, Optional[_Encoding], Optional[_Encoding], bool]]:
+    ) -> Iterable[
+        Tuple[Union[str, Iterable[str]], Optional[_Encoding], Optional[_Encoding], bool]
+    ]:
         """Run any preliminary steps necessary to make incoming markup
         acceptable to the parser.
 
-        :param markup: Some markup -- probably a bytestring.
+        :param markup: Some markup -- probably a bytestring -- or an
+            open filehandle.
         :param user_specified_encoding: The user asked to try this encoding.
         :param document_declared_encoding: The markup itself claims to be
             in this encoding.
@@ -408,7 +447,12 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
             Each 4-tuple represents a strategy for parsing the document.
             This TreeBuilder uses Unicode, Dammit to convert the markup
             into Unicode, so the ``markup`` element of the tuple will
-            always be a string.
+            always be a string--unless an open filehandle was passed
+            in, in which case it will be an iterator over strings
+            that reads and decodes the file on demand. If part of the
+            file turns out not to be valid in the encoding chosen from
+            its first chunk, the whole file is read and converted with
+            Unicode, Dammit, as if a bytestring had been passed in.
         """
         if isinstance(markup, str):
             # Parse Unicode as-is.
@@ -426,17 +470,65 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
             known_definite_encodings.append(user_specified_encoding)
 
         user_encodings: List[_Encoding] = []
+        cached_encoding = self._cached_encoding()
+        if cached_encoding is not None:
+            # This worked for the last document from the same source.
+            user_encodings.append(cached_encoding)
         if document_declared_encoding:
             # This was found in the document; treat it as a slightly
             # lower-priority user encoding.
             user_encodings.append(document_declared_encoding)
 
+        if not isinstance(markup, bytes):
+            # An open filehandle. Pick an encoding based on the first
+            # chunk, then decode the rest as it's read.
+            fh = markup
+            start = self._tell(fh)
+            chunks = self._read_chunks(fh)
+            first = next(chunks, b"")
+            if isinstance(first, str):
+                yield (chain([first], cast(Iterator[str], chunks)), None, None, False)
+                return
+
+            # If the file can't be rewound, hold on to what's been
+            # read, in case the encoding turns out to be wrong.
+            consumed: Optional[List[bytes]] = None
+            if start is None:
+                consumed = [first]
+            decoder, text, encoding, declared_encoding = self._incremental_decoder(
+                first, known_definite_encodings, user_encodings, exclude_encodings
+            )
+            yield (
+                self._decode_chunks(
+                    decoder,
+                    chain([text], cast(Iterator[bytes], chunks)),
+                    strict=True,
+                    consumed=consumed,
+                ),
+                encoding,
+                declared_encoding,
+                False,
+            )
+
+            # Something later in the file couldn't be decoded in the
+            # encoding chosen from its first chunk (or the parser
+            # rejected the markup). Read the whole file and let
+            # Unicode, Dammit consider every encoding, as it would
+            # for a bytestring.
+            rest = cast(Iterator[bytes], self._read_chunks(fh))
+            if consumed is None:
+                fh.seek(cast(int, start))
+                markup = b"".join(rest)
+            else:
+                markup = b"".join(chain(consumed, rest))
+
         dammit = UnicodeDammit(
             markup,
             known_definite_encodings=known_definite_encodings,
             user_encodings=user_encodings,
             is_html=True,
             exclude_encodings=exclude_encodings,
+            sniff_limit=self.sniff_limit,
         )
 
         if dammit.unicode_markup is None:
@@ -457,16 +549,52 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
                 dammit.contains_replacement_characters,
             )
 
-    def feed(self, markup: _RawMarkup) -> None:
-        args, kwargs = self.parser_args
-
+    def _tell(self, fh: Union[IO[str], IO[bytes]]) -> Optional[int]:
+        """Find the current position of a filehandle, if it can be
+        rewound to that position later.
+        """
+        try:
+            if fh.seekable():
+                return fh.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+        return None
+
+    def _read_chunks(self, fh: Union[IO[str], IO[bytes]]) -> Iterator[_RawMarkup]:
+        """Read an open filehandle `CHUNK_SIZE` at a time."""
+        while True:
+            data = fh.read(self.CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def feed(self, markup: Union[_RawMarkup, Iterable[str]]) -> None:
         # HTMLParser.feed will only handle str, but
         # BeautifulSoup.markup is allowed to be _RawMarkup, because
         # it's set by the yield value of
         # TreeBuilder.prepare_markup. Fortunately,
         # HTMLParserTreeBuilder.prepare_markup always yields a str
-        # (UnicodeDammit.unicode_markup).
-        assert isinstance(markup, str)
+        # (UnicodeDammit.unicode_markup) or, when reading from a
+        # file, an iterator over strs.
+        assert not isinstance(markup, bytes)
+        if isinstance(markup, str):
+            markup = [markup]
+        for _ in self.feed_chunks(markup):
+            pass
+
+    def feed_chunks(self, chunks: Iterable[_RawMarkup]) -> Iterator[None]:
+        """Feed a document into a single HTMLParser one chunk at a time,
+        yielding after each chunk.
+
+        Chunks may be strings or bytestrings. Bytestrings are run
+        through an incremental decoder, so a multi-byte character
+        split across two chunks is handled correctly. If the
+        `BeautifulSoup` object doesn't already know the document's
+        encoding, it's sniffed from the first chunk.
+
+        :param chunks: The document, split into strings or bytestrings.
+        """
+        args, kwargs = self.parser_args
 
         # We know BeautifulSoup calls TreeBuilder.initialize_soup
         # before calling feed(), so we can assume self.soup
@@ -474,12 +602,123 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
         assert self.soup is not None
         parser = BeautifulSoupHTMLParser(self.soup, *args, **kwargs)
 
+        chunks = iter(chunks)
+        first = next(chunks, "")
+        if isinstance(first, bytes):
+            known_definite_encodings: List[_Encoding] = []
+            if self.soup.original_encoding is not None:
+                known_definite_encodings.append(self.soup.original_encoding)
+            (
+                decoder,
+                first,
+                self.soup.original_encoding,
+                self.soup.declared_html_encoding,
+            ) = self._incremental_decoder(first, known_definite_encodings)
+            self.soup.contains_replacement_characters = False
+            text_chunks = self._decode_chunks(
+                decoder, chain([first], cast(Iterator[bytes], chunks))
+            )
+        else:
+            text_chunks = chain([first], cast(Iterator[str], chunks))
+
         try:
-            parser.feed(markup)
+            for chunk in text_chunks:
+                parser.feed(chunk)
+                yield None
             parser.close()
         except AssertionError as e:
             # html.parser raises AssertionError in rare cases to
             # indicate a fatal problem with the markup, especially
             # when there's an error in the doctype declaration.
             raise ParserRejectedMarkup(e)
-        parser.already_closed_empty_element = []
+        finally:
+            parser.already_closed_empty_element = []
+
+    def _incremental_decoder(
+        self,
+        data: bytes,
+        known_definite_encodings: Optional[_Encodings] = None,
+        user_encodings: Optional[_Encodings] = None,
+        exclude_encodings: Optional[_Encodings] = None,
+    ) -> Tuple[codecs.IncrementalDecoder, bytes, _Encoding, Optional[_Encoding]]:
+        """Choose an encoding for a document on the basis of its
+        first chunk, and create an incremental decoder for it.
+
+        The encodings are tried in the same order `UnicodeDammit`
+        would try them. Since the rest of the document hasn't been
+        seen yet, any bytes later on that turn out to be invalid in
+        the chosen encoding have to be dealt with by
+        `HTMLParserTreeBuilder._decode_chunks`.
+
+        :param data: The first chunk of the document.
+        :return: A 4-tuple (decoder, data, encoding, declared
+            encoding). ``data`` has had any byte order mark removed.
+        """
+        detector = EncodingDetector(
+            data,
+            known_definite_encodings=known_definite_encodings,
+            is_html=True,
+            exclude_encodings=exclude_encodings,
+            user_encodings=user_encodings,
+            sniff_limit=self.sniff_limit,
+        )
+        data = detector.markup
+        for encoding in detector.encodings:
+            try:
+                # Don't pass final=True: a character may be split
+                # across this chunk and the next one.
+                codecs.getincrementaldecoder(encoding)().decode(data)
+            except (LookupError, UnicodeError):
+                continue
+            break
+        else:
+            # Same last resort as UnicodeDammit.
+            encoding = "windows-1252"
+        decoder = codecs.getincrementaldecoder(encoding)()
+        return decoder, data, encoding, detector.declared_encoding
+
+    def _decode_chunks(
+        self,
+        decoder: codecs.IncrementalDecoder,
+        chunks: Iterable[bytes],
+        strict: bool = False,
+        consumed: Optional[List[bytes]] = None,
+    ) -> Iterator[str]:
+        """Decode a series of bytestrings one at a time.
+
+        :param strict: If this is True, a bytestring that can't be
+            decoded raises `ParserRejectedMarkup`, so that the
+            `BeautifulSoup` constructor can try something else. If it's
+            False, the offending bytes are replaced with REPLACEMENT
+            CHARACTER and the `BeautifulSoup` object's
+            ``contains_replacement_characters`` is set.
+        :param consumed: If this is a list, each bytestring is added to
+            it before being decoded. (The first bytestring is assumed to
+            be there already.)
+        """
+        for i, chunk in enumerate(chunks):
+            if consumed is not None and i > 0:
+                consumed.append(chunk)
+            yield self._decode_chunk(decoder, chunk, False, strict)
+        yield self._decode_chunk(decoder, b"", True, strict)
+
+    def _decode_chunk(
+        self,
+        decoder: codecs.IncrementalDecoder,
+        chunk: bytes,
+        final: bool,
+        strict: bool,
+    ) -> str:
+        """Decode one bytestring for `HTMLParserTreeBuilder._decode_chunks`."""
+        try:
+            return decoder.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            if strict:
+                raise ParserRejectedMarkup(e)
+        # A failed decode leaves the decoder's state alone, so the
+        # same bytes can be decoded again, this time replacing
+        # anything that's invalid.
+        decoder.errors = "replace"
+        if self.soup is not None:
+            self.soup.contains_replacement_characters = True
+        return decoder.decode(chunk, final)
@@ -14,6 +14,7 @@ from typing import (
     Any,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
     Set,
@@ -89,6 +90,10 @@ class LXMLTreeBuilderForXML(TreeBuilder):
 
     CHUNK_SIZE: int = 512
 
+    #: lxml's feed parser delivers events to its target as soon as
+    #: it has enough data.
+    FEEDS_INCREMENTALLY: bool = True
+
     # This namespace mapping is specified in the XML Namespace
     # standard.
     DEFAULT_NSMAPS: _NamespaceMapping = dict(xml="http://www.w3.org/XML/1998/namespace")
@@ -265,6 +270,10 @@ class LXMLTreeBuilderForXML(TreeBuilder):
             known_definite_encodings.append(user_specified_encoding)
 
         user_encodings: List[_Encoding] = []
+        cached_encoding = self._cached_encoding()
+        if cached_encoding is not None:
+            # This worked for the last document from the same source.
+            user_encodings.append(cached_encoding)
         if document_declared_encoding:
             # This was found in the document; treat it as a slightly
             # lower-priority user encoding.
@@ -276,6 +285,7 @@ class LXMLTreeBuilderForXML(TreeBuilder):
             user_encodings=user_encodings,
             is_html=is_html,
             exclude_encodings=exclude_encodings,
+            sniff_limit=self.sniff_limit,
         )
         for encoding in detector.encodings:
             yield (detector.markup, encoding, document_declared_encoding, False)
@@ -306,6 +316,32 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
             raise ParserRejectedMarkup(e)
 
+    def feed_chunks(self, chunks: Iterable[_RawMarkup]) -> Iterator[None]:
+        """Feed a document into a single lxml parser one chunk at a
+        time, yielding after each chunk.
+
+        :param chunks: The document, split into strings or bytestrings.
+        """
+        # initialize_soup is called before feed, so we know this
+        # is not None.
+        assert self.soup is not None
+        try:
+            self.parser = self.parser_for(self.soup.original_encoding)
+            fed = False
+            for data in chunks:
+                if len(data) == 0:
+                    continue
+                self.parser.feed(data)
+                fed = True
+                yield None
+            if not fed:
+                # Call feed() at least once, even if the markup is
+                # empty, or the parser won't be initialized.
+                self.parser.feed(b"")
+            self.parser.close()
+        except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
+            raise ParserRejectedMarkup(e)
+
     def close(self) -> None:
         self.nsmaps = [self.DEFAULT_NSMAPS_INVERTED]
 
@@ -379,9 +415,14 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         # from lxml with namespaces attached to their names, and
         # turn then into NamespacedAttribute objects.
         final_attrs: AttributeDict = self.attribute_dict_class()
+        intern = self.soup._intern_name
         for attr, value in list(new_attrs.items()):
             namespace, attr = self._getNsTag(attr)
             if namespace is None:
+                if type(attr) is str:
+                    # Leave NamespacedAttribute keys (the xmlns
+                    # declarations added above) alone.
+                    attr = intern(attr)
                 final_attrs[attr] = value
             else:
                 nsprefix = self._prefix_for_namespace(namespace)
@@ -390,6 +431,10 @@ class LXMLTreeBuilderForXML(TreeBuilder):
 
         namespace, tag = self._getNsTag(tag)
         nsprefix = self._prefix_for_namespace(namespace)
+        replacer = self.soup.replacer
+        if replacer is not None:
+            final_attrs = replacer.replace_attributes(final_attrs, tag)
+            tag = replacer.replace_if_needed(tag)
         self.soup.handle_starttag(
             tag,
             namespace,
@@ -420,6 +465,8 @@ class LXMLTreeBuilderForXML(TreeBuilder):
                 if inverted_nsmap is not None and namespace in inverted_nsmap:
                     nsprefix = inverted_nsmap[namespace]
                     break
+        if self.soup.replacer is not None:
+            name = self.soup.replacer.replace_if_needed(name)
         self.soup.handle_endtag(name, nsprefix)
         if len(self.nsmaps) > 1:
             # This tag, or one of its parents, introduced a namespace
@@ -31,14 +31,36 @@ if TYPE_CHECKING:
     from bs4 import element
     from bs4.element import ResultSet, Tag
 
+#: The ``soupsieve`` module, or None if it's not installed. It's
+#: imported the first time it's needed, rather than when Beautiful
+#: Soup is imported.
 soupsieve: Optional[ModuleType]
-try:
-    import soupsieve
-except ImportError:
-    soupsieve = None
-    warnings.warn(
-        "The soupsieve package is not installed. CSS selectors cannot be used."
-    )
+
+
+def _load_soupsieve() -> Optional[ModuleType]:
+    """Import ``soupsieve``, if it hasn't been imported already.
+
+    :return: The ``soupsieve`` module, or None if it's not installed.
+    """
+    global soupsieve
+    if "soupsieve" not in globals():
+        module: Optional[ModuleType]
+        try:
+            import soupsieve as module
+        except ImportError:
+            module = None
+            warnings.warn(
+                "The soupsieve package is not installed. CSS selectors cannot be used."
+            )
+        soupsieve = module
+    return soupsieve
+
+
+def __getattr__(name: str) -> Any:
+    # Accessing bs4.css.soupsieve imports soupsieve.
+    if name == "soupsieve":
+        return _load_soupsieve()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class CSS(object):
@@ -57,7 +79,7 @@ class CSS(object):
 
     def __init__(self, tag: element.Tag, api: Optional[ModuleType] = None):
         if api is None:
-            api = soupsieve
+            api = _load_soupsieve()
         if api is None:
             raise NotImplementedError(
                 "Cannot execute CSS selectors because the soupsieve package is not installed."
@@ -71,7 +93,7 @@ class CSS(object):
         This is a simple wrapper around `soupsieve.escape() <https://facelessuser.github.io/soupsieve/api/#soupsieveescape>`_. See the
         documentation for that function for more information.
         """
-        if soupsieve is None:
+        if _load_soupsieve() is None:
             raise NotImplementedError(
                 "Cannot escape CSS identifiers because the soupsieve package is not installed."
             )
@@ -13,14 +13,19 @@ to reflect a new encoding; that's the job of `TreeBuilder`.
 __license__ = "MIT"
 
 from html.entities import codepoint2name
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import codecs
 from html.entities import html5
 import re
 from logging import Logger, getLogger
 from types import ModuleType
 from typing import (
+    Any,
     Dict,
+    Generic,
+    Hashable,
+    IO,
+    Iterable,
     Iterator,
     List,
     Optional,
@@ -28,6 +33,7 @@ from typing import (
     Set,
     Tuple,
     Type,
+    TypeVar,
     Union,
     cast,
 )
@@ -36,6 +42,7 @@ from bs4._typing import (
     _Encoding,
     _Encodings,
 )
+from threading import Lock
 import warnings
 
 # Import a library to autodetect character encodings. We'll support
@@ -95,26 +102,47 @@ encoding_res[str] = {
 }
 
 
+_T = TypeVar("_T")
+
+
+class _EntityTable(Generic[_T]):
+    """A placeholder for one of the `EntitySubstitution` class
+    variables that describe the HTML5 named entities.
+
+    Building those variables takes a noticeable fraction of the time
+    it takes to import Beautiful Soup, so it's put off until one of
+    them is used. At that point they're all built, replacing the
+    placeholders.
+    """
+
+    def __set_name__(self, owner: Type[Any], name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, owner: Type[Any]) -> _T:
+        EntitySubstitution._populate_class_variables()
+        return cast(_T, getattr(EntitySubstitution, self.name))
+
+
 class EntitySubstitution(object):
     """The ability to substitute XML or HTML entities for certain characters."""
 
     #: A map of named HTML entities to the corresponding Unicode string.
     #:
     #: :meta hide-value:
-    HTML_ENTITY_TO_CHARACTER: Dict[str, str]
+    HTML_ENTITY_TO_CHARACTER: _EntityTable[Dict[str, str]] = _EntityTable()
 
     #: A map of Unicode strings to the corresponding named HTML entities;
     #: the inverse of HTML_ENTITY_TO_CHARACTER.
     #:
     #: :meta hide-value:
-    CHARACTER_TO_HTML_ENTITY: Dict[str, str]
+    CHARACTER_TO_HTML_ENTITY: _EntityTable[Dict[str, str]] = _EntityTable()
 
     #: A regular expression that matches any character (or, in rare
     #: cases, pair of characters) that can be replaced with a named
     #: HTML entity.
     #:
     #: :meta hide-value:
-    CHARACTER_TO_HTML_ENTITY_RE: Pattern[str]
+    CHARACTER_TO_HTML_ENTITY_RE: _EntityTable[Pattern[str]] = _EntityTable()
 
     #: A very similar regular expression to
     #: CHARACTER_TO_HTML_ENTITY_RE, but which also matches unescaped
@@ -123,7 +151,9 @@ class EntitySubstitution(object):
     #: ampersands to go unescaped.
     #:
     #: :meta hide-value:
-    CHARACTER_TO_HTML_ENTITY_WITH_AMPERSAND_RE: Pattern[str]
+    CHARACTER_TO_HTML_ENTITY_WITH_AMPERSAND_RE: _EntityTable[Pattern[str]] = (
+        _EntityTable()
+    )
 
     @classmethod
     def _populate_class_variables(cls) -> None:
@@ -148,6 +178,8 @@ class EntitySubstitution(object):
         also matches unescaped ampersands. This is used by the 'html'
         formatted to provide backwards-compatibility, even though the HTML5
         spec allows most ampersands to go unescaped.
+
+        This is called the first time one of those variables is used.
         """
         unicode_to_name = {}
         name_to_unicode = {}
@@ -415,6 +447,12 @@ class EntitySubstitution(object):
         :return: The string with some Unicode characters replaced with
            HTML entities.
         """
+        if s.isascii():
+            # The only ASCII characters with entities we use are
+            # ampersands and angle brackets, so we can avoid running
+            # the huge regular expression.
+            return cls._substitute_ascii_html(s)
+
         # Convert any appropriate characters to HTML entities.
         return cls.CHARACTER_TO_HTML_ENTITY_WITH_AMPERSAND_RE.sub(
             cls._substitute_html_entity, s
@@ -447,13 +485,35 @@ class EntitySubstitution(object):
            HTML entities.
         """
         # First, escape any HTML entities found in the markup.
-        s = cls.ANY_ENTITY_RE.sub(cls._escape_entity_name, s)
+        if "&" in s:
+            s = cls.ANY_ENTITY_RE.sub(cls._escape_entity_name, s)
 
         # Next, convert any appropriate characters to unescaped HTML entities.
+        if s.isascii():
+            return cls._substitute_ascii_html(s, ampersands=False)
         s = cls.CHARACTER_TO_HTML_ENTITY_RE.sub(cls._substitute_html_entity, s)
 
         return s
 
+    @classmethod
+    def _substitute_ascii_html(cls, s: str, ampersands: bool = True) -> str:
+        """A fast version of `substitute_html` for ASCII strings.
+
+        No ASCII character is part of a multi-character entity in
+        CHARACTER_TO_HTML_ENTITY_RE, so an ASCII string only needs its
+        angle brackets (and, optionally, its ampersands) replaced.
+
+        :param s: An ASCII string.
+        :param ampersands: Whether to replace ampersands.
+        """
+        if ampersands and "&" in s:
+            s = s.replace("&", "&amp;")
+        if "<" in s:
+            s = s.replace("<", "&lt;")
+        if ">" in s:
+            s = s.replace(">", "&gt;")
+        return s
+
     @classmethod
     def substitute_html5_raw(cls, s: str) -> str:
         """Replace certain Unicode characters with named HTML entities
@@ -479,9 +539,6 @@ class EntitySubstitution(object):
         return s
 
 
-EntitySubstitution._populate_class_variables()
-
-
 class EncodingDetector:
     """This class is capable of guessing a number of possible encodings
     for a bytestring.
@@ -535,6 +592,10 @@ class EncodingDetector:
     :param exclude_encodings: These encodings will not be tried,
         even if they otherwise would be.
 
+    :param sniff_limit: If this is set, only the first ``sniff_limit``
+        bytes of the markup are searched for an encoding declaration
+        or passed into chardet. By default, chardet sees the whole
+        document, which can be very slow for large documents.
     """
 
     def __init__(
@@ -545,6 +606,7 @@ class EncodingDetector:
         exclude_encodings: Optional[_Encodings] = None,
         user_encodings: Optional[_Encodings] = None,
         override_encodings: Optional[_Encodings] = None,
+        sniff_limit: Optional[int] = None,
     ):
         self.known_definite_encodings = list(known_definite_encodings or [])
         if override_encodings:
@@ -560,6 +622,7 @@ class EncodingDetector:
         self.chardet_encoding = None
         self.is_html = False if is_html is None else is_html
         self.declared_encoding: Optional[str] = None
+        self.sniff_limit = sniff_limit
 
         # First order of business: strip a byte-order mark.
         self.markup, self.sniffed_encoding = self.strip_byte_order_mark(markup)
@@ -572,6 +635,7 @@ class EncodingDetector:
     declared_encoding: Optional[_Encoding]
     markup: bytes
     sniffed_encoding: Optional[_Encoding]
+    sniff_limit: Optional[int]
 
     def _usable(self, encoding: Optional[_Encoding], tried: Set[_Encoding]) -> bool:
         """Should we even bother to try this encoding?
@@ -621,7 +685,7 @@ class EncodingDetector:
         # declaration.
         if self.declared_encoding is None:
             self.declared_encoding = self.find_declared_encoding(
-                self.markup, self.is_html
+                self._sample, self.is_html
             )
         if self.declared_encoding is not None and self._usable(
             self.declared_encoding, tried
@@ -631,7 +695,7 @@ class EncodingDetector:
         # Use third-party character set detection to guess at the
         # encoding.
         if self.chardet_encoding is None:
-            self.chardet_encoding = _chardet_dammit(self.markup)
+            self.chardet_encoding = _chardet_dammit(self._sample)
         if self.chardet_encoding is not None and self._usable(
             self.chardet_encoding, tried
         ):
@@ -642,6 +706,13 @@ class EncodingDetector:
             if self._usable(e, tried):
                 yield e
 
+    @property
+    def _sample(self) -> bytes:
+        """The part of the markup to look at when sniffing the encoding."""
+        if self.sniff_limit is None:
+            return self.markup
+        return self.markup[: self.sniff_limit]
+
     @classmethod
     def strip_byte_order_mark(cls, data: bytes) -> Tuple[bytes, Optional[_Encoding]]:
         """If a byte-order mark is present, strip it and return the encoding it implies.
@@ -731,6 +802,92 @@ class EncodingDetector:
         return None
 
 
+class EncodingCache:
+    """Remembers which encoding worked for documents from a given
+    source, such as a website, so that the next document from that
+    source can skip encoding detection.
+
+    Pass one of these into `UnicodeDammit` along with a key that
+    identifies the source of the document::
+
+        cache = EncodingCache()
+        for url, data in crawl():
+            dammit = UnicodeDammit(
+                data, encoding_cache=cache, cache_key=urlsplit(url).hostname
+            )
+
+    The cached encoding is tried right after any known definite
+    encodings and any byte-order mark, and only used if the whole
+    document can be decoded with it. Note that some encodings, such
+    as windows-1252, can decode almost anything, so if a source
+    changes encodings, the cached encoding may keep being used.
+
+    :param maxsize: The most sources to remember. When the cache is
+        full, the least recently used source is forgotten.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._encodings: OrderedDict[Hashable, _Encoding] = OrderedDict()
+        self._lock = Lock()
+
+    #: The most sources this cache will remember.
+    maxsize: int
+
+    def get(self, key: Hashable) -> Optional[_Encoding]:
+        """Find the encoding that last worked for a source.
+
+        :param key: Identifies the source of a document.
+        :return: An encoding, or None if the source hasn't been seen.
+        """
+        with self._lock:
+            encoding = self._encodings.get(key)
+            if encoding is not None:
+                self._encodings.move_to_end(key)
+            return encoding
+
+    def set(self, key: Hashable, encoding: _Encoding) -> None:
+        """Remember the encoding that worked for a source.
+
+        :param key: Identifies the source of a document.
+        :param encoding: The name of an encoding.
+        """
+        with self._lock:
+            self._encodings[key] = encoding
+            self._encodings.move_to_end(key)
+            if len(self._encodings) > self.maxsize:
+                self._encodings.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the encoding for a source, if there is one."""
+        with self._lock:
+            self._encodings.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every source."""
+        with self._lock:
+            self._encodings.clear()
+
+    def __len__(self) -> int:
+        return len(self._encodings)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._encodings
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks can't be pickled. Leave this one out, so that
+        # `bs4.batch.parse_many` can send the cache to its workers.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+
 class UnicodeDammit:
     """A class for detecting the encoding of a bytestring containing an
     HTML or XML document, and decoding it to Unicode. If the source
@@ -770,6 +927,17 @@ class UnicodeDammit:
     :param exclude_encodings: These encodings will not be considered,
        even if the sniffing code thinks they might make sense.
 
+    :param sniff_limit: Only look at this many bytes at the start of
+       the document when searching for an encoding declaration or
+       running chardet. See `EncodingDetector`.
+
+    :param encoding_cache: An `EncodingCache` recording which
+       encodings worked for earlier documents.
+
+    :param cache_key: Identifies the source of this document in
+       ``encoding_cache``. If the cache has an encoding for this
+       source, it's tried before any encoding detection is done, and
+       whichever encoding works is stored in the cache.
     """
 
     def __init__(
@@ -781,12 +949,23 @@ class UnicodeDammit:
         exclude_encodings: Optional[_Encodings] = [],
         user_encodings: Optional[_Encodings] = None,
         override_encodings: Optional[_Encodings] = None,
+        sniff_limit: Optional[int] = None,
+        encoding_cache: Optional[EncodingCache] = None,
+        cache_key: Optional[Hashable] = None,
     ):
         self.smart_quotes_to = smart_quotes_to
         self.tried_encodings = []
         self.contains_replacement_characters = False
         self.is_html = is_html
         self.log = getLogger(__name__)
+
+        if cache_key is None:
+            encoding_cache = None
+        if encoding_cache is not None:
+            cached_encoding = encoding_cache.get(cache_key)
+            if cached_encoding is not None:
+                user_encodings = [cached_encoding] + list(user_encodings or [])
+
         self.detector = EncodingDetector(
             markup,
             known_definite_encodings,
@@ -794,6 +973,7 @@ class UnicodeDammit:
             exclude_encodings,
             user_encodings,
             override_encodings,
+            sniff_limit,
         )
 
         # Short-circuit if the data is in Unicode to begin with.
@@ -844,6 +1024,12 @@ class UnicodeDammit:
         else:
             self.unicode_markup = u
 
+        if encoding_cache is not None:
+            if u is None or self.contains_replacement_characters:
+                encoding_cache.discard(cache_key)
+            else:
+                encoding_cache.set(cache_key, cast(_Encoding, self.original_encoding))
+
     #: The original markup, before it was converted to Unicode.
     #: This is not necessarily the same as what was passed in to the
     #: constructor, since any byte-order mark will be stripped.
@@ -953,6 +1139,9 @@ class UnicodeDammit:
             smart_quotes_compiled = re.compile(smart_quotes_re)
             markup = smart_quotes_compiled.sub(self._sub_ms_char, markup)
 
+        if errors == "strict" and not self._prefix_decodes(markup, proposed):
+            return None
+
         try:
             # print("Trying to convert document to %s (errors=%s)" % (
             #    proposed, errors))
@@ -966,6 +1155,36 @@ class UnicodeDammit:
         # print("Correct encoding: %s" % proposed)
         return self.unicode_markup
 
+    #: Before decoding a large document, check that this many bytes
+    #: at the start of the document can be decoded.
+    #:
+    #: :meta private:
+    PREFIX_CHECK_SIZE: int = 64 * 1024
+
+    def _prefix_decodes(self, data: bytes, encoding: _Encoding) -> bool:
+        """Check whether the start of a document can be decoded.
+
+        Decoding a whole document that turns out to be in a different
+        encoding allocates a string the size of the document before
+        failing. Decoding just the start of the document first is
+        cheap, and catches most wrong guesses.
+
+        :param data: The document.
+        :param encoding: The name of an encoding.
+        :return: False if the encoding definitely doesn't work.
+        """
+        if len(data) <= self.PREFIX_CHECK_SIZE:
+            return True
+        try:
+            # Don't pass final=True: a character may be split by the
+            # end of the prefix.
+            codecs.getincrementaldecoder(encoding)().decode(
+                data[: self.PREFIX_CHECK_SIZE]
+            )
+        except (LookupError, UnicodeError):
+            return False
+        return True
+
     def _to_unicode(
         self, data: bytes, encoding: _Encoding, errors: str = "strict"
     ) -> str:
@@ -1336,6 +1555,29 @@ class UnicodeDammit:
     #: :meta private:
     LAST_MULTIBYTE_MARKER: int = MULTIBYTE_MARKERS_AND_SIZES[-1][1]
 
+    #: Matches a run of bytes that detwingle() leaves alone (ASCII
+    #: characters and UTF-8 multibyte characters, as described by
+    #: MULTIBYTE_MARKERS_AND_SIZES), followed by a single byte that
+    #: might be a Windows-1252 character, a multibyte character that's
+    #: been cut off by the end of the data, or the end of the data.
+    #:
+    #: :meta private:
+    DETWINGLE_TOKEN: Pattern[bytes] = re.compile(
+        rb"""
+        [\x00-\x7f]*
+        (?:
+          (?:[\xc2-\xdf][\x00-\xff]
+            |[\xe0-\xef][\x00-\xff]{2}
+            |[\xf0-\xf4][\x00-\xff]{3})
+          [\x00-\x7f]*
+        )*
+        (?:(?P<windows>[\x80-\xc1\xf5-\xff])
+          |(?P<partial>[\xc2-\xf4][\x00-\xff]{0,2}\Z)
+          |\Z)
+        """,
+        re.VERBOSE,
+    )
+
     @classmethod
     def detwingle(
         cls,
@@ -1359,6 +1601,60 @@ class UnicodeDammit:
           ``embedded_encoding`` characters have been converted to
           their ``main_encoding`` equivalents.
         """
+        cls._check_detwingle_encodings(main_encoding, embedded_encoding)
+        fixed, leftover = cls._detwingle(in_bytes, True)
+        return fixed
+
+    @classmethod
+    def detwingle_stream(
+        cls,
+        source: Union[IO[bytes], Iterable[bytes]],
+        main_encoding: _Encoding = "utf8",
+        embedded_encoding: _Encoding = "windows-1252",
+        chunk_size: int = 64 * 1024,
+    ) -> Iterator[bytes]:
+        """Fix characters from one encoding embedded in some other
+        encoding, a chunk at a time.
+
+        This does the same job as `UnicodeDammit.detwingle`, but it
+        never needs the whole document in memory. A UTF-8 character
+        that's split between two chunks is handled correctly.
+
+        :param source: A binary file-like object, or any iterable of
+            bytestrings.
+        :param main_encoding: The primary encoding of the data.
+        :param embedded_encoding: The encoding that was used to embed
+            characters in the main document.
+        :param chunk_size: If ``source`` is a file-like object, read it
+            this many bytes at a time.
+        :yield: Bytestrings which, put together, are the same as the
+            output of `UnicodeDammit.detwingle` on the whole document.
+        """
+        cls._check_detwingle_encodings(main_encoding, embedded_encoding)
+        chunks: Iterable[bytes]
+        if hasattr(source, "read"):
+            read = cast(IO[bytes], source).read
+            chunks = iter(lambda: read(chunk_size), b"")
+        else:
+            chunks = cast(Iterable[bytes], source)
+
+        leftover = b""
+        for chunk in chunks:
+            fixed, leftover = cls._detwingle(leftover + chunk, False)
+            if fixed:
+                yield fixed
+        if leftover:
+            yield cls._detwingle(leftover, True)[0]
+
+    @classmethod
+    def _check_detwingle_encodings(
+        cls, main_encoding: _Encoding, embedded_encoding: _Encoding
+    ) -> None:
+        """Make sure `UnicodeDammit.detwingle` knows how to handle
+        the given encodings.
+
+        :raise NotImplementedError: If it doesn't.
+        """
         if embedded_encoding.replace("_", "-").lower() not in (
             "windows-1252",
             "windows_1252",
@@ -1373,36 +1669,45 @@ class UnicodeDammit:
                 "UTF-8 is the only currently supported main encoding."
             )
 
-        byte_chunks = []
+    @classmethod
+    def _detwingle(cls, in_bytes: bytes, final: bool) -> Tuple[bytes, bytes]:
+        """Convert the Windows-1252 characters in a bytestring to UTF-8.
+
+        :param in_bytes: The data to convert.
+        :param final: Is this the end of the document? If not, a
+            multibyte character at the very end of ``in_bytes`` might
+            be incomplete, so it's left unconverted.
+        :return: A 2-tuple (converted data, data left unconverted).
+        """
+        if in_bytes.isascii():
+            return in_bytes, b""
 
+        # Runs of characters that don't need converting are matched
+        # in bulk by the regular expression engine, so this loop only
+        # runs for the bytes that do.
+        byte_chunks = []
         chunk_start = 0
-        pos = 0
-        while pos < len(in_bytes):
-            byte = in_bytes[pos]
-            if byte >= cls.FIRST_MULTIBYTE_MARKER and byte <= cls.LAST_MULTIBYTE_MARKER:
-                # This is the start of a UTF-8 multibyte character. Skip
-                # to the end.
-                for start, end, size in cls.MULTIBYTE_MARKERS_AND_SIZES:
-                    if byte >= start and byte <= end:
-                        pos += size
-                        break
-            elif byte >= 0x80 and byte in cls.WINDOWS_1252_TO_UTF8:
-                # We found a Windows-1252 character!
-                # Save the string up to this point as a chunk.
+        for match in cls.DETWINGLE_TOKEN.finditer(in_bytes):
+            if match.lastgroup == "windows":
+                pos = match.start("windows")
+                replacement = cls.WINDOWS_1252_TO_UTF8.get(in_bytes[pos])
+                if replacement is not None:
+                    # We found a Windows-1252 character! Save the
+                    # string up to this point as a chunk, then the
+                    # character translated into UTF-8.
+                    byte_chunks.append(in_bytes[chunk_start:pos])
+                    byte_chunks.append(replacement)
+                    chunk_start = pos + 1
+            elif match.lastgroup == "partial" and not final:
+                # This character might be completed by the next chunk
+                # of data.
+                pos = match.start("partial")
                 byte_chunks.append(in_bytes[chunk_start:pos])
+                return b"".join(byte_chunks), in_bytes[pos:]
 
-                # Now translate the Windows-1252 character into UTF-8
-                # and add it as another, one-byte chunk.
-                byte_chunks.append(cls.WINDOWS_1252_TO_UTF8[byte])
-                pos += 1
-                chunk_start = pos
-            else:
-                # Go on to the next character.
-                pos += 1
         if chunk_start == 0:
             # The string is unchanged.
-            return in_bytes
-        else:
-            # Store the final chunk.
-            byte_chunks.append(in_bytes[chunk_start:])
-        return b"".join(byte_chunks)
+            return in_bytes, b""
+        # Store the final chunk.
+        byte_chunks.append(in_bytes[chunk_start:])
+        return b"".join(byte_chunks), b""
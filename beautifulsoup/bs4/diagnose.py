@@ -4,13 +4,17 @@
 __license__ = "MIT"
 
 import cProfile
+import copy
+import gc
 from io import BytesIO
 from html.parser import HTMLParser
 import bs4
-from bs4 import BeautifulSoup, __version__
-from bs4.builder import builder_registry
+from bs4 import BeautifulSoup, Tag, __version__
+from bs4.builder import XML, builder_registry
 from typing import (
     Any,
+    Callable,
+    Dict,
     IO,
     List,
     Optional,
@@ -21,10 +25,14 @@ from typing import (
 if TYPE_CHECKING:
     from bs4._typing import _IncomingMarkup
 
+import pickle
 import pstats
 import random
+import re
+import subprocess
 import tempfile
 import time
+import tracemalloc
 import traceback
 import sys
 
@@ -213,39 +221,439 @@ def rdoc(num_elements: int = 1000) -> str:
     return "<html>" + "\n".join(elements) + "</html>"
 
 
-def benchmark_parsers(num_elements: int = 100000) -> None:
-    """Very basic head-to-head performance benchmark."""
+def rxml(num_elements: int = 1000) -> str:
+    """Randomly generate a well-formed XML document.
+
+    :meta private:
+    """
+    elements = []
+    for i in range(num_elements):
+        elements.append(
+            '<item id="%d"><name>%s</name><description>%s</description></item>'
+            % (i, rword(), rsentence(random.randint(1, 4)))
+        )
+    return '<?xml version="1.0"?>\n<catalog>' + "\n".join(elements) + "</catalog>"
+
+
+def benchmark_parsers(num_elements: int = 100000, record: bool = False) -> Dict[str, float]:
+    """Very basic head-to-head performance benchmark.
+
+    Every installed `TreeBuilder` parses a large generated document:
+    an XML document if it's an XML parser, and an invalid HTML
+    document otherwise.
+
+    :param record: If this is True, the measured speeds are recorded
+        with `bs4.builder.TreeBuilderRegistry.record_throughput`, so
+        that ``features="fastest"`` will use them.
+    :return: A dictionary mapping the `TreeBuilder.NAME` of each
+        `TreeBuilder` to its speed, in characters per second. You can
+        save this and pass it into
+        `bs4.builder.TreeBuilderRegistry.record_throughput` later.
+    """
     print(("Comparative parser benchmark on Beautiful Soup %s" % __version__))
     data = rdoc(num_elements)
     print(("Generated a large invalid HTML document (%d bytes)." % len(data)))
-
-    for parser_name in ["lxml", ["lxml", "html"], "html5lib", "html.parser"]:
-        success = False
+    xml_data = rxml(num_elements // 10)
+    print(("Generated a large XML document (%d bytes)." % len(xml_data)))
+
+    profile: Dict[str, float] = {}
+    for builder_class in builder_registry.builders:
+        if builder_class.NAME in profile:
+            continue
+        markup = xml_data if XML in builder_class.features else data
         try:
             a = time.time()
-            BeautifulSoup(data, parser_name)
+            BeautifulSoup(markup, builder=builder_class)
             b = time.time()
-            success = True
         except Exception:
-            print(("%s could not parse the markup." % parser_name))
+            print(("%s could not parse the markup." % builder_class.NAME))
             traceback.print_exc()
-        if success:
-            print(("BS4+%s parsed the markup in %.2fs." % (parser_name, b - a)))
+            continue
+        profile[builder_class.NAME] = len(markup) / max(b - a, 1e-9)
+        print(("BS4+%s parsed the markup in %.2fs (%d characters per second)."
+               % (builder_class.NAME, b - a, profile[builder_class.NAME])))
+
+    try:
+        from lxml import etree
+    except ImportError:
+        pass
+    else:
+        a = time.time()
+        etree.HTML(data)
+        b = time.time()
+        print(("Raw lxml parsed the markup in %.2fs." % (b - a)))
+
+    try:
+        import html5lib
+    except ImportError:
+        pass
+    else:
+        parser = html5lib.HTMLParser()
+        a = time.time()
+        parser.parse(data)
+        b = time.time()
+        print(("Raw html5lib parsed the markup in %.2fs." % (b - a)))
+
+    if record:
+        builder_registry.record_throughput(profile)
+    return profile
+
+
+def benchmark_formatters(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Compare the time it takes to output a large document using the
+    standard formatters.
+    """
+    print(("Formatter benchmark on Beautiful Soup %s" % __version__))
+    data = rdoc(num_elements)
+    soup = BeautifulSoup(data, parser)
+    # Give some of the tags attributes, some of which need escaping,
+    # and add some text that contains named entities.
+    for i, tag in enumerate(soup.find_all(True)):
+        tag["class"] = ["item", "item-%d" % (i % 10)]
+        if i % 3 == 0:
+            tag["href"] = "/page?id=%d&sort=asc" % (i % 100)
+        if i % 5 == 0:
+            tag.append("caf\N{LATIN SMALL LETTER E WITH ACUTE} < \N{SNOWMAN}")
+    print(("Generated a document with %d elements." % len(list(soup.descendants))))
+
+    for formatter in ["minimal", "html", "html5", None]:
+        a = time.time()
+        soup.decode(formatter=formatter)
+        b = time.time()
+        print(("Output the document with formatter=%r in %.2fs." % (formatter, b - a)))
+
+
+def benchmark_filter(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Compare matching tags against a `bs4.filter.SoupStrainer` rule by
+    rule with matching them using the function created by
+    `bs4.filter.SoupStrainer.compile`, both when searching a tree and
+    when filtering a document as it's parsed.
+    """
+    from bs4.filter import ElementFilter, SoupStrainer
 
-    from lxml import etree
+    print(("Filter benchmark on Beautiful Soup %s" % __version__))
+    data = rdoc(num_elements)
+    soup = BeautifulSoup(data, parser)
+    for i, tag in enumerate(soup.find_all(True)):
+        tag["class"] = ["item", "item-%d" % (i % 10)]
+        if i % 3 == 0:
+            tag["id"] = "id-%d" % i
+    markup = soup.decode()
+    tags = soup.find_all(True)
+    print(("Generated a document with %d tags." % len(tags)))
+
+    strainers = [
+        ("name", SoupStrainer(["b", "i", "table"])),
+        ("class", SoupStrainer(class_=["item-1", "item-2", "item-3"])),
+        ("regex", SoupStrainer(class_=[re.compile("-1$"), re.compile("-2$")])),
+        ("presence", SoupStrainer("p", id=True)),
+    ]
+
+    class RuleByRule(ElementFilter):
+        def __init__(self, strainer: SoupStrainer):
+            self.strainer = strainer
+
+        def allow_tag_creation(self, *args: Any) -> bool:
+            return self.strainer.allow_tag_creation(*args)
+
+        def allow_string_creation(self, string: str) -> bool:
+            return self.strainer.allow_string_creation(string)
+
+    for description, strainer in strainers:
+        a = time.time()
+        expect = [tag for tag in tags if strainer.matches_tag(tag)]
+        b = time.time()
+        found = soup.find_all(strainer)
+        c = time.time()
+        assert found == expect
+        print(("Searched by %s: %.2fs rule by rule, %.2fs compiled."
+               % (description, b - a, c - b)))
+
+        a = time.time()
+        expect = BeautifulSoup(markup, parser, parse_only=RuleByRule(strainer))
+        b = time.time()
+        found = BeautifulSoup(markup, parser, parse_only=strainer)
+        c = time.time()
+        assert found.decode() == expect.decode()
+        print(("Parsed with parse_only=%s: %.2fs rule by rule, %.2fs compiled."
+               % (description, b - a, c - b)))
+
+
+def benchmark_parse_only(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Compare a full parse of a document against parses that use
+    ``parse_only`` to keep only some of its tags.
+
+    For comparison, each ``parse_only`` filter is also run in a way that
+    checks every tag and string, instead of throwing away the parts of
+    the document it can't possibly match as soon as they're seen.
+    """
+    from bs4.filter import ElementFilter, SoupStrainer
+
+    print(("parse_only benchmark on Beautiful Soup %s" % __version__))
+    soup = BeautifulSoup(rdoc(num_elements), parser)
+    for i, tag in enumerate(soup.find_all(True)):
+        tag["class"] = ["item", "item-%d" % (i % 10)]
+        if i % 5 == 0:
+            tag.append("caf\N{LATIN SMALL LETTER E WITH ACUTE} & cr\N{LATIN SMALL LETTER E WITH GRAVE}me")
+    markup = soup.decode(formatter="html")
+    print(("Generated a document of %d characters." % len(markup)))
+
+    class CheckEverything(ElementFilter):
+        def __init__(self, strainer: SoupStrainer):
+            self.strainer = strainer
+
+        def allow_tag_creation(self, *args: Any) -> bool:
+            return self.strainer.allow_tag_creation(*args)
+
+        def allow_string_creation(self, string: str) -> bool:
+            return self.strainer.allow_string_creation(string)
 
     a = time.time()
-    etree.HTML(data)
+    BeautifulSoup(markup, parser)
     b = time.time()
-    print(("Raw lxml parsed the markup in %.2fs." % (b - a)))
+    full = b - a
+    print(("Full parse: %.2fs." % full))
+
+    for description, strainer in [
+        ("parse_only='b'", SoupStrainer("b")),
+        ("parse_only=class_='item-3'", SoupStrainer(class_="item-3")),
+    ]:
+        a = time.time()
+        BeautifulSoup(markup, parser, parse_only=CheckEverything(strainer))
+        b = time.time()
+        BeautifulSoup(markup, parser, parse_only=strainer)
+        c = time.time()
+        print(("%s: %.2fs checking everything, %.2fs skipping (%.1fx as fast as a full parse)."
+               % (description, b - a, c - b, full / (c - b))))
+
+
+def benchmark_wide_parent(num_children: int = 50000, parser: str = "html.parser") -> None:
+    """Measure how long it takes to remove or replace many children of
+    a single tag with a lot of children, such as a very long table.
+
+    For comparison, the same edits are made with
+    `Tag.POSITION_TRACKING_THRESHOLD` turned off, so that every edit
+    has to scan the list of children to find the one being changed.
+    """
+    print(("Wide parent benchmark on Beautiful Soup %s" % __version__))
+    markup = "<table><tbody>%s</tbody></table>" % "".join(
+        "<tr><td>%d</td></tr>" % i for i in range(num_children)
+    )
+
+    def run(
+        description: str, edit: Callable[[BeautifulSoup, Tag], Any], step: int = 1
+    ) -> None:
+        times = []
+        for threshold in (Tag.POSITION_TRACKING_THRESHOLD, None):
+            soup = BeautifulSoup(markup, parser)
+            tbody = soup.tbody
+            tbody.POSITION_TRACKING_THRESHOLD = threshold
+            a = time.time()
+            for row in list(tbody.contents)[::step]:
+                edit(soup, row)
+            times.append(time.time() - a)
+        print(("%s: %.2fs tracking positions, %.2fs scanning."
+               % (description, times[0], times[1])))
+
+    run("Extract every row", lambda soup, row: row.extract())
+    run("Extract every other row", lambda soup, row: row.extract(), 2)
+    run("Replace every row", lambda soup, row: row.replace_with(soup.new_tag("tr")))
+    run("Unwrap every row", lambda soup, row: row.unwrap())
 
-    import html5lib
 
-    parser = html5lib.HTMLParser()
+def benchmark_smooth(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Measure how long `Tag.smooth` takes to merge the strings left
+    next to each other after unwrapping a lot of tags.
+    """
+    print(("Smooth benchmark on Beautiful Soup %s" % __version__))
+    markup = "<div>%s</div>" % (
+        "<p>%s</p>" % ("A <b>bold</b> and <i>italic</i> word. " * 50)
+        * (num_elements // 100)
+    )
+    soup = BeautifulSoup(markup, parser)
+    for tag in soup.find_all(["b", "i"]):
+        tag.unwrap()
     a = time.time()
-    parser.parse(data)
+    soup.smooth()
     b = time.time()
-    print(("Raw html5lib parsed the markup in %.2fs." % (b - a)))
+    print(("Merged %d runs of strings in %.2fs." % (len(soup.find_all("p")), b - a)))
+
+
+def benchmark_fingerprint(num_blocks: int = 5000, parser: str = "html.parser") -> None:
+    """Measure how long it takes to find the distinct blocks of markup
+    in a document with a lot of repeated boilerplate, using a set of
+    tags, compared with a set of the tags' string representations.
+    """
+    print(("Fingerprint benchmark on Beautiful Soup %s" % __version__))
+    blocks = [
+        "<div class='nav'><ul>%s</ul></div>"
+        % "".join("<li><a href='/%d'>Link %d</a></li>" % (i, i) for i in range(10)),
+        "<div class='footer'><p>Copyright <b>Example</b></p></div>",
+    ]
+    markup = "".join(
+        blocks[i % 2] + "<div class='body'><p>Page %d</p></div>" % i
+        for i in range(num_blocks)
+    )
+    soup = BeautifulSoup(markup, parser)
+    divs = soup.find_all("div")
+
+    a = time.time()
+    by_markup = set(str(div) for div in divs)
+    b = time.time()
+    by_tag = set(divs)
+    c = time.time()
+    assert len(by_markup) == len(by_tag)
+    print(("Found %d distinct blocks: %.2fs using strings, %.2fs using tags."
+           % (len(by_tag), b - a, c - b)))
+
+
+def benchmark_copy(num_copies: int = 1000, parser: str = "html.parser") -> None:
+    """Measure how long it takes to make a lot of copies of the same
+    tag, the way a templating system might.
+    """
+    print(("Copy benchmark on Beautiful Soup %s" % __version__))
+    markup = "<div class='card'>%s</div>" % (
+        "<h2>Title</h2><ul>%s</ul><p>Some <b>text</b>.</p>"
+        % "".join("<li><a href='/%d'>Item %d</a></li>" % (i, i) for i in range(20))
+    )
+    for compact in (False, True):
+        soup = BeautifulSoup(markup, parser, compact=compact)
+        template = soup.div
+        a = time.time()
+        for i in range(num_copies):
+            copy.copy(template)
+        b = time.time()
+        print(("Copied a tag with %d descendants %d times%s: %.2fs."
+               % (len(list(template.descendants)), num_copies,
+                  " (compact)" if compact else "", b - a)))
+
+
+def benchmark_import(repeat: int = 10) -> None:
+    """Measure how long it takes to import Beautiful Soup in a new
+    Python interpreter, and list the expensive modules that were
+    imported along with it.
+    """
+    print(("Import benchmark on Beautiful Soup %s" % __version__))
+
+    def run(code: str) -> float:
+        times = []
+        for i in range(repeat):
+            a = time.time()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            times.append(time.time() - a)
+        return sorted(times)[len(times) // 2]
+
+    baseline = run("pass")
+    with_bs4 = run("import bs4")
+    print(("Importing bs4 takes %.1fms." % ((with_bs4 - baseline) * 1000)))
+
+    # These are imported the first time they're needed, not when
+    # bs4 is imported.
+    deferred = ["bs4.builder._lxml", "bs4.builder._html5lib", "soupsieve"]
+    check = "import bs4, sys; print(' '.join(m for m in %r if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", check % deferred],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    for module in deferred:
+        print(("%s was %simported." % (module, "" if module in output else "not ")))
+
+
+def benchmark_pickle(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Compare unpickling a parse tree against parsing its markup again,
+    which is how older versions of Beautiful Soup unpickled a tree.
+    """
+    print(("Pickle benchmark on Beautiful Soup %s" % __version__))
+    data = rdoc(num_elements)
+    soup = BeautifulSoup(data, parser)
+    markup = soup.decode()
+    print(("Generated a document with %d elements (%d characters)."
+           % (len(list(soup.descendants)), len(markup))))
+
+    a = time.time()
+    pickled = pickle.dumps(soup)
+    b = time.time()
+    print(("Pickled the tree in %.2fs (%d bytes)." % (b - a, len(pickled))))
+
+    a = time.time()
+    pickle.loads(pickled)
+    b = time.time()
+    print(("Unpickled the tree in %.2fs." % (b - a)))
+
+    a = time.time()
+    BeautifulSoup(markup, parser)
+    b = time.time()
+    print(("Reparsed the markup with %s in %.2fs." % (parser, b - a)))
+
+
+def benchmark_memory(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Compare the memory used by a parse tree made of `Tag` objects
+    against one made of `bs4.element.CompactTag` objects.
+    """
+    print(("Memory benchmark on Beautiful Soup %s" % __version__))
+    data = rdoc(num_elements)
+    for compact in (False, True):
+        gc.collect()
+        tracemalloc.start()
+        soup = BeautifulSoup(data, parser, compact=compact)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nodes = len(list(soup.descendants))
+        print(("compact=%s: %d nodes use %.1f MB, %d bytes per node."
+               % (compact, nodes, used / 1024 / 1024, used // nodes)))
+        del soup
+
+
+def memory_report(soup: BeautifulSoup) -> None:
+    """Show how much memory is saved by sharing one copy of each tag
+    name, attribute key and attribute value across a parse tree, and
+    how much is still spent on duplicate copies.
+
+    Values are only shared if the `bs4.builder.TreeBuilder` was
+    created with ``intern_attribute_values=True``.
+    """
+    tags = 0
+    strings = 0
+    names: List[str] = []
+    keys: List[str] = []
+    values: List[str] = []
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            strings += 1
+            continue
+        tags += 1
+        names.append(element.name)
+        for key, value in element.attrs.items():
+            keys.append(key)
+            if isinstance(value, list):
+                values.extend(value)
+            elif isinstance(value, str):
+                values.append(value)
+    print("%d tags and %d strings." % (tags, strings))
+    for label, references in (
+        ("Tag names", names),
+        ("Attribute keys", keys),
+        ("Attribute values", values),
+    ):
+        objects = dict((id(x), x) for x in references)
+        distinct = set(references)
+        unshared = sum(sys.getsizeof(x) for x in references)
+        used = sum(sys.getsizeof(x) for x in objects.values())
+        needed = sum(sys.getsizeof(x) for x in distinct)
+        print(
+            "%s: %d references to %d objects holding %d distinct strings. "
+            "%d bytes saved by sharing, %d bytes in duplicate copies."
+            % (
+                label,
+                len(references),
+                len(objects),
+                len(distinct),
+                unshared - used,
+                used - needed,
+            )
+        )
 
 
 def profile(num_elements: int = 100000, parser: str = "lxml") -> None:
@@ -3,6 +3,9 @@ from __future__ import annotations
 # Use of this source code is governed by the MIT license.
 __license__ = "MIT"
 
+from bisect import bisect_left, insort
+import codecs
+from operator import attrgetter
 import re
 import warnings
 
@@ -24,6 +27,8 @@ from typing import (
     Callable,
     Dict,
     Generic,
+    Hashable,
+    IO,
     Iterable,
     Iterator,
     List,
@@ -47,6 +52,8 @@ if TYPE_CHECKING:
     from bs4 import BeautifulSoup
     from bs4.builder import TreeBuilder
     from bs4.filter import ElementFilter
+    from bs4._index import TagIndex
+    from soupsieve import SoupSieve
     from bs4.formatter import (
         _EntitySubstitutionFunction,
         _FormatterOrName,
@@ -94,9 +101,18 @@ def __getattr__(name: str) -> Any:
 #: this encoding unless you specify otherwise.
 DEFAULT_OUTPUT_ENCODING: str = "utf-8"
 
+#: `Tag.iter_encode` and `Tag.write_to` collect about this many
+#: characters of output before encoding and emitting them.
+DEFAULT_OUTPUT_BUFFER_SIZE: int = 64 * 1024
+
 #: A regular expression that can be used to split on whitespace.
 nonwhitespace_re: Pattern[str] = re.compile(r"\S+")
 
+#: `Tag.find_all_many` won't treat a string containing one of these
+#: characters as a tag name, since it's probably a CSS selector.
+#: :meta private:
+_selector_like_re: Pattern[str] = re.compile(r"[\s>+~#.\[\],*()]")
+
 #: These encodings are recognized by Python (so `Tag.encode`
 #: could theoretically support them) but XML and HTML don't recognize
 #: them (so they should not show up in an XML or HTML document as that
@@ -343,6 +359,19 @@ class ContentMetaAttributeValue(AttributeValueWithCharsetSubstitution):
         return self.CHARSET_RE.sub(rewrite, self.original_value)
 
 
+#: The attributes set by `PageElement.setup`, which link an element
+#: to its neighbors in the parse tree.
+#:
+#: :meta private:
+_LINKAGE_SLOTS: Tuple[str, ...] = (
+    "parent",
+    "previous_element",
+    "next_element",
+    "previous_sibling",
+    "next_sibling",
+)
+
+
 class PageElement(object):
     """An abstract class representing a single element in the parse tree.
 
@@ -361,7 +390,7 @@ class PageElement(object):
 
     #: Whether or not this element has been decomposed from the tree
     #: it was created in.
-    _decomposed: bool
+    _decomposed: bool = False
 
     parent: Optional[Tag]
     next_element: _AtMostOneElement
@@ -373,6 +402,17 @@ class PageElement(object):
     #: Only the `BeautifulSoup` object itself is hidden.
     hidden: bool = False
 
+    #: Attributes, stored in slots rather than in the instance
+    #: __dict__, that `PageElement.decompose` should wipe out.
+    #: :meta private:
+    _DECOMPOSE_SLOTS: Tuple[str, ...] = ()
+
+    #: The number of `TagIndex` objects that currently exist. While
+    #: this is zero, modifying a tree doesn't need to look for an
+    #: index to keep up to date.
+    #: :meta private:
+    _indexes_in_use: int = 0
+
     def setup(
         self,
         parent: Optional[Tag] = None,
@@ -593,10 +633,17 @@ class PageElement(object):
 
         :return: this `PageElement`, no longer part of the tree.
         """
+        index = None
+        if self._indexes_in_use and self.parent is not None:
+            index = self._tree_index()
+
         if self.parent is not None:
             if _self_index is None:
                 _self_index = self.parent.index(self)
             del self.parent.contents[_self_index]
+            positions = self.parent._child_positions
+            if positions is not None and not positions.removed_child(self):
+                self.parent._forget_child_positions()
 
         # Find the two elements that would be next to each other if
         # this element (and any children) hadn't been parsed. Connect
@@ -630,8 +677,24 @@ class PageElement(object):
         ):
             self.next_sibling.previous_sibling = self.previous_sibling
         self.previous_sibling = self.next_sibling = None
+
+        if index is not None:
+            index.subtree_extracted(self)
         return self
 
+    def _tree_index(self) -> Optional[TagIndex]:
+        """Find the `TagIndex` of the `BeautifulSoup` object at the root
+        of this element's tree, if there is one.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        from bs4 import BeautifulSoup
+
+        if isinstance(root, BeautifulSoup):
+            return root._index
+        return None
+
     def decompose(self) -> None:
         """Recursively destroys this `PageElement` and its children.
 
@@ -649,6 +712,11 @@ class PageElement(object):
         while e is not None:
             next_up = e.next_element
             e.__dict__.clear()
+            for slot in e._DECOMPOSE_SLOTS:
+                try:
+                    delattr(e, slot)
+                except AttributeError:
+                    pass
             if isinstance(e, Tag):
                 e.contents = []
             e._decomposed = True
@@ -1278,6 +1346,12 @@ class NavigableString(str, PageElement):
     create a `NavigableString` for the string "penguin".
     """
 
+    # A document can contain a great many strings, so the links to
+    # other elements are stored in slots rather than in each string's
+    # __dict__.
+    __slots__ = _LINKAGE_SLOTS + ("hidden",)
+    _DECOMPOSE_SLOTS = _LINKAGE_SLOTS
+
     #: A string prepended to the body of the 'real' string
     #: when formatting it as part of a document, such as the '<!--'
     #: in an HTML comment.
@@ -1566,6 +1640,96 @@ class RubyParenthesisString(NavigableString):
     """
 
 
+class _ChildPositions(object):
+    """Keeps track of where each child of a wide `Tag` is in its
+    `Tag.contents`, so `Tag.index` doesn't have to scan the list.
+
+    Every child gets an "original" position when it's first tracked.
+    Removing a child doesn't change anyone else's original position;
+    it's just noted in a sorted list, and a child's real position is
+    its original position minus the number of children removed from
+    in front of it. Appending a child, or putting a new child in the
+    place where another child was just removed (the way
+    `PageElement.replace_with` does), keeps the map up to date. Any
+    other kind of insertion means the map has to be rebuilt.
+
+    A position found through the map is always checked against
+    `Tag.contents` before it's used, so if the list is modified
+    behind the map's back, lookups fail rather than giving the wrong
+    answer.
+
+    :meta private:
+    """
+
+    __slots__ = ("originals", "removed", "end")
+
+    def __init__(self, contents: List[PageElement]):
+        self.originals: Dict[int, int] = {
+            id(child): i for i, child in enumerate(contents)
+        }
+        self.removed: List[int] = []
+        self.end: int = len(contents)
+
+    def find(self, contents: List[PageElement], element: PageElement) -> Optional[int]:
+        """Find the position of ``element`` within ``contents``.
+
+        :return: The position, or None if the map doesn't know.
+        """
+        original = self.originals.get(id(element))
+        if original is None:
+            return None
+        i = original
+        if self.removed:
+            i -= bisect_left(self.removed, original)
+        if i < len(contents) and contents[i] is element:
+            return i
+        return None
+
+    def removed_child(self, element: PageElement) -> bool:
+        """Note that ``element`` was removed from the list of children.
+
+        :return: False if the map is more trouble than it's worth and
+            should be thrown away.
+        """
+        original = self.originals.pop(id(element), None)
+        if original is not None:
+            insort(self.removed, original)
+        return len(self.removed) <= len(self.originals)
+
+    def inserted_child(
+        self, element: PageElement, position: int, contents: List[PageElement]
+    ) -> bool:
+        """Note that ``element`` was inserted into ``contents`` at ``position``.
+
+        :return: False if the map can't account for the insertion and
+            needs to be rebuilt.
+        """
+        removed = self.removed
+        if position == len(contents) - 1:
+            original = self.end
+            self.end += 1
+        else:
+            # Look for a removed position that would map onto
+            # ``position``. removed[k] - k never decreases as k
+            # increases, so this is a binary search.
+            low, high = 0, len(removed)
+            while low < high:
+                middle = (low + high) // 2
+                if removed[middle] - middle < position:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == len(removed) or removed[low] - low != position:
+                return False
+            original = removed.pop(low)
+        self.originals[id(element)] = original
+        return True
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Element ids don't survive pickling, so start over.
+        return (_ChildPositions, ([],))
+
+
 class Tag(PageElement):
     """An HTML or XML tag that is part of a parse tree, along with its
     attributes, contents, and relationships to other parts of the tree.
@@ -1752,6 +1916,32 @@ class Tag(PageElement):
     cdata_list_attributes: Optional[Dict[str, Set[str]]]
     preserve_whitespace_tags: Optional[Set[str]]
 
+    #: Once a `Tag` has this many children, `Tag.index` keeps track
+    #: of where each child is instead of scanning `Tag.contents` every
+    #: time. This makes it much faster to `PageElement.extract` or
+    #: `PageElement.replace_with` many children of a single wide tag.
+    #: Set this to None to always scan.
+    POSITION_TRACKING_THRESHOLD: Optional[int] = 64
+
+    #: The map `Tag.index` uses to find children of a wide tag, if
+    #: one has been built.
+    #:
+    #: :meta private:
+    _child_positions: Optional[_ChildPositions] = None
+
+    #: How many times `Tag.index` has scanned this tag's children
+    #: since its map of child positions was last thrown away. A map
+    #: isn't built until this reaches _SCANS_BEFORE_TRACKING, so that
+    #: a series of modifications that keeps invalidating the map (like
+    #: unwrapping one child after another) doesn't rebuild it every
+    #: time.
+    #:
+    #: :meta private:
+    _child_scans: int = 0
+
+    #: :meta private:
+    _SCANS_BEFORE_TRACKING: int = 4
+
     #: :meta private:
     parserClass = _deprecated_alias("parserClass", "parser_class", "4.0.0")
 
@@ -1760,25 +1950,46 @@ class Tag(PageElement):
         Its contents are a copy of the old Tag's contents.
         """
         clone = self.copy_self()
-
-        if recursive:
-            # Clone this tag's descendants recursively, but without
-            # making any recursive function calls.
-            tag_stack: List[Tag] = [clone]
-            for event, element in self._event_stream(self.descendants):
-                if event is Tag.END_ELEMENT_EVENT:
-                    # Stop appending incoming Tags to the Tag that was
-                    # just closed.
-                    tag_stack.pop()
-                else:
-                    descendant_clone = element.__deepcopy__(memo, recursive=False)
-                    # Add to its parent's .contents
-                    tag_stack[-1].append(descendant_clone)
-
-                    if event is Tag.START_ELEMENT_EVENT:
-                        # Add the Tag itself to the stack so that its
-                        # children will be .appended to it.
-                        tag_stack.append(cast(Tag, descendant_clone))
+        if not recursive:
+            return clone
+
+        # Clone this tag's descendants in document order, without
+        # making any recursive function calls. The copies are new, so
+        # there's no need to go through insert(): each one can be put
+        # at the end of its parent's .contents and linked to the
+        # element copied just before it.
+        previous: PageElement = clone
+        stack: List[Tuple[Iterator[PageElement], Tag]] = [
+            (iter(self.contents), clone)
+        ]
+        while stack:
+            children, parent = stack[-1]
+            for child in children:
+                child_clone = child.__deepcopy__(memo, recursive=False)
+                child_clone.parent = parent
+                siblings = parent.contents
+                if siblings:
+                    child_clone.previous_sibling = siblings[-1]
+                    siblings[-1].next_sibling = child_clone
+                siblings.append(child_clone)
+                child_clone.previous_element = previous
+                previous.next_element = child_clone
+                previous = child_clone
+                if isinstance(child, Tag) and child.contents:
+                    # Copy this tag's children before going on to its
+                    # next sibling.
+                    stack.append((iter(child.contents), cast(Tag, child_clone)))
+                    break
+            else:
+                stack.pop()
+        previous.next_element = None
+
+        if self._indexes_in_use:
+            # If the copy is a BeautifulSoup object with an index, the
+            # index needs to know about the copied tags.
+            index = clone._tree_index()
+            if index is not None:
+                index.rebuild(clone)
         return clone
 
     def copy_self(self) -> Self:
@@ -1789,6 +2000,33 @@ class Tag(PageElement):
         call it on its own to create a copy of a Tag without copying its
         contents.
         """
+        if type(self).__init__ is Tag.__init__:
+            # This is what the constructor would do, given the
+            # arguments below, but without looking at each argument to
+            # decide what to do with it. This makes a big difference
+            # when copying a large number of tags.
+            is_xml = self._is_xml
+            clone = type(self).__new__(type(self))
+            clone.parser_class = None
+            clone.name = self.name
+            clone.namespace = self.namespace
+            clone._namespaces = self._namespaces or {}
+            clone.prefix = self.prefix
+            clone.sourceline = self.sourceline
+            clone.sourcepos = self.sourcepos
+            clone.attribute_value_list_class = AttributeValueList
+            clone.attrs = self._copy_attrs(is_xml)
+            clone.known_xml = is_xml
+            clone.contents = []
+            clone.parent = clone.previous_element = clone.next_element = None
+            clone.previous_sibling = clone.next_sibling = None
+            clone.hidden = self.hidden
+            clone.can_be_empty_element = self.can_be_empty_element
+            clone.cdata_list_attributes = self.cdata_list_attributes
+            clone.preserve_whitespace_tags = self.preserve_whitespace_tags
+            clone.interesting_string_types = self.interesting_string_types
+            return clone
+
         clone = type(self)(
             None,
             None,
@@ -1809,6 +2047,23 @@ class Tag(PageElement):
             setattr(clone, attr, getattr(self, attr))
         return clone
 
+    def _copy_attrs(self, is_xml: bool) -> AttributeDict:
+        """Copy this tag's attributes into a new dictionary, the way
+        the constructor would if they were passed in.
+
+        :param is_xml: Whether the copy will be an XML tag.
+        """
+        attrs: AttributeDict
+        if is_xml:
+            attrs = XMLAttributeDict()
+        else:
+            attrs = HTMLAttributeDict()
+        for k, v in self.attrs.items():
+            if isinstance(v, list):
+                v = v.__class__(v)
+            attrs[k] = v
+        return attrs
+
     @property
     def is_empty_element(self) -> bool:
         """Is this tag an empty-element tag? (aka a self-closing tag)
@@ -1871,7 +2126,11 @@ class Tag(PageElement):
     MAIN_CONTENT_STRING_TYPES = {NavigableString, CData}
 
     def _all_strings(
-        self, strip: bool = False, types: _OneOrMoreStringTypes = PageElement.default
+        self,
+        strip: bool = False,
+        types: _OneOrMoreStringTypes = PageElement.default,
+        skip_tags: Optional[Iterable[str]] = None,
+        normalize_whitespace: bool = False,
     ) -> Iterator[str]:
         """Yield all strings of certain classes, possibly stripping them.
 
@@ -1885,34 +2144,148 @@ class Tag(PageElement):
             only NavigableString and CData objects will be
             considered. That means no comments, processing
             instructions, etc.
+
+        :param skip_tags: The names of tags whose contents should be
+            ignored. The contents of these tags are never visited, so
+            skipping large ``<script>`` or ``<style>`` tags is cheap.
+
+        :param normalize_whitespace: If True, all strings will be
+            stripped, and any run of whitespace within a string will
+            be replaced with a single space.
         """
         if types is self.default:
             if self.interesting_string_types is None:
                 types = self.MAIN_CONTENT_STRING_TYPES
             else:
                 types = self.interesting_string_types
+        if isinstance(types, type):
+            types = (types,)
+        skip: Optional[Set[str]] = None
+        if skip_tags is not None:
+            skip = set(skip_tags)
 
-        for descendant in self.descendants:
-            if not isinstance(descendant, NavigableString):
-                continue
-            descendant_type = type(descendant)
-            if isinstance(types, type):
-                if descendant_type is not types:
-                    # We're not interested in strings of this type.
-                    continue
-            elif types is not None and descendant_type not in types:
-                # We're not interested in strings of this type.
+        if not self.contents:
+            return
+        last_descendant = cast(PageElement, self._last_descendant(accept_self=True))
+        stop_node = last_descendant.next_element
+
+        # Whether the strings of each class we come across are
+        # interesting. A Tag class maps to False.
+        interesting: Dict[type, bool] = {}
+        current: _AtMostOneElement = self.contents[0]
+        while current is not stop_node and current is not None:
+            cls = type(current)
+            is_interesting = interesting.get(cls)
+            if is_interesting is None:
+                is_interesting = interesting[cls] = issubclass(
+                    cls, NavigableString
+                ) and (types is None or cls in types)
+            if not is_interesting:
+                if skip is not None and current.name in skip:
+                    # Jump past this tag's contents without looking
+                    # at them.
+                    current = cast(
+                        PageElement, current._last_descendant(accept_self=True)
+                    ).next_element
+                else:
+                    current = current.next_element
                 continue
-            if strip:
-                stripped = descendant.strip()
-                if len(stripped) == 0:
-                    continue
-                yield stripped
+            string = cast(NavigableString, current)
+            current = current.next_element
+            if normalize_whitespace:
+                value = " ".join(string.split())
+                if value:
+                    yield value
+            elif strip:
+                value = string.strip()
+                if value:
+                    yield value
             else:
-                yield descendant
+                yield string
 
     strings = property(_all_strings)
 
+    def get_text(
+        self,
+        separator: str = "",
+        strip: bool = False,
+        types: _OneOrMoreStringTypes = PageElement.default,
+        skip_tags: Optional[Iterable[str]] = None,
+        normalize_whitespace: bool = False,
+    ) -> str:
+        """Get all child strings of this Tag, concatenated using the
+        given separator.
+
+        :param separator: Strings will be concatenated using this separator.
+
+        :param strip: If True, strings will be stripped before being
+            concatenated.
+
+        :param types: A tuple of NavigableString subclasses. Any
+            strings of a subclass not found in this list will be
+            ignored. Although there are exceptions, the default
+            behavior in most cases is to consider only NavigableString
+            and CData objects. That means no comments, processing
+            instructions, etc.
+
+        :param skip_tags: The names of tags, such as "script" and
+            "style", whose contents should be ignored without being
+            visited.
+
+        :param normalize_whitespace: If True, strings will be
+            stripped, and runs of whitespace inside them will be
+            replaced with a single space, before being concatenated.
+
+        :return: A string.
+        """
+        return separator.join(
+            list(self._all_strings(strip, types, skip_tags, normalize_whitespace))
+        )
+
+    getText = get_text
+    text = property(get_text)
+
+    def write_text(
+        self,
+        fp: IO[str],
+        separator: str = "",
+        strip: bool = False,
+        types: _OneOrMoreStringTypes = PageElement.default,
+        skip_tags: Optional[Iterable[str]] = None,
+        normalize_whitespace: bool = False,
+        buffer_size: int = DEFAULT_OUTPUT_BUFFER_SIZE,
+    ) -> None:
+        """Write the text `Tag.get_text` would return to an open text
+        file (or an `io.StringIO`) a buffer at a time, without building
+        a string containing all of it.
+
+        :param fp: A file-like object with a ``write`` method that
+            accepts strings.
+        :param buffer_size: Approximately how many characters of text
+            to collect before writing them to ``fp``.
+
+        The other arguments are the same as for `Tag.get_text`.
+        """
+        buffer: List[str] = []
+        buffered = 0
+        first = True
+        for string in self._all_strings(
+            strip, types, skip_tags, normalize_whitespace
+        ):
+            if first:
+                first = False
+            elif separator:
+                buffer.append(separator)
+                buffered += len(separator)
+            buffer.append(string)
+            buffered += len(string)
+            if buffered >= buffer_size:
+                fp.write("".join(buffer))
+                buffer = []
+                buffered = 0
+        if buffer:
+            fp.write("".join(buffer))
+
     def insert(self, position: int, *new_children: _InsertableElement) -> List[PageElement]:
         """Insert one or more new PageElements as a child of this `Tag`.
 
@@ -2016,7 +2389,16 @@ class Tag(PageElement):
                 new_childs_last_element
             )
         self.contents.insert(position, new_child)
+        positions = self._child_positions
+        if positions is not None and not positions.inserted_child(
+            new_child, position, self.contents
+        ):
+            self._forget_child_positions()
 
+        if self._indexes_in_use:
+            index = self._tree_index()
+            if index is not None:
+                index.subtree_inserted(new_child)
         return [new_child]
 
     def unwrap(self) -> Self:
@@ -2112,37 +2494,85 @@ class Tag(PageElement):
         calling this method afterwards can make pretty-printed output
         look more natural.
         """
-        # Mark the first position of every pair of children that need
-        # to be consolidated.  Do this rather than making a copy of
-        # self.contents, since in most cases very few strings will be
-        # affected.
-        marked = []
-        for i, a in enumerate(self.contents):
-            if isinstance(a, Tag):
-                # Recursively smooth children.
-                a.smooth()
-            if i == len(self.contents) - 1:
-                # This is the last item in .contents, and it's not a
-                # tag. There's no chance it needs any work.
-                continue
-            b = self.contents[i + 1]
-            if (
-                isinstance(a, NavigableString)
-                and isinstance(b, NavigableString)
-                and not isinstance(a, PreformattedString)
-                and not isinstance(b, PreformattedString)
-            ):
-                marked.append(i)
-
-        # Go over the marked positions in reverse order, so that
-        # removing items from .contents won't affect the remaining
-        # positions.
-        for i in reversed(marked):
-            a = cast(NavigableString, self.contents[i])
-            b = cast(NavigableString, self.contents[i + 1])
-            b.extract()
-            n = NavigableString(a + b)
-            a.replace_with(n)
+        # Visit every tag with an explicit stack rather than by
+        # recursion, so a deeply nested tree can't hit the recursion
+        # limit.
+        stack: List[Tag] = [self]
+        while stack:
+            tag = stack.pop()
+            contents = tag.contents
+            new_contents: Optional[List[PageElement]] = None
+            run: List[NavigableString] = []
+            for i, child in enumerate(contents):
+                if isinstance(child, NavigableString) and not isinstance(
+                    child, PreformattedString
+                ):
+                    run.append(child)
+                    continue
+                if len(run) > 1:
+                    if new_contents is None:
+                        new_contents = contents[: i - len(run)]
+                    new_contents.append(self._merge_strings(tag, run))
+                elif new_contents is not None:
+                    new_contents.extend(run)
+                run = []
+                if new_contents is not None:
+                    new_contents.append(child)
+                if isinstance(child, Tag) and child.contents:
+                    stack.append(child)
+
+            if len(run) > 1:
+                if new_contents is None:
+                    new_contents = contents[: len(contents) - len(run)]
+                new_contents.append(self._merge_strings(tag, run))
+            elif new_contents is not None:
+                new_contents.extend(run)
+
+            if new_contents is not None:
+                # Replace the list in place, in case something is
+                # holding a reference to it.
+                contents[:] = new_contents
+                tag._forget_child_positions()
+
+    @classmethod
+    def _merge_strings(
+        cls, parent: Tag, run: List[NavigableString]
+    ) -> NavigableString:
+        """Replace a run of adjacent strings with a single string.
+
+        The new string takes over the links into and out of the run;
+        the caller is responsible for putting it into
+        ``parent.contents``.
+
+        :param parent: The `Tag` containing the strings.
+        :param run: Two or more adjacent children of ``parent``, none of
+            them a `Tag`.
+        """
+        first = run[0]
+        last = run[-1]
+        merged = NavigableString("".join(run))
+        merged.parent = parent
+
+        # The strings in the run have no children, so they're next to
+        # each other in the element chain as well as in .contents.
+        merged.previous_element = first.previous_element
+        if merged.previous_element is not None:
+            merged.previous_element.next_element = merged
+        merged.next_element = last.next_element
+        if merged.next_element is not None:
+            merged.next_element.previous_element = merged
+        merged.previous_sibling = first.previous_sibling
+        if merged.previous_sibling is not None:
+            merged.previous_sibling.next_sibling = merged
+        merged.next_sibling = last.next_sibling
+        if merged.next_sibling is not None:
+            merged.next_sibling.previous_sibling = merged
+
+        for string in run:
+            string.parent = None
+            string.previous_element = string.next_element = None
+            string.previous_sibling = string.next_sibling = None
+        return merged
 
     def index(self, element: PageElement) -> int:
         """Find the index of a child of this `Tag` (by identity, not value).
@@ -2152,11 +2582,41 @@ class Tag(PageElement):
 
         :param element: Look for this `PageElement` in this object's contents.
         """
-        for i, child in enumerate(self.contents):
-            if child is element:
-                return i
+        contents = self.contents
+        threshold = self.POSITION_TRACKING_THRESHOLD
+        if threshold is None or len(contents) < threshold:
+            for i, child in enumerate(contents):
+                if child is element:
+                    return i
+            raise ValueError("Tag.index: element not in tag")
+
+        positions = self._child_positions
+        if positions is None and self._child_scans < self._SCANS_BEFORE_TRACKING:
+            self._child_scans += 1
+            for i, child in enumerate(contents):
+                if child is element:
+                    return i
+            raise ValueError("Tag.index: element not in tag")
+        if positions is not None:
+            found = positions.find(contents, element)
+            if found is not None:
+                return found
+        if positions is None or getattr(element, "parent", None) is self:
+            # The map is missing or out of date. Rebuild it and try
+            # again.
+            positions = self._child_positions = _ChildPositions(contents)
+            found = positions.find(contents, element)
+            if found is not None:
+                return found
         raise ValueError("Tag.index: element not in tag")
 
+    def _forget_child_positions(self) -> None:
+        """Throw away the map `Tag.index` uses to find children of a
+        wide tag, because it can't keep up with a modification.
+        """
+        self._child_positions = None
+        self._child_scans = 0
+
     def get(
         self, key: str, default: Optional[_AttributeValue] = None
     ) -> Optional[_AttributeValue]:
@@ -2198,7 +2658,79 @@ class Tag(PageElement):
         return key in self.attrs
 
     def __hash__(self) -> int:
-        return str(self).__hash__()
+        return self.fingerprint()
+
+    def fingerprint(self) -> int:
+        """Calculate a number that summarizes this tag's name, its
+        attributes, and everything beneath it.
+
+        Two tags that are equal (see `Tag.__eq__`) always have the same
+        fingerprint, so this is used as the tag's hash. It's much
+        cheaper to calculate than the tag's string representation, so
+        it's cheap to put a lot of tags into a set or use them as
+        dictionary keys, e.g. to find blocks of markup that are
+        repeated across many documents.
+
+        The fingerprint is calculated in one pass over the tag and
+        everything beneath it, every time it's needed. It isn't
+        remembered, because a tag can be changed in ways that can't be
+        noticed, like assigning to `Tag.name` or modifying `Tag.attrs`.
+
+        Like `hash`, the fingerprint of a given tag may be different
+        in a different Python process.
+        """
+        # Calculate the fingerprints bottom-up, without making any
+        # recursive function calls. A tag goes on the stack twice:
+        # once to put its children on the stack, and again, once the
+        # children are done, to calculate its own fingerprint.
+        fingerprints: Dict[int, int] = {}
+        stack: List[Tuple[Tag, bool]] = [(self, False)]
+        while stack:
+            tag, children_done = stack.pop()
+            if not children_done:
+                stack.append((tag, True))
+                for child in tag.contents:
+                    if isinstance(child, Tag):
+                        stack.append((child, False))
+                continue
+            attrs = tag.attrs
+            if attrs:
+                attribute_fingerprint: Optional[frozenset] = frozenset(
+                    (key, self._attribute_value_fingerprint(value))
+                    for key, value in attrs.items()
+                )
+            else:
+                attribute_fingerprint = None
+            # Strings are compared by value, so the hash of a string
+            # is a good enough fingerprint for it.
+            fingerprints[id(tag)] = hash(
+                (
+                    tag.name,
+                    attribute_fingerprint,
+                    tuple(
+                        fingerprints.pop(id(child))
+                        if isinstance(child, Tag)
+                        else hash(child)
+                        for child in tag.contents
+                    ),
+                )
+            )
+        return fingerprints[id(self)]
+
+    @classmethod
+    def _attribute_value_fingerprint(cls, value: Any) -> Hashable:
+        """Turn an attribute value into something hashable, for
+        `Tag.fingerprint`.
+        """
+        if isinstance(value, list):
+            value = tuple(value)
+        try:
+            hash(value)
+        except TypeError:
+            # Someone put an unusual object into Tag.attrs. Use the
+            # string it'll be output as.
+            return str(value)
+        return value
 
     def __getitem__(self, key: str) -> _AttributeValue:
         """tag[key] returns the value of the 'key' attribute for the Tag,
@@ -2224,10 +2756,29 @@ class Tag(PageElement):
         """Setting tag[key] sets the value of the 'key' attribute for the
         tag."""
         self.attrs[key] = value
+        if self._indexes_in_use and key in self._INDEXED_ATTRIBUTES:
+            self._attribute_changed()
 
     def __delitem__(self, key: str) -> None:
         "Deleting tag[key] deletes all 'key' attributes for the tag."
         self.attrs.pop(key, None)
+        if self._indexes_in_use and key in self._INDEXED_ATTRIBUTES:
+            self._attribute_changed()
+
+    #: Changing these attributes may change the results of a search
+    #: that uses a `TagIndex`.
+    #: :meta private:
+    _INDEXED_ATTRIBUTES: Set[str] = {"id", "class"}
+
+    def _attribute_changed(self) -> None:
+        """Let this tree's `TagIndex` know that one of this tag's
+        indexed attributes changed.
+        """
+        index = self._tree_index()
+        if index is not None:
+            # The tag has moved from one part of the index to another,
+            # and document order can't be preserved cheaply.
+            index.stale = True
 
     def __call__(
         self,
@@ -2357,7 +2908,20 @@ class Tag(PageElement):
             parse tree. This is only used by `Tag.decode_contents` and
             you probably won't need to use it.
         """
-        pieces = []
+        return "".join(
+            self._decode_pieces(indent_level, eventual_encoding, formatter, iterator)
+        )
+
+    def _decode_pieces(
+        self,
+        indent_level: Optional[int] = None,
+        eventual_encoding: _Encoding = DEFAULT_OUTPUT_ENCODING,
+        formatter: _FormatterOrName = "minimal",
+        iterator: Optional[Iterator[PageElement]] = None,
+    ) -> Iterator[str]:
+        """Render this `Tag` and its contents as a series of small
+        Unicode strings. The arguments are the same as for `Tag.decode`.
+        """
         # First off, turn a non-Formatter `formatter` into a Formatter
         # object. This will stop the lookup from happening over and
         # over again.
@@ -2437,8 +3001,112 @@ class Tag(PageElement):
                         )
                 if event == Tag.START_ELEMENT_EVENT:
                     indent_level += 1
-            pieces.append(piece)
-        return "".join(pieces)
+            if piece:
+                yield piece
+
+    def _document_prefix(self, eventual_encoding: Optional[_Encoding]) -> str:
+        """Any text that must come before this `Tag` when it's
+        written out as a complete document. `BeautifulSoup` uses
+        this for the XML declaration.
+        """
+        return ""
+
+    def iter_encode(
+        self,
+        encoding: _Encoding = DEFAULT_OUTPUT_ENCODING,
+        indent_level: Optional[int] = None,
+        formatter: _FormatterOrName = "minimal",
+        errors: str = "xmlcharrefreplace",
+        buffer_size: int = DEFAULT_OUTPUT_BUFFER_SIZE,
+    ) -> Iterator[bytes]:
+        """Render this `Tag` and its contents as a series of
+        bytestrings which, joined together, are the same as the result
+        of `Tag.encode`.
+
+        Unlike `Tag.encode`, this never builds a string containing the
+        whole document, so memory use doesn't depend on the size of
+        the tree.
+
+        :param encoding: The encoding to use when converting to
+           bytestrings.
+        :param indent_level: As with `Tag.encode`. Pass in 0 to
+           pretty-print the output, as with `Tag.prettify`.
+        :param formatter: Either a `Formatter` object, or a string naming one of
+            the standard formatters.
+        :param errors: An error handling strategy such as
+            'xmlcharrefreplace', as with `Tag.encode`.
+        :param buffer_size: Approximately how many characters of output
+            to collect before encoding them and yielding the result.
+        """
+        encoder = codecs.getincrementalencoder(encoding)(errors)
+        for chunk in self._buffered_pieces(indent_level, encoding, formatter, buffer_size):
+            yield encoder.encode(chunk)
+        final = encoder.encode("", True)
+        if final:
+            yield final
+
+    def write_to(
+        self,
+        fp: Union[IO[str], IO[bytes]],
+        encoding: Optional[_Encoding] = DEFAULT_OUTPUT_ENCODING,
+        indent_level: Optional[int] = None,
+        formatter: _FormatterOrName = "minimal",
+        errors: str = "xmlcharrefreplace",
+        buffer_size: int = DEFAULT_OUTPUT_BUFFER_SIZE,
+    ) -> None:
+        """Write this `Tag` and its contents to an open file or socket
+        a buffer at a time, without building a string containing the
+        whole document.
+
+        :param fp: A file-like object with a ``write`` method.
+        :param encoding: The encoding to use when writing to ``fp``. If
+           this is None, ``fp`` is assumed to be a text file and
+           Unicode strings will be written to it.
+        :param indent_level: As with `Tag.encode`. Pass in 0 to
+           pretty-print the output, as with `Tag.prettify`.
+        :param formatter: Either a `Formatter` object, or a string naming one of
+            the standard formatters.
+        :param errors: An error handling strategy such as
+            'xmlcharrefreplace', as with `Tag.encode`.
+        :param buffer_size: Approximately how many characters of output
+            to collect before writing them to ``fp``.
+        """
+        if encoding is None:
+            text_fp = cast(IO[str], fp)
+            for chunk in self._buffered_pieces(
+                indent_level, DEFAULT_OUTPUT_ENCODING, formatter, buffer_size
+            ):
+                text_fp.write(chunk)
+        else:
+            binary_fp = cast(IO[bytes], fp)
+            for data in self.iter_encode(
+                encoding, indent_level, formatter, errors, buffer_size
+            ):
+                binary_fp.write(data)
+
+    def _buffered_pieces(
+        self,
+        indent_level: Optional[int],
+        eventual_encoding: _Encoding,
+        formatter: _FormatterOrName,
+        buffer_size: int,
+    ) -> Iterator[str]:
+        """Render this `Tag` as a complete document, a buffer at a time."""
+        buffer: List[str] = []
+        buffered = 0
+        prefix = self._document_prefix(eventual_encoding)
+        if prefix:
+            buffer.append(prefix)
+            buffered = len(prefix)
+        for piece in self._decode_pieces(indent_level, eventual_encoding, formatter):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= buffer_size:
+                yield "".join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield "".join(buffer)
 
     class _TreeTraversalEvent(object):
         """An internal class representing an event in the process
@@ -2737,6 +3405,10 @@ class Tag(PageElement):
         :param _stacklevel: Used internally to improve warning messages.
         :kwargs: Additional filters on attribute values.
         """
+        if recursive and self._indexes_in_use:
+            results = self._find_all_indexed(name, attrs, string, limit, **kwargs)
+            if results is not None:
+                return results
         generator = self.descendants
         if not recursive:
             generator = self.children
@@ -2744,9 +3416,163 @@ class Tag(PageElement):
             name, attrs, string, limit, generator, _stacklevel=_stacklevel + 1, **kwargs
         )
 
+    def _find_all_indexed(
+        self,
+        name: _FindMethodName,
+        attrs: _StrainableAttributes,
+        string: Optional[_StrainableString],
+        limit: Optional[int],
+        **kwargs: _StrainableAttribute,
+    ) -> Optional[_QueryResults]:
+        """Answer a `Tag.find_all` query from an index instead of by
+        walking the tree. Only a `BeautifulSoup` object can have an
+        index, so this implementation always returns None.
+
+        :meta private:
+        """
+        return None
+
     findAll = _deprecated_function_alias("findAll", "find_all", "4.0.0")
     findChildren = _deprecated_function_alias("findChildren", "find_all", "3.0.0")
 
+    def find_all_many(
+        self,
+        queries: Mapping[str, Union[_FindMethodName, _StrainableAttributes]],
+        recursive: bool = True,
+        limit: Optional[int] = None,
+        selectors: Optional[Mapping[str, str]] = None,
+        namespaces: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, _QueryResults]:
+        """Run several `Tag.find_all` and `Tag.select` queries at once,
+        in a single pass over the tree.
+
+        Example::
+
+            results = soup.find_all_many(
+                {"links": "a", "ids": {"id": True}, "ps": SoupStrainer("p")},
+                selectors={"nav": "div.nav > a"},
+            )
+            results["links"] # Same as soup.find_all("a")
+            results["ids"]   # Same as soup.find_all(attrs={"id": True})
+            results["nav"]   # Same as soup.select("div.nav > a")
+
+        Queries that are nothing more than a tag name are checked
+        with a single dictionary lookup per tag, no matter how many
+        of them there are.
+
+        :param queries: A dictionary mapping a name for each query
+            to the query itself. A query may be anything you'd pass
+            in as the ``name`` argument to `Tag.find_all` (including an
+            `ElementFilter`), or a dictionary you'd pass in as
+            ``attrs``. A string that looks like a CSS selector (it
+            contains whitespace or one of ``>+~#.[],*()``) raises
+            ValueError; put it in ``selectors`` instead, or wrap it
+            in a `SoupStrainer` if it really is a tag name.
+        :param recursive: If this is True, all descendants of this
+            `Tag` will be considered. Otherwise, only the direct
+            children will be considered.
+        :param limit: Stop adding to a query's results once it has
+            found this many matches.
+        :param selectors: A dictionary mapping a name for each query
+            to a CSS selector, as you'd pass in to `Tag.select`. This
+            uses the Soup Sieve library. The names must be different
+            from the ones used in ``queries``.
+        :param namespaces: A dictionary mapping namespace prefixes
+           used in ``selectors`` to namespace URIs. By default,
+           Beautiful Soup will use the prefixes it encountered while
+           parsing the document.
+        :return: A dictionary mapping the name of each query to a
+            `ResultSet` containing its matches, in document order.
+        """
+        from bs4.filter import ElementFilter
+
+        results: Dict[str, _QueryResults] = {}
+        by_name: Dict[str, List[_QueryResults]] = {}
+        every_tag: List[_QueryResults] = []
+        others: List[Tuple[ElementFilter, _QueryResults]] = []
+        for key, query in queries.items():
+            matcher: ElementFilter
+            match_every_tag = query is None or query is True
+            if match_every_tag:
+                # As with find_all(), None and True match every tag.
+                matcher = SoupStrainer(True)
+            elif isinstance(query, ElementFilter):
+                matcher = query
+            elif isinstance(query, dict):
+                matcher = SoupStrainer(attrs=query)
+            else:
+                if isinstance(query, str) and _selector_like_re.search(query):
+                    raise ValueError(
+                        f"Query {key!r} looks like a CSS selector: {query!r}."
+                        " Pass it in as part of selectors instead."
+                    )
+                matcher = SoupStrainer(query)
+            result: _QueryResults = ResultSet(matcher)
+            results[key] = result
+            if match_every_tag:
+                every_tag.append(result)
+                continue
+
+            # A query that can only match one tag name goes into a
+            # dictionary keyed by that name. Everything else has to
+            # be checked against every element.
+            name: Optional[str] = None
+            if isinstance(matcher, SoupStrainer) and (
+                len(matcher.name_rules) == 1
+                and not matcher.attribute_rules
+                and not matcher.string_rules
+            ):
+                name = matcher.name_rules[0].string
+            if name is not None and ":" not in name:
+                by_name.setdefault(name, []).append(result)
+            else:
+                others.append((matcher, result))
+
+        compiled_selectors: List[Tuple[SoupSieve, _QueryResults]] = []
+        if selectors:
+            css = self.css
+            for key, selector in selectors.items():
+                if key in results:
+                    raise ValueError(
+                        f"{key!r} is the name of a query and of a selector."
+                    )
+                result = ResultSet(None)
+                results[key] = result
+                compiled_selectors.append((css.compile(selector, namespaces), result))
+
+        if not limit:
+            # As with find_all(), a limit of 0 means no limit.
+            limit = None
+        unfinished = len(results)
+        if not unfinished:
+            return results
+
+        generator = self.descendants if recursive else self.children
+        for element in generator:
+            if not element:
+                # Same as ElementFilter.filter().
+                continue
+            matched: List[_QueryResults] = []
+            if isinstance(element, Tag):
+                matched.extend(every_tag)
+                matched.extend(by_name.get(element.name, ()))
+                for compiled, result in compiled_selectors:
+                    if compiled.match(element):
+                        matched.append(result)
+            for matcher, result in others:
+                if matcher.match(element):
+                    matched.append(result)
+            for result in matched:
+                if limit is not None:
+                    if len(result) >= limit:
+                        continue
+                    if len(result) == limit - 1:
+                        unfinished -= 1
+                result.append(cast("_OneElement", element))
+            if not unfinished:
+                break
+        return results
+
     # Generator methods
     @property
     def children(self) -> Iterator[PageElement]:
@@ -2855,6 +3681,368 @@ class Tag(PageElement):
         return self.has_attr(key)
 
 
+class _SharedEmptyAttributeDict(object):
+    """Mixed in to a subclass of `AttributeDict` to make the read-only,
+    empty dictionary that every `CompactTag` without attributes
+    shares. See `empty_attribute_dict`.
+
+    `CompactTag.attrs` never hands this dictionary out; it hands out a
+    `_CopyOnWriteAttributeDict` instead.
+    """
+
+    __slots__ = ()
+
+    #: The class of dictionary to create when an attribute is added
+    #: to a tag that was using the shared dictionary.
+    mutable_class: Type[AttributeDict]
+
+    #: The class of dictionary `CompactTag.attrs` hands out in place
+    #: of the shared dictionary.
+    copy_on_write_class: Type[_CopyOnWriteAttributeDict]
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("This dictionary is shared by many tags and can't be modified.")
+
+    __setitem__ = setdefault = update = __ior__ = _read_only
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (empty_attribute_dict, (self.mutable_class,))
+
+
+class _CopyOnWriteAttributeDict(object):
+    """Mixed in to a subclass of `AttributeDict` to make the empty
+    dictionary `CompactTag.attrs` returns when the tag is using the
+    shared dictionary. The first time this dictionary is modified, it
+    becomes the tag's own ``attrs``.
+    """
+
+    mutable_class: Type[AttributeDict]
+
+    def __init__(self, tag: CompactTag):
+        super().__init__()
+        self._tag = tag
+
+    def _claim(self) -> None:
+        tag = self.__dict__.pop("_tag", None)
+        if tag is not None and isinstance(tag._attrs, _SharedEmptyAttributeDict):
+            tag._attrs = self
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._claim()
+        super().__setitem__(key, value)  # type:ignore
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self._claim()
+        return super().setdefault(key, default)  # type:ignore
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._claim()
+        super().update(*args, **kwargs)  # type:ignore
+
+    def __ior__(self, other: Any) -> Self:
+        self._claim()
+        return super().__ior__(other)  # type:ignore
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (self.mutable_class, (dict(self),))  # type:ignore
+
+
+_empty_attribute_dicts: Dict[Type[AttributeDict], AttributeDict] = {}
+
+
+def empty_attribute_dict(attribute_dict_class: Type[AttributeDict]) -> AttributeDict:
+    """Find the shared, read-only, empty ``attrs`` used by every
+    `CompactTag` that has no attributes and would otherwise have an
+    empty instance of ``attribute_dict_class``.
+    """
+    shared = _empty_attribute_dicts.get(attribute_dict_class)
+    if shared is None:
+        copy_on_write_class = type(
+            attribute_dict_class.__name__,
+            (_CopyOnWriteAttributeDict, attribute_dict_class),
+            dict(mutable_class=attribute_dict_class),
+        )
+        shared_class = type(
+            attribute_dict_class.__name__,
+            (_SharedEmptyAttributeDict, attribute_dict_class),
+            dict(
+                mutable_class=attribute_dict_class,
+                copy_on_write_class=copy_on_write_class,
+            ),
+        )
+        shared = _empty_attribute_dicts[attribute_dict_class] = shared_class()
+    return shared
+
+
+class TagProfile(object):
+    """The values a `CompactTag` stores once per (`TreeBuilder`, tag
+    name) instead of once per tag.
+
+    Within one document, every tag with the same name gets the same
+    answer from the `TreeBuilder` for all of these, so a `CompactTag`
+    keeps a reference to a shared `TagProfile` instead of its own
+    copies. Profiles are never modified: changing one of these values
+    on a `CompactTag` gives that tag a profile of its own.
+    """
+
+    __slots__ = (
+        "parser_class",
+        "known_xml",
+        "attribute_value_list_class",
+        "can_be_empty_element",
+        "cdata_list_attributes",
+        "preserve_whitespace_tags",
+        "interesting_string_types",
+    )
+
+    parser_class: Optional[type[BeautifulSoup]]
+    known_xml: Optional[bool]
+    attribute_value_list_class: Type[AttributeValueList]
+    can_be_empty_element: Optional[bool]
+    cdata_list_attributes: Optional[Dict[str, Set[str]]]
+    preserve_whitespace_tags: Optional[Set[str]]
+    interesting_string_types: Optional[Set[Type[NavigableString]]]
+
+    def __init__(
+        self,
+        parser_class: Optional[type[BeautifulSoup]],
+        known_xml: Optional[bool],
+        attribute_value_list_class: Type[AttributeValueList],
+        can_be_empty_element: Optional[bool],
+        cdata_list_attributes: Optional[Dict[str, Set[str]]],
+        preserve_whitespace_tags: Optional[Set[str]],
+        interesting_string_types: Optional[Set[Type[NavigableString]]],
+    ):
+        self.parser_class = parser_class
+        self.known_xml = known_xml
+        self.attribute_value_list_class = attribute_value_list_class
+        self.can_be_empty_element = can_be_empty_element
+        self.cdata_list_attributes = cdata_list_attributes
+        self.preserve_whitespace_tags = preserve_whitespace_tags
+        self.interesting_string_types = interesting_string_types
+
+    @classmethod
+    def for_tag(
+        cls,
+        builder: TreeBuilder,
+        parser_class: Optional[type[BeautifulSoup]],
+        name: str,
+    ) -> TagProfile:
+        """Find the profile shared by every tag called ``name`` that
+        ``builder`` creates for a ``parser_class`` document.
+        """
+        profiles = builder._tag_profiles
+        profile = profiles.get(name)
+        if profile is None or profile.parser_class is not parser_class:
+            # This is the same logic as in Tag.__init__.
+            interesting_string_types: Set[Type[NavigableString]]
+            if name in builder.string_containers:
+                interesting_string_types = {builder.string_containers[name]}
+            else:
+                interesting_string_types = Tag.MAIN_CONTENT_STRING_TYPES
+            profile = profiles[name] = cls(
+                parser_class,
+                builder.is_xml,
+                builder.attribute_value_list_class,
+                builder.can_be_empty_element(name),
+                builder.cdata_list_attributes,
+                builder.preserve_whitespace_tags,
+                interesting_string_types,
+            )
+        return profile
+
+    def replace(self, **changes: Any) -> TagProfile:
+        """Create a new profile like this one, with some values changed."""
+        values = dict((slot, getattr(self, slot)) for slot in self.__slots__)
+        values.update(changes)
+        return type(self)(**values)
+
+
+def _profile_property(name: str) -> property:
+    """Make a `CompactTag` attribute that's stored in its `TagProfile`."""
+
+    def fset(self: CompactTag, value: Any) -> None:
+        self._profile = self._profile.replace(**{name: value})
+
+    return property(attrgetter("_profile." + name), fset)
+
+
+#: Shared by every `CompactTag` that has no namespace mappings, instead
+#: of giving each one its own empty dictionary.
+_NO_NAMESPACES: Dict[str, str] = {}
+
+
+class CompactTag(Tag):
+    """A `Tag` that uses much less memory, for very large documents.
+
+    A `BeautifulSoup` object created with ``compact=True`` creates
+    `CompactTag` objects instead of `Tag` objects. A `CompactTag`
+    works just like a `Tag`, except:
+
+    * The values a `Tag` gets from the `TreeBuilder` are kept in a
+      `TagProfile` shared by every tag with the same name, instead of
+      being copied onto every tag.
+
+    * Links to other elements, and the tag's own name, attributes
+      and contents, are kept in slots rather than in the instance
+      ``__dict__``.
+
+    * Tags that have no attributes share a single empty ``attrs``
+      dictionary. The first change to a tag's attributes gives it a
+      dictionary of its own.
+
+    The constructor takes the same arguments as `Tag`.
+    """
+
+    __slots__ = _LINKAGE_SLOTS + (
+        "hidden",
+        "name",
+        "namespace",
+        "prefix",
+        "_attrs",
+        "contents",
+        "sourceline",
+        "sourcepos",
+        "_namespaces",
+        "_profile",
+    )
+
+    _DECOMPOSE_SLOTS = _LINKAGE_SLOTS + (
+        "name",
+        "namespace",
+        "prefix",
+        "_attrs",
+        "sourceline",
+        "sourcepos",
+        "_namespaces",
+    )
+
+    _profile: TagProfile
+    _attrs: _AttributeValues
+
+    def __init__(
+        self,
+        parser: Optional[BeautifulSoup] = None,
+        builder: Optional[TreeBuilder] = None,
+        name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        prefix: Optional[str] = None,
+        attrs: Optional[_RawOrProcessedAttributeValues] = None,
+        parent: Optional[Union[BeautifulSoup, Tag]] = None,
+        previous: _AtMostOneElement = None,
+        is_xml: Optional[bool] = None,
+        sourceline: Optional[int] = None,
+        sourcepos: Optional[int] = None,
+        can_be_empty_element: Optional[bool] = None,
+        cdata_list_attributes: Optional[Dict[str, Set[str]]] = None,
+        preserve_whitespace_tags: Optional[Set[str]] = None,
+        interesting_string_types: Optional[Set[Type[NavigableString]]] = None,
+        namespaces: Optional[Dict[str, str]] = None,
+    ):
+        if name is None:
+            raise ValueError("No value provided for new tag's name.")
+        parser_class = None if parser is None else parser.__class__
+        attr_dict_class: type[AttributeDict]
+        if builder is None:
+            # There's nothing to share this profile with, unless
+            # copy_self shares it.
+            self._profile = TagProfile(
+                parser_class,
+                is_xml,
+                AttributeValueList,
+                can_be_empty_element,
+                cdata_list_attributes,
+                preserve_whitespace_tags,
+                interesting_string_types,
+            )
+            if is_xml:
+                attr_dict_class = XMLAttributeDict
+            else:
+                attr_dict_class = HTMLAttributeDict
+        else:
+            self._profile = TagProfile.for_tag(builder, parser_class, name)
+            attr_dict_class = builder.attribute_dict_class
+
+        self.name = name
+        self.namespace = namespace
+        self._namespaces = namespaces or _NO_NAMESPACES
+        self.prefix = prefix
+        self.sourceline = sourceline
+        self.sourcepos = sourcepos
+        self.hidden = False
+
+        if not attrs:
+            self.attrs = empty_attribute_dict(attr_dict_class)
+        elif builder is not None and builder.cdata_list_attributes:
+            self.attrs = builder._replace_cdata_list_attribute_values(name, attrs)
+        else:
+            self.attrs = attr_dict_class()
+            for k, v in attrs.items():
+                if isinstance(v, list):
+                    v = v.__class__(v)
+                self.attrs[k] = v
+
+        self.contents = []
+        self.setup(parent, previous)
+        if builder is not None:
+            builder.set_up_substitutions(self)
+
+    parser_class = _profile_property("parser_class")
+    known_xml = _profile_property("known_xml")  # type:ignore
+    attribute_value_list_class = _profile_property("attribute_value_list_class")
+    can_be_empty_element = _profile_property("can_be_empty_element")
+    cdata_list_attributes = _profile_property("cdata_list_attributes")
+    preserve_whitespace_tags = _profile_property("preserve_whitespace_tags")
+    interesting_string_types = _profile_property("interesting_string_types")
+
+    def copy_self(self) -> Self:
+        """Create a new CompactTag just like this one, but with no
+        contents and unattached to any parse tree. The copy shares
+        this tag's `TagProfile`.
+        """
+        if type(self).__init__ is not CompactTag.__init__:
+            clone = super().copy_self()
+            clone._profile = self._profile
+            return clone
+
+        # See Tag.copy_self.
+        is_xml = self._is_xml
+        clone = type(self).__new__(type(self))
+        clone._profile = self._profile
+        clone.name = self.name
+        clone.namespace = self.namespace
+        clone._namespaces = self._namespaces or _NO_NAMESPACES
+        clone.prefix = self.prefix
+        clone.sourceline = self.sourceline
+        clone.sourcepos = self.sourcepos
+        clone.hidden = self.hidden
+        if self._attrs:
+            clone.attrs = self._copy_attrs(is_xml)
+        else:
+            clone.attrs = empty_attribute_dict(
+                XMLAttributeDict if is_xml else HTMLAttributeDict
+            )
+        clone.contents = []
+        clone.parent = clone.previous_element = clone.next_element = None
+        clone.previous_sibling = clone.next_sibling = None
+        return clone
+
+    @property
+    def attrs(self) -> _AttributeValues:  # type:ignore
+        """The tag's attributes. If the tag is sharing an empty
+        dictionary with other tags, this is a new empty dictionary
+        that becomes the tag's own the first time it's modified.
+        """
+        attrs = self._attrs
+        if isinstance(attrs, _SharedEmptyAttributeDict):
+            return attrs.copy_on_write_class(self)
+        return attrs
+
+    @attrs.setter
+    def attrs(self, value: _AttributeValues) -> None:
+        self._attrs = value
+
+
 _PageElementT = TypeVar("_PageElementT", bound=PageElement)
 
 
@@ -9,9 +9,13 @@ from typing import (
     Iterator,
     Iterable,
     List,
+    Mapping,
     Optional,
     Sequence,
+    Set,
+    Tuple,
     Type,
+    TypeVar,
     Union,
 )
 import warnings
@@ -25,52 +29,25 @@ from bs4.element import (
     Tag,
 )
 from bs4._typing import (
+    _AllowTagCreationFunction,
     _AtMostOneElement,
     _AttributeValue,
+    _CompiledTagMatchFunction,
     _OneElement,
     _PageElementMatchFunction,
     _QueryResults,
     _RawAttributeValues,
+    _RawOrProcessedAttributeValues,
     _RegularExpressionProtocol,
     _StrainableAttribute,
     _StrainableElement,
     _StrainableString,
     _StringMatchFunction,
     _TagMatchFunction,
+    _TagNameFilterFunction,
 )
 
-
-class SoupReplacer:
-    """
-    A class to replace specific HTML tags with alternative tags during parsing.
-    Similar to SoupStrainer but focused on tag replacement rather than filtering.
-    """
-    
-    def __init__(self, original_tag: str, replacement_tag: str):
-        """
-        Initialize a SoupReplacer with original and replacement tag names.
-        
-        Args:
-            original_tag (str): The HTML tag to be replaced (e.g., 'b')
-            replacement_tag (str): The replacement tag (e.g., 'strong')
-        """
-        self.original_tag = original_tag
-        self.replacement_tag = replacement_tag
-
-    def replace_if_needed(self, tag_name: str) -> str:
-        """
-        Check if a tag should be replaced and return the appropriate tag name.
-        
-        Args:
-            tag_name (str): The name of the tag to check
-            
-        Returns:
-            str: Either the replacement tag name or the original tag name
-        """
-        return self.replacement_tag if tag_name == self.original_tag else tag_name
-
-    def __repr__(self) -> str:
-        return f"SoupReplacer(original_tag='{self.original_tag}', replacement_tag='{self.replacement_tag}')"
+_AttributeDictT = TypeVar("_AttributeDictT", bound=Dict[Any, Any])
 
 
 class ElementFilter(object):
@@ -214,6 +191,39 @@ class ElementFilter(object):
         """
         return True
 
+    def _tag_creation_function(self) -> _AllowTagCreationFunction:
+        """The function `BeautifulSoup` should call, for every tag it
+        encounters while parsing, in place of `allow_tag_creation`.
+
+        :meta private:
+        """
+        return self.allow_tag_creation
+
+    def _tag_name_function(self) -> Optional[_TagNameFilterFunction]:
+        """A function that can reject a tag, during parsing, based on
+        nothing but its namespace prefix and name.
+
+        A tree builder can call this before doing the work of
+        processing a tag's attributes. If it returns False,
+        `allow_tag_creation` would have rejected the tag whatever its
+        attributes were.
+
+        :return: None if this `ElementFilter` can't tell from the name alone.
+        :meta private:
+        """
+        return None
+
+    @property
+    def _excludes_strings(self) -> bool:
+        """Will `allow_string_creation` reject every string it's given?
+
+        If so, strings that show up outside of any allowed tag can be
+        discarded as soon as they're seen.
+
+        :meta private:
+        """
+        return False
+
 
 class MatchRule(object):
     """Each MatchRule encapsulates the logic behind a single argument
@@ -700,6 +710,339 @@ class SoupStrainer(ElementFilter):
                     return True
         return False
 
+    def filter(self, generator: Iterator[PageElement]) -> Iterator[_OneElement]:
+        """Acts like Python's built-in `filter`, using this
+        `SoupStrainer`'s rules as the filtering function.
+
+        The rules are run through `SoupStrainer.compile` once, before
+        the search begins.
+        """
+        if (
+            type(self).match is not SoupStrainer.match
+            or type(self).matches_tag is not SoupStrainer.matches_tag
+        ):
+            # A subclass has its own idea of what matches.
+            yield from super().filter(generator)
+            return
+
+        if self.name_rules or self.attribute_rules:
+            # Only a Tag can match.
+            match = self.compile()
+            for i in generator:
+                if isinstance(i, Tag) and match(i.prefix, i.name, i.attrs, i):
+                    yield cast("_OneElement", i)
+        else:
+            # Only a NavigableString can match.
+            for i in generator:
+                if i and not isinstance(i, Tag) and self.match(i):
+                    yield cast("_OneElement", i)
+
+    def compile(self) -> _CompiledTagMatchFunction:
+        """Specialize the rules of this `SoupStrainer` into a single
+        function that decides whether a tag matches.
+
+        The function is called with a tag's namespace prefix, name and
+        attributes. Pass in the `Tag` itself as a fourth argument, and
+        the function answers the question asked by `matches_tag`;
+        leave it out (as happens during parsing, when the `Tag` has not
+        been created yet), and it answers the question asked by
+        `allow_tag_creation`.
+
+        Where `matches_tag` checks every `MatchRule` in turn, the
+        compiled function checks exact tag names and attribute values
+        with set lookups, runs all of the regular expressions for a
+        given name or attribute as a single regular expression, and
+        checks for the presence or absence of attributes before doing
+        anything else.
+
+        The find_* methods compile a `SoupStrainer` once per search,
+        and `BeautifulSoup` compiles its ``parse_only`` once per
+        document. If you change the rules of a `SoupStrainer` after
+        compiling it, compile it again.
+        """
+        string_rules = self.string_rules
+        if not self.name_rules and not self.attribute_rules:
+            # String rules can't match a Tag on their own, and can't
+            # be checked during parsing at all. With no rules of any
+            # kind, every tag is allowed but none of them match.
+            allow = not string_rules
+
+            def match_nothing(
+                nsprefix: Optional[str],
+                name: str,
+                attrs: Optional[_RawOrProcessedAttributeValues],
+                tag: Optional[Tag] = None,
+            ) -> bool:
+                return allow and tag is None
+
+            return match_nothing
+
+        if (
+            not self.attribute_rules
+            and not string_rules
+            and all(rule.string is not None for rule in self.name_rules)
+        ):
+            # A very common case: the only rules are exact tag names.
+            names = set(cast(str, rule.string) for rule in self.name_rules)
+
+            def match_names(
+                nsprefix: Optional[str],
+                name: str,
+                attrs: Optional[_RawOrProcessedAttributeValues],
+                tag: Optional[Tag] = None,
+            ) -> bool:
+                if name in names:
+                    return True
+                return bool(nsprefix) and f"{nsprefix}:{name}" in names
+
+            return match_names
+
+        # Attributes that must be present (or absent) whatever their
+        # value are the cheapest thing to check, so they go first.
+        # Other attributes are checked in order of how expensive their
+        # rules are: exact values, then regular expressions, then
+        # functions.
+        required: List[str] = []
+        forbidden: List[str] = []
+        value_checks: List[Tuple[int, str, Callable[[Any], bool]]] = []
+        for attr, rules in self.attribute_rules.items():
+            presence = {rule.present for rule in rules}
+            if presence == {True}:
+                required.append(attr)
+            elif presence == {False}:
+                forbidden.append(attr)
+            else:
+                cost, check = self._compile_attribute_rules(rules)
+                value_checks.append((cost, attr, check))
+        value_checks.sort(key=lambda x: x[0])
+        checks = [(attr, check) for cost, attr, check in value_checks]
+        match_name = self._compile_name_rules(self.name_rules)
+
+        def match(
+            nsprefix: Optional[str],
+            name: str,
+            attrs: Optional[_RawOrProcessedAttributeValues],
+            tag: Optional[Tag] = None,
+        ) -> bool:
+            if tag is None and string_rules:
+                # The string rules can't be evaluated until the tag
+                # and all of its contents have been parsed.
+                return False
+            if attrs is None:
+                attrs = {}
+            for attr in required:
+                value = attrs.get(attr)
+                # An empty multi-valued attribute has no values to be
+                # present.
+                if value is None or value == []:
+                    return False
+            for attr in forbidden:
+                if attrs.get(attr) is not None:
+                    return False
+            if match_name is not None and not match_name(nsprefix, name, tag):
+                return False
+            for attr, check in checks:
+                if not check(attrs.get(attr)):
+                    return False
+            if tag is not None and string_rules:
+                _str = tag.string
+                if _str is None or not self.matches_any_string_rule(_str):
+                    return False
+            return True
+
+        return match
+
+    @classmethod
+    def _compile_name_rules(
+        cls, rules: List[TagNameMatchRule]
+    ) -> Optional[Callable[..., bool]]:
+        """Specialize a list of `TagNameMatchRule` into a function that
+        takes a namespace prefix, a tag name, and (possibly) a `Tag`.
+
+        :return: None if every tag name matches the rules.
+        """
+        if not rules or any(rule.present is True for rule in rules):
+            return None
+        names: Set[str] = set()
+        patterns: List[_RegularExpressionProtocol] = []
+        # A name function may be given either a Tag or a string.
+        functions: List[Callable[[Any], bool]] = []
+        for rule in rules:
+            if rule.string is not None:
+                names.add(rule.string)
+            elif rule.pattern is not None:
+                patterns.append(rule.pattern)
+            elif rule.function is not None:
+                functions.append(rule.function)
+        search = cls._compile_patterns(patterns)
+
+        def match_name(
+            nsprefix: Optional[str], name: str, tag: Optional[Tag] = None
+        ) -> bool:
+            if name in names:
+                return True
+            # The name can also be matched along with its prefix.
+            prefixed_name = f"{nsprefix}:{name}" if nsprefix else None
+            if prefixed_name is not None and prefixed_name in names:
+                return True
+            if search is not None and (
+                search(name) or (prefixed_name is not None and search(prefixed_name))
+            ):
+                return True
+            for function in functions:
+                # A name function is given the Tag itself, if there
+                # is one yet.
+                if function(name if tag is None else tag) or (
+                    prefixed_name is not None and function(prefixed_name)
+                ):
+                    return True
+            return False
+
+        return match_name
+
+    @classmethod
+    def _compile_attribute_rules(
+        cls, rules: List[AttributeValueMatchRule]
+    ) -> Tuple[int, Callable[[Optional[_AttributeValue]], bool]]:
+        """Specialize the `AttributeValueMatchRule` for one attribute
+        into a function that takes the attribute's value.
+
+        :return: A 2-tuple (cost, function). The cost is 0 if only
+            exact values need to be checked, 1 if there are regular
+            expressions and 2 if there are functions to call.
+        """
+        present = absent = False
+        strings: Set[str] = set()
+        patterns: List[_RegularExpressionProtocol] = []
+        functions: List[Callable[[Any], bool]] = []
+        for rule in rules:
+            if rule.present is True:
+                present = True
+            elif rule.present is False:
+                absent = True
+            elif rule.string is not None:
+                strings.add(rule.string)
+            elif rule.pattern is not None:
+                patterns.append(rule.pattern)
+            elif rule.function is not None:
+                functions.append(rule.function)
+        search = cls._compile_patterns(patterns)
+
+        # The values of a multi-valued attribute are also matched
+        # after being joined back together, but an exact value
+        # without a space can never match the joined string.
+        joined_strings = set(x for x in strings if " " in x)
+        check_joined = bool(joined_strings or search is not None or functions)
+
+        def check(value: Optional[_AttributeValue]) -> bool:
+            if value is None:
+                if absent:
+                    return True
+                for function in functions:
+                    if function(value):
+                        return True
+                return False
+            values: Sequence[str]
+            if isinstance(value, list):
+                if not value:
+                    return False
+                if present or not strings.isdisjoint(value):
+                    return True
+                values = value
+            else:
+                if present or value in strings:
+                    return True
+                values = (value,)
+            if search is not None:
+                for v in values:
+                    if search(v):
+                        return True
+            for function in functions:
+                for v in values:
+                    if function(v):
+                        return True
+            if check_joined and len(values) > 1:
+                joined = " ".join(values)
+                if joined in joined_strings:
+                    return True
+                if search is not None and search(joined):
+                    return True
+                for function in functions:
+                    if function(joined):
+                        return True
+            return False
+
+        return (2 if functions else 1 if patterns else 0), check
+
+    @classmethod
+    def _compile_patterns(
+        cls, patterns: List[_RegularExpressionProtocol]
+    ) -> Optional[Callable[[str], Any]]:
+        """Turn a list of regular expressions into a single search
+        function which returns a true value if any of them match.
+
+        When possible, the regular expressions are combined into one
+        big regular expression, so the string is only scanned once.
+        """
+        if not patterns:
+            return None
+        if len(patterns) > 1 and all(
+            isinstance(p, re.Pattern) and isinstance(p.pattern, str) and not p.groups
+            for p in patterns
+        ):
+            # A pattern with groups can't be combined with others,
+            # since that would renumber the groups and break any
+            # backreferences.
+            flags = set(cast(re.Pattern, p).flags for p in patterns)
+            if len(flags) == 1:
+                try:
+                    patterns = [
+                        re.compile(
+                            "|".join(
+                                "(?:%s)" % cast(re.Pattern, p).pattern for p in patterns
+                            ),
+                            flags.pop(),
+                        )
+                    ]
+                except re.error:
+                    # Inline flags, for instance, have to be at the
+                    # start of a regular expression.
+                    pass
+        if len(patterns) == 1:
+            return patterns[0].search
+
+        def search(string: str) -> bool:
+            for pattern in patterns:
+                if pattern.search(string) is not None:
+                    return True
+            return False
+
+        return search
+
+    def _tag_creation_function(self) -> _AllowTagCreationFunction:
+        ":meta private:"
+        if type(self).allow_tag_creation is not SoupStrainer.allow_tag_creation:
+            return self.allow_tag_creation
+        return self.compile()
+
+    def _tag_name_function(self) -> Optional[_TagNameFilterFunction]:
+        ":meta private:"
+        if (
+            type(self).allow_tag_creation is not SoupStrainer.allow_tag_creation
+            or self.string_rules
+        ):
+            return None
+        return self._compile_name_rules(self.name_rules)
+
+    @property
+    def _excludes_strings(self) -> bool:
+        ":meta private:"
+        if type(self).allow_string_creation is not SoupStrainer.allow_string_creation:
+            return False
+        # A SoupStrainer with name or attribute rules doesn't allow
+        # any strings.
+        return bool(self.name_rules or self.attribute_rules)
+
     @_deprecated("allow_tag_creation", "4.13.0")
     def search_tag(self, name: str, attrs: Optional[_RawAttributeValues]) -> bool:
         """A less elegant version of `allow_tag_creation`. Deprecated as of 4.13.0"""
@@ -714,65 +1057,293 @@ class SoupStrainer(ElementFilter):
         """
         return element if self.match(element) else None
 
+class AttributeTransform(object):
+    """A single change to be made to a tag's attributes while the tag
+    is being parsed. These are created and managed by a
+    `SoupReplacer`; you probably won't need to create one yourself.
+
+    :param action: One of `AttributeTransform.SET`,
+        `AttributeTransform.REPLACE` or `AttributeTransform.REMOVE`.
+    :param attribute: The name of the attribute to change.
+    :param value: The attribute's new value. Not used when removing
+        an attribute.
+    :param strainer: If present, only tags whose original name and
+        attributes match this `SoupStrainer` will be changed.
+    """
+
+    #: Give the attribute a value, whether or not it was already present.
+    SET: str = "set"
+
+    #: Give the attribute a new value, but only if it was already present.
+    REPLACE: str = "replace"
+
+    #: Remove the attribute.
+    REMOVE: str = "remove"
+
+    action: str
+    attribute: str
+    value: Optional[str]
+    strainer: Optional[SoupStrainer]
+
+    def __init__(
+        self,
+        action: str,
+        attribute: str,
+        value: Optional[str] = None,
+        strainer: Optional[SoupStrainer] = None,
+    ):
+        if action not in (self.SET, self.REPLACE, self.REMOVE):
+            raise ValueError(f"Unknown attribute transform: {action!r}")
+        if action != self.REMOVE and value is None:
+            raise ValueError(f"A value must be provided to {action} an attribute.")
+        self.action = action
+        self.attribute = attribute
+        self.value = value
+        self.strainer = strainer
+
+    def apply(self, tag_name: str, attrs: Dict[Any, Any]) -> None:
+        """Change a prospective tag's attributes in place.
+
+        :param tag_name: The name of the tag, as found in the markup.
+        :param attrs: The tag's attributes, as they came from the parser.
+        """
+        if self.strainer is not None and not self.strainer.allow_tag_creation(
+            None, tag_name, attrs
+        ):
+            return
+        if self.action == self.SET:
+            attrs[self.attribute] = self.value
+        elif self.action == self.REPLACE:
+            if self.attribute in attrs:
+                attrs[self.attribute] = self.value
+        else:
+            attrs.pop(self.attribute, None)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.action} {self.attribute!r}={self.value!r} strainer={self.strainer!r}>"
+
+
 class SoupReplacer:
-    """Tag replacement filter to be applied during parsing.
-    
+    """Rename tags and attributes while a document is being parsed.
+
     Similar to `SoupStrainer` which filters elements during parsing,
     `SoupReplacer` modifies tag names during parsing, avoiding the need
     to traverse the parse tree after parsing is complete.
-    
+
     A `SoupReplacer` can be passed to the `BeautifulSoup` constructor
-    as the `replacer` argument to replace all occurrences of one tag
-    type with another during the parsing process.
-    
+    as the `replacer` argument. Every tree builder consults it as
+    each tag is created.
+
     Example usage::
-    
+
         # Replace all <b> tags with <strong> during parsing
         replacer = SoupReplacer("b", "strong")
         soup = BeautifulSoup(html_doc, 'html.parser', replacer=replacer)
-        # All <b> tags are now <strong> tags in the parse tree
-        
-        # Replace all <i> tags with <em> during parsing
-        replacer = SoupReplacer("i", "em")
-        soup = BeautifulSoup(html_doc, 'html.parser', replacer=replacer)
-    
-    :param original_tag: The tag name to be replaced (e.g., "b")
-    :param replacement_tag: The tag name to use instead (e.g., "blockquote")
+
+        # Replace several kinds of tag at once, rename one attribute,
+        # and remove another.
+        replacer = SoupReplacer(
+            {"b": "strong", "i": "em"},
+            rename_attributes={"bgcolor": "data-bgcolor"},
+            drop_attributes=["style"],
+        )
+
+    You can also change attribute values as tags are parsed, instead
+    of looping over the tree afterwards::
+
+        replacer = SoupReplacer()
+        replacer.set_attribute("p", "class", "test")
+        replacer.remove_attribute(SoupStrainer("a", rel="nofollow"), "href")
+
+    All the rules are compiled into dictionaries when they're added,
+    so checking a tag costs one dictionary lookup no matter how many
+    rules there are. Rules are applied once: replacing "b" with "i"
+    and "i" with "em" turns <b> into <i>, not <em>. Attribute
+    transforms see tags under the names they have in the original
+    markup, and see attributes after they've been renamed.
+
+    :param original_tag: The tag name to be replaced (e.g., "b"), or
+        a dictionary mapping any number of tag names to their
+        replacements.
+    :param replacement_tag: The tag name to use instead (e.g.,
+        "blockquote"). Only used when ``original_tag`` is a single
+        tag name.
+    :param rename_attributes: A dictionary mapping attribute names to
+        the names they should be given instead.
+    :param drop_attributes: Attributes with these names will be
+        removed from every tag.
     """
-    
-    original_tag: str
-    replacement_tag: str
-    
-    def __init__(self, original_tag: str, replacement_tag: str):
-        """Create a SoupReplacer that replaces one tag type with another.
-        
-        :param original_tag: The tag name to be replaced (e.g., "b")
-        :param replacement_tag: The tag name to use instead (e.g., "blockquote")
-        """
-        self.original_tag = original_tag
-        self.replacement_tag = replacement_tag
-    
+
+    #: The tag name being replaced, if this `SoupReplacer` was created
+    #: with a single pair of tag names.
+    original_tag: Optional[str]
+
+    #: The replacement tag name, if this `SoupReplacer` was created
+    #: with a single pair of tag names.
+    replacement_tag: Optional[str]
+
+    #: Maps each tag name that needs to be replaced to its replacement.
+    tag_names: Dict[str, str]
+
+    #: Maps each attribute name that needs to be changed to its new
+    #: name, or to None if the attribute should be removed.
+    attribute_names: Dict[str, Optional[str]]
+
+    #: Maps tag names to the `AttributeTransform` objects that apply
+    #: to tags with that name.
+    attribute_transforms: Dict[str, List[AttributeTransform]]
+
+    #: `AttributeTransform` objects that have to be checked against
+    #: every tag, because they're not limited to one tag name.
+    general_attribute_transforms: List[AttributeTransform]
+
+    def __init__(
+        self,
+        original_tag: Optional[Union[str, Mapping[str, str]]] = None,
+        replacement_tag: Optional[str] = None,
+        rename_attributes: Optional[Mapping[str, str]] = None,
+        drop_attributes: Optional[Iterable[str]] = None,
+    ):
+        if isinstance(original_tag, str):
+            if replacement_tag is None:
+                raise ValueError(
+                    f"No replacement was provided for the tag name {original_tag!r}."
+                )
+            self.original_tag = original_tag
+            self.replacement_tag = replacement_tag
+            self.tag_names = {original_tag: replacement_tag}
+        else:
+            if replacement_tag is not None:
+                raise ValueError(
+                    "replacement_tag can only be used along with a single original_tag."
+                )
+            self.original_tag = self.replacement_tag = None
+            self.tag_names = dict(original_tag or {})
+
+        self.attribute_names = {}
+        if rename_attributes:
+            self.attribute_names.update(rename_attributes)
+        for name in drop_attributes or []:
+            self.attribute_names[name] = None
+        self.attribute_transforms = {}
+        self.general_attribute_transforms = []
+
+    def set_attribute(
+        self, tag: Union[str, SoupStrainer], attribute: str, value: str
+    ) -> None:
+        """Give an attribute a value on every matching tag, whether or
+        not the tag already had that attribute.
+
+        :param tag: A tag name, or a `SoupStrainer` that matches the
+            tags to be changed.
+        :param attribute: The name of the attribute.
+        :param value: The attribute's new value.
+        """
+        self.add_attribute_transform(
+            tag, AttributeTransform(AttributeTransform.SET, attribute, value)
+        )
+
+    def replace_attribute(
+        self, tag: Union[str, SoupStrainer], attribute: str, value: str
+    ) -> None:
+        """Change the value of an attribute on every matching tag that
+        already has that attribute.
+
+        :param tag: A tag name, or a `SoupStrainer` that matches the
+            tags to be changed.
+        :param attribute: The name of the attribute.
+        :param value: The attribute's new value.
+        """
+        self.add_attribute_transform(
+            tag, AttributeTransform(AttributeTransform.REPLACE, attribute, value)
+        )
+
+    def remove_attribute(self, tag: Union[str, SoupStrainer], attribute: str) -> None:
+        """Remove an attribute from every matching tag.
+
+        :param tag: A tag name, or a `SoupStrainer` that matches the
+            tags to be changed.
+        :param attribute: The name of the attribute.
+        """
+        self.add_attribute_transform(
+            tag, AttributeTransform(AttributeTransform.REMOVE, attribute)
+        )
+
+    def add_attribute_transform(
+        self, tag: Union[str, SoupStrainer], transform: AttributeTransform
+    ) -> None:
+        """Register an `AttributeTransform` to be applied to matching tags.
+
+        :param tag: A tag name, or a `SoupStrainer` that matches the
+            tags to be changed.
+        :param transform: The change to make.
+        """
+        if isinstance(tag, str):
+            self.attribute_transforms.setdefault(tag, []).append(transform)
+            return
+
+        transform.strainer = tag
+        if (
+            len(tag.name_rules) == 1
+            and tag.name_rules[0].string is not None
+            and not tag.string_rules
+        ):
+            # This SoupStrainer can only match one tag name, so there's
+            # no need to check it against every tag.
+            name = tag.name_rules[0].string
+            self.attribute_transforms.setdefault(name, []).append(transform)
+        else:
+            self.general_attribute_transforms.append(transform)
+
     def replace_if_needed(self, tag_name: str) -> str:
         """Check if a tag name should be replaced and return the appropriate name.
-        
+
         This method is called during parsing when the parser encounters a tag.
-        If the tag matches original_tag, it returns replacement_tag.
-        Otherwise, it returns the tag unchanged.
-        
+
         :param tag_name: The name of the tag being processed
-        :return: Either the replacement_tag (if matched) or the original tag_name
-        
+        :return: Either the replacement tag name (if there is one) or
+            the original ``tag_name``
+
         Example::
-        
+
             replacer = SoupReplacer("b", "strong")
             replacer.replace_if_needed("b")      # Returns "strong"
             replacer.replace_if_needed("i")      # Returns "i" (unchanged)
-            replacer.replace_if_needed("div")    # Returns "div" (unchanged)
         """
-        if tag_name == self.original_tag:
-            return self.replacement_tag
-        return tag_name
-    
+        return self.tag_names.get(tag_name, tag_name)
+
+    def replace_attributes(
+        self, attrs: _AttributeDictT, tag_name: Optional[str] = None
+    ) -> _AttributeDictT:
+        """Rename, remove or change attributes as a tag is being created.
+
+        :param attrs: The tag's attributes, as they came from the parser.
+        :param tag_name: The name of the tag, as found in the markup.
+            Attribute transforms are only applied if this is provided.
+        :return: A dictionary of the same type as ``attrs``. If no
+            attributes need to be renamed, this is ``attrs`` itself,
+            possibly modified in place by attribute transforms.
+        """
+        attribute_names = self.attribute_names
+        if attribute_names and not attribute_names.keys().isdisjoint(attrs):
+            new_attrs = type(attrs)()
+            for key, value in attrs.items():
+                new_key = attribute_names.get(key, key)
+                if new_key is not None:
+                    new_attrs[new_key] = value
+            attrs = new_attrs
+
+        if tag_name is not None:
+            transforms = self.attribute_transforms.get(tag_name)
+            if transforms is not None:
+                for transform in transforms:
+                    transform.apply(tag_name, attrs)
+            for transform in self.general_attribute_transforms:
+                transform.apply(tag_name, attrs)
+        return attrs
+
     def __repr__(self) -> str:
         """String representation for debugging."""
-        return f"<{self.__class__.__name__} '{self.original_tag}' -> '{self.replacement_tag}'>"
\ No newline at end of file
+        if self.original_tag is not None and not self.attribute_names:
+            return f"<{self.__class__.__name__} '{self.original_tag}' -> '{self.replacement_tag}'>"
+        return f"<{self.__class__.__name__} {self.tag_names!r} attributes={self.attribute_names!r}>"
@@ -63,6 +63,23 @@ class Formatter(EntitySubstitution):
     #: rendered this way.)
     empty_attributes_are_booleans: bool
 
+    #: The most attribute values `Formatter.attribute_value` will
+    #: remember the substituted version of.
+    #:
+    #: :meta private:
+    ATTRIBUTE_VALUE_CACHE_SIZE: int = 4096
+
+    #: The names of the `EntitySubstitution` methods that always give
+    #: the same output for the same input, so their output can be
+    #: cached.
+    #:
+    #: :meta private:
+    CACHEABLE_ENTITY_SUBSTITUTIONS: Set[str] = set(
+        ["substitute_html", "substitute_html5", "substitute_xml"]
+    )
+
+    _attribute_value_cache: Optional[Dict[str, str]] = None
+
     def _default(
         self, language: str, value: Optional[Set[str]], kwarg: str
     ) -> Set[str]:
@@ -117,6 +134,18 @@ class Formatter(EntitySubstitution):
         """
         self.language = language or self.HTML
         self.entity_substitution = entity_substitution
+        self._attribute_value_cache = None
+        owner = getattr(entity_substitution, "__self__", None)
+        if (
+            isinstance(owner, type)
+            and issubclass(owner, EntitySubstitution)
+            and getattr(entity_substitution, "__name__", None)
+            in self.CACHEABLE_ENTITY_SUBSTITUTIONS
+            and type(self).substitute is Formatter.substitute
+        ):
+            # Attribute values like class names and URL prefixes
+            # tend to be repeated many times in a document.
+            self._attribute_value_cache = {}
         self.void_element_close_prefix = void_element_close_prefix
         self.cdata_containing_tags = self._default(
             self.language, cdata_containing_tags, "cdata_containing_tags"
@@ -165,7 +194,16 @@ class Formatter(EntitySubstitution):
         :return: A string with certain characters replaced by named
            or numeric entities.
         """
-        return self.substitute(value)
+        cache = self._attribute_value_cache
+        if cache is None:
+            return self.substitute(value)
+        substituted = cache.get(value)
+        if substituted is None:
+            substituted = self.substitute(value)
+            if len(cache) >= self.ATTRIBUTE_VALUE_CACHE_SIZE:
+                cache.clear()
+            cache[value] = substituted
+        return substituted
 
     def attributes(
         self, tag: bs4.element.Tag
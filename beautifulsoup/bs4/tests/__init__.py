@@ -7,6 +7,7 @@ __license__ = "MIT"
 import pickle
 import importlib
 import copy
+import sys
 import warnings
 import pytest
 from bs4 import BeautifulSoup
@@ -22,7 +23,7 @@ from bs4.element import (
     Stylesheet,
     Tag,
 )
-from bs4.filter import SoupStrainer
+from bs4.filter import SoupReplacer, SoupStrainer
 from bs4.builder import (
     XMLParsedAsHTMLWarning,
 )
@@ -325,6 +326,35 @@ class TreeBuilderSmokeTest(SoupTest):
         soup = self.soup(markup, multi_valued_attributes=multi_valued_attributes)
         assert soup.a["class"] == ["a", "b", "c"]
 
+    def test_names_and_keys_are_interned(self):
+        # One root element, so the markup is also a valid XML document.
+        markup = (
+            '<root><a id="1" class="one two">1</a>'
+            '<a id="2" class="two one">2</a></root>'
+        )
+        # 'class' isn't multi-valued in XML unless we say so.
+        multi_valued_attributes = {"*": {"class"}}
+        soup = self.soup(markup, multi_valued_attributes=multi_valued_attributes)
+        a1, a2 = soup.find_all("a")
+        # The tag name is the same object as the string literal.
+        assert a1.name is a2.name is sys.intern("a")
+        key1 = [key for key in a1.attrs if key == "id"][0]
+        key2 = [key for key in a2.attrs if key == "id"][0]
+        assert key1 is key2
+
+        # By default, attribute values are left alone.
+        assert a1["class"][0] is not a2["class"][1]
+
+        soup = self.soup(
+            markup,
+            multi_valued_attributes=multi_valued_attributes,
+            intern_attribute_values=True,
+        )
+        a1, a2 = soup.find_all("a")
+        assert a1["class"] == ["one", "two"]
+        assert a1["class"][0] is a2["class"][1]
+        assert a1["class"][1] is a2["class"][0]
+
     def test_invalid_doctype(self):
         # We don't have an official opinion on how these are parsed,
         # but they shouldn't crash any of the parsers.
@@ -375,6 +405,31 @@ class TreeBuilderSmokeTest(SoupTest):
         assert isinstance(tag["attr2"], MyCustomAttributeValueList)
 
 
+    def test_replacer(self):
+        replacer = SoupReplacer(
+            {"b": "strong", "i": "em"},
+            rename_attributes={"data-old": "data-new"},
+            drop_attributes=["style"],
+        )
+        markup = '<p><b style="color: red" data-old="1">bold <i>it</i></b><br/></p>'
+        soup = self.soup(markup, replacer=replacer)
+        assert soup.b is None
+        assert soup.i is None
+        assert soup.strong.attrs == {"data-new": "1"}
+        assert soup.em.string == "it"
+        assert soup.em.parent is soup.strong
+        assert soup.br.parent is soup.p
+
+    def test_replacer_attribute_transforms(self):
+        replacer = SoupReplacer()
+        replacer.set_attribute("p", "class", "test")
+        replacer.remove_attribute("p", "id")
+        soup = self.soup('<p>1</p><p id="x" class="y">2</p>', replacer=replacer)
+        for p in soup.find_all("p"):
+            assert p.get_attribute_list("class") == ["test"]
+            assert "id" not in p.attrs
+
+
 class HTMLTreeBuilderSmokeTest(TreeBuilderSmokeTest):
     """A basic test of a treebuilder's competence.
 
@@ -1278,6 +1333,15 @@ class HTML5TreeBuilderSmokeTest(HTMLTreeBuilderSmokeTest):
         # XHTML documents in any particular way.
         pass
 
+    def test_replacer_with_misnested_formatting_elements(self):
+        # html5lib clones formatting elements to fix up misnested
+        # markup. It still needs to recognize them by their original
+        # names.
+        soup = self.soup("<b>1<p>2</b>3</p>", replacer=SoupReplacer("b", "strong"))
+        assert soup.body.decode() == (
+            "<body><strong>1</strong><p><strong>2</strong>3</p></body>"
+        )
+
     def test_html_tags_have_namespace(self):
         markup = "<a>"
         soup = self.soup(markup)
@@ -0,0 +1,176 @@
+"""Tests of bs4.batch."""
+
+import os
+
+import pytest
+
+from bs4 import BeautifulSoup
+from bs4.batch import (
+    BatchResult,
+    parse_many,
+)
+from bs4.dammit import EncodingCache
+from bs4.filter import SoupStrainer
+
+from . import SoupTest
+
+
+# Extraction functions are sent to worker processes, so they have to
+# be defined at the top level of a module.
+def title(soup):
+    return soup.title.string
+
+
+def link_count(soup):
+    return len(soup.find_all("a"))
+
+
+def unpicklable(soup):
+    return lambda: None
+
+
+def crash(soup):
+    if soup.find("crash") is not None:
+        # Kill the worker process outright, as if it had run out of
+        # memory.
+        os._exit(1)
+    return soup.title.string
+
+
+def second_paragraph(soup):
+    return soup.find_all("p")[1].string
+
+
+def original_encoding(soup):
+    return soup.original_encoding
+
+
+class TestParseMany(SoupTest):
+    def documents(self, count):
+        return [
+            b"<title>Doc %d</title>" % i + b"<a>link</a>" * i for i in range(count)
+        ]
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_results_in_order(self, workers):
+        results = list(
+            parse_many(
+                self.documents(7), "html.parser", extract=title, workers=workers
+            )
+        )
+        assert [r.index for r in results] == list(range(7))
+        assert [r.value for r in results] == ["Doc %d" % i for i in range(7)]
+        assert all(r.ok and r.source is None for r in results)
+
+    def test_unordered_results(self):
+        results = list(
+            parse_many(
+                self.documents(10),
+                "html.parser",
+                extract=link_count,
+                workers=2,
+                chunksize=3,
+                ordered=False,
+            )
+        )
+        assert sorted((r.index, r.value) for r in results) == [
+            (i, i) for i in range(10)
+        ]
+
+    def test_paths(self, tmp_path):
+        paths = []
+        for i, markup in enumerate(self.documents(3)):
+            path = tmp_path / f"{i}.html"
+            path.write_bytes(markup)
+            paths.append(path)
+        paths[1] = str(paths[1])
+        results = list(parse_many(paths, "html.parser", extract=title, workers=2))
+        assert [r.value for r in results] == ["Doc 0", "Doc 1", "Doc 2"]
+        assert [r.source for r in results] == [str(p) for p in paths]
+
+    def test_errors_do_not_stop_the_batch(self, tmp_path):
+        missing = str(tmp_path / "missing.html")
+        sources = [b"<title>a</title>", missing, b"<p>no title</p>", b"<title>b</title>"]
+        results = list(parse_many(sources, "html.parser", extract=title, workers=2))
+        assert [r.ok for r in results] == [True, False, False, True]
+        assert [r.value for r in results] == ["a", None, None, "b"]
+        assert isinstance(results[1].error, FileNotFoundError)
+        assert results[1].source == missing
+        assert isinstance(results[2].error, AttributeError)
+        assert "error=" in repr(results[2])
+
+    def test_worker_crash_does_not_stop_the_batch(self):
+        sources = [b"<title>before</title>", b"<crash>"] + [
+            b"<title>after %d</title>" % i for i in range(6)
+        ]
+        results = list(parse_many(sources, "html.parser", extract=crash, workers=1))
+        assert [r.index for r in results] == list(range(8))
+        assert results[0].value == "before"
+        assert not results[1].ok
+        # Once the pool has been replaced, documents are parsed again.
+        assert results[-1].value == "after 5"
+
+    def test_file_encoding_changes_after_first_chunk(self, tmp_path):
+        # A file is decoded the same way as the equivalent bytestring,
+        # even if it's too big to sniff its encoding from the first
+        # chunk.
+        markup = b"<p>" + b"a" * 70000 + b"</p><p>caf\xe9</p>"
+        path = tmp_path / "doc.html"
+        path.write_bytes(markup)
+        results = list(
+            parse_many(
+                [path, markup], "html.parser", extract=second_paragraph, workers=0
+            )
+        )
+        assert ["caf\xe9", "caf\xe9"] == [r.value for r in results]
+
+    def test_unpicklable_value(self):
+        [result] = list(
+            parse_many([b"<p>"], "html.parser", extract=unpicklable, workers=1)
+        )
+        assert not result.ok
+        assert result.index == 0
+
+    def test_no_extraction_function(self):
+        [result] = list(parse_many([b"<p>hi</p>"], "html.parser", workers=1))
+        assert isinstance(result.value, BeautifulSoup)
+        assert result.value.p.string == "hi"
+
+    def test_constructor_arguments(self):
+        [result] = list(
+            parse_many(
+                [b"<p>hi</p><b>there</b>"],
+                "html.parser",
+                extract=str,
+                workers=0,
+                parse_only=SoupStrainer("b"),
+            )
+        )
+        assert result.value == "<b>there</b>"
+
+    def test_encoding_cache(self):
+        # The cache is sent to the worker processes along with the
+        # other TreeBuilder arguments.
+        cache = EncodingCache()
+        cache.set("example.com", "euc-jp")
+        results = parse_many(
+            [b"<p>hello</p>"],
+            "html.parser",
+            extract=original_encoding,
+            workers=1,
+            encoding_cache=cache,
+            cache_key="example.com",
+            sniff_limit=1000,
+        )
+        assert [result.value for result in results] == ["euc-jp"]
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError):
+            list(parse_many([], chunksize=0))
+        with pytest.raises(ValueError):
+            list(parse_many([], workers=-1))
+
+    def test_batch_result(self):
+        result = BatchResult(3, "a.html", value=[1])
+        assert result.ok
+        assert repr(result) == "<BatchResult index=3 source='a.html' value=[1]>"
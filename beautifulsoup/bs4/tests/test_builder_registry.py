@@ -1,15 +1,27 @@
 """Tests of the builder registry."""
 
+import importlib
+import io
+import os
 import pytest
+import subprocess
+import sys
+import types
 import warnings
 from typing import Type
 
+import bs4.builder
 from bs4 import BeautifulSoup
 from bs4.builder import (
+    DEFERRED_BUILDER_MODULES,
+    HTML,
+    XML,
     builder_registry as registry,
+    sniff_markup_type,
     TreeBuilder,
     TreeBuilderRegistry,
 )
+from bs4._warnings import GuessedAtParserWarning
 from bs4.builder._htmlparser import HTMLParserTreeBuilder
 
 from . import (
@@ -76,6 +88,64 @@ class TestBuiltInRegistry(object):
         with pytest.raises(ValueError):
             BeautifulSoup("", features="no-such-feature")
 
+    @pytest.mark.parametrize("features", ["fastest", "auto", ["fastest"]])
+    def test_beautifulsoup_constructor_chooses_fastest_builder(self, features):
+        html = "<!DOCTYPE html><p>text</p>"
+        xml = '<?xml version="1.0"?><root><item/></root>'
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            soup = BeautifulSoup(html, features)
+            assert type(soup.builder) is registry.fastest(html)
+            assert soup.p.string == "text"
+
+            # A file is read in so it can be examined.
+            soup = BeautifulSoup(io.StringIO(xml), features)
+            assert type(soup.builder) is registry.fastest(xml)
+            assert soup.find("item") is not None
+
+        # The user asked Beautiful Soup to choose a parser, so there's
+        # no warning about having had to guess.
+        assert not any(issubclass(x.category, GuessedAtParserWarning) for x in w)
+
+    def test_fastest(self):
+        if LXML_PRESENT:
+            assert registry.fastest("<p>") is LXMLTreeBuilder
+            assert registry.fastest("<?xml version='1.0'?><a/>") is LXMLTreeBuilderForXML
+        else:
+            # With no XML parser installed, even XML gets an HTML parser.
+            assert registry.fastest("<p>") is HTMLParserTreeBuilder
+            assert registry.fastest("<?xml version='1.0'?><a/>") is HTMLParserTreeBuilder
+
+    @pytest.mark.parametrize("module_name", sorted(DEFERRED_BUILDER_MODULES))
+    def test_deferred_features_match_builders(self, module_name):
+        # The features given when the lxml and html5lib builders are
+        # registered must match the builders' actual features.
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            pytest.skip(f"{module_name} can't be imported")
+        features = set()
+        for name in module.__all__:
+            features.update(getattr(module, name).features)
+        assert features == set(DEFERRED_BUILDER_MODULES[module_name])
+
+    def test_third_party_builders_not_imported_with_bs4(self):
+        code = (
+            "import sys, bs4\n"
+            "bs4.BeautifulSoup('<p>', 'html.parser')\n"
+            "for m in ('bs4.builder._lxml', 'bs4.builder._html5lib', 'soupsieve'):\n"
+            "    assert m not in sys.modules, m\n"
+            "from bs4.dammit import EntitySubstitution, _EntityTable\n"
+            "assert isinstance(\n"
+            "    EntitySubstitution.__dict__['CHARACTER_TO_HTML_ENTITY'], _EntityTable\n"
+            ")\n"
+        )
+        subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(bs4.__file__)),
+        )
+
 
 class TestRegistry(object):
     """Test the TreeBuilderRegistry class in general."""
@@ -137,3 +207,103 @@ class TestRegistry(object):
         self.builder_for_features("foo", "bar")
         self.builder_for_features("foo", "baz")
         assert self.registry.lookup("bar", "baz") is None
+
+    def test_register_deferred(self, monkeypatch):
+        class DeferredBuilder(TreeBuilder):
+            features = ["deferred", "foo"]
+
+        module = types.ModuleType("deferred_builders")
+        module.DeferredBuilder = DeferredBuilder
+        module.__all__ = ["DeferredBuilder"]
+        monkeypatch.setitem(sys.modules, "deferred_builders", module)
+        # Imported builders are copied into bs4.builder.
+        monkeypatch.setattr(bs4.builder, "__all__", list(bs4.builder.__all__))
+
+        early = self.builder_for_features("foo", "early")
+        self.registry.register_deferred("deferred_builders", ["deferred", "foo"])
+        self.registry.register_deferred("no_such_module", ["foo", "missing"])
+        late = self.builder_for_features("foo", "late")
+
+        # Looking up a feature the deferred modules don't have
+        # doesn't import them.
+        tables = self.registry._builders, self.registry._builders_for_feature
+        assert self.registry.lookup("early") is early
+        assert len(self.registry._deferred) == 2
+        # ...and leaves the lookup tables alone.
+        assert self.registry._builders is tables[0]
+
+        # Once it's imported, the deferred builder has the priority
+        # it would have had if it had been registered right away.
+        assert self.registry.lookup("foo") is late
+        assert self.registry._deferred == []
+        # The tables were rebuilt off to the side and swapped in.
+        assert self.registry._builders is not tables[0]
+        assert tables[0] == [late, early]
+        assert self.registry.builders == [late, DeferredBuilder, early]
+        assert self.registry.lookup("deferred") is DeferredBuilder
+
+        # A module that can't be imported is ignored.
+        assert self.registry.lookup("missing") is None
+
+        assert bs4.builder.DeferredBuilder is DeferredBuilder
+        del bs4.builder.DeferredBuilder
+
+    def test_fastest(self):
+        def builder(name, *features):
+            cls = type(name, (TreeBuilder,), {"NAME": name, "features": features})
+            self.registry.register(cls)
+            return cls
+
+        assert self.registry.fastest("<p>") is None
+
+        slow = builder("slow", HTML)
+        fast = builder("fast", HTML)
+        xml = builder("xml", XML)
+        self.registry.throughput.update(slow=10, fast=100, xml=1)
+        assert self.registry.fastest("<p>") is fast
+        assert self.registry.fastest() is fast
+
+        # An XML document goes to an XML parser, even a slow one.
+        assert self.registry.fastest("<?xml version='1.0'?><a/>") is xml
+
+        # Recorded speeds replace earlier ones.
+        self.registry.record_throughput(dict(slow=1000))
+        assert self.registry.fastest("<p>") is slow
+
+        # A builder with no recorded speed is a last resort.
+        builder("unknown", HTML)
+        assert self.registry.fastest("<p>") is slow
+
+    def test_fastest_falls_back_to_html(self):
+        html = type("html", (TreeBuilder,), {"NAME": "html", "features": [HTML]})
+        self.registry.register(html)
+        assert self.registry.fastest("<?xml version='1.0'?><a/>") is html
+
+
+@pytest.mark.parametrize(
+    "markup,markup_type",
+    [
+        ("<p>Some HTML", HTML),
+        ("", HTML),
+        ("plain text", HTML),
+        ("<!DOCTYPE html><html>", HTML),
+        ("<!doctype HTML>", HTML),
+        ('<?xml version="1.0"?><rss version="2.0">', XML),
+        ('<?xml version="1.0"?>', XML),
+        ('<?xml version="1.0"?>\n<!-- <html> --><feed>', XML),
+        ('<?xml version="1.0"?><html xmlns="http://www.w3.org/1999/xhtml">', HTML),
+        (
+            '<?xml version="1.0"?><!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN">',
+            HTML,
+        ),
+        ('<!DOCTYPE note SYSTEM "Note.dtd"><note>', XML),
+        ("  \n<rss>", HTML),
+        (b'<?xml version="1.0"?><root>', XML),
+        (b"\xef\xbb\xbf<?xml version='1.0'?><root>", XML),
+        ("\ufeff<?xml version='1.0'?><root>", XML),
+        ('<?xml version="1.0"?><a>'.encode("utf-16"), XML),
+        (b"<html><body>", HTML),
+    ],
+)
+def test_sniff_markup_type(markup, markup_type):
+    assert sniff_markup_type(markup) == markup_type
@@ -1,10 +1,13 @@
 # encoding: utf-8
+import pickle
 import pytest
+from io import BytesIO
 import logging
 import warnings
 import bs4
 from bs4 import BeautifulSoup
 from bs4.dammit import (
+    EncodingCache,
     EntitySubstitution,
     EncodingDetector,
     UnicodeDammit,
@@ -238,6 +241,47 @@ class TestEncodingDetector(object):
             output = UnicodeDammit.detwingle(input)
             assert output == input
 
+    def test_detwingle_leaves_truncated_multibyte_character_alone(self):
+        # A UTF-8 character that's cut off by the end of the document
+        # isn't mistaken for Windows-1252.
+        for partial in (b"\xe2", b"\xe2\x98", b"\xf0\x9f\x98"):
+            doc = b"\x93Hi" + partial
+            assert UnicodeDammit.detwingle(doc) == b"\xe2\x80\x9cHi" + partial
+
+    def test_detwingle_ascii_is_unchanged(self):
+        doc = b"<html>nothing to fix</html>"
+        assert UnicodeDammit.detwingle(doc) is doc
+
+    def test_detwingle_unsupported_encodings(self):
+        with pytest.raises(NotImplementedError):
+            UnicodeDammit.detwingle(b"", embedded_encoding="iso-8859-2")
+        with pytest.raises(NotImplementedError):
+            UnicodeDammit.detwingle(b"", main_encoding="utf-16")
+        with pytest.raises(NotImplementedError):
+            list(UnicodeDammit.detwingle_stream([b""], main_encoding="utf-16"))
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 1000])
+    def test_detwingle_stream(self, chunk_size):
+        snowmen = ("\N{SNOWMAN}" * 3).encode("utf8")
+        quoted = "\N{LEFT DOUBLE QUOTATION MARK}Hi\N{RIGHT DOUBLE QUOTATION MARK}"
+        doc = snowmen + quoted.encode("windows_1252") + snowmen + b"\xf0\x9f\x98\x80"
+        expect = UnicodeDammit.detwingle(doc)
+        assert expect.decode("utf8") == "☃☃☃“Hi”☃☃☃\N{GRINNING FACE}"
+
+        # Multibyte characters split across chunks are handled
+        # correctly, whether the chunks come from a file...
+        fixed = UnicodeDammit.detwingle_stream(BytesIO(doc), chunk_size=chunk_size)
+        assert b"".join(fixed) == expect
+
+        # ...or any other iterable.
+        chunks = [doc[i : i + chunk_size] for i in range(0, len(doc), chunk_size)]
+        assert b"".join(UnicodeDammit.detwingle_stream(chunks)) == expect
+
+    def test_detwingle_stream_truncated_document(self):
+        chunks = [b"\x93Hi\xe2", b"\x98"]
+        fixed = b"".join(UnicodeDammit.detwingle_stream(chunks))
+        assert fixed == b"\xe2\x80\x9cHi\xe2\x98"
+
     def test_find_declared_encoding(self):
         # Test our ability to find a declared encoding inside an
         # XML or HTML document.
@@ -280,6 +324,130 @@ class TestEncodingDetector(object):
         assert m(b"a" + xml_bytes, search_entire_document=True) is None
 
 
+    def test_sniff_limit(self, monkeypatch):
+        seen = []
+
+        def fake_chardet(data):
+            seen.append(data)
+            return None
+
+        monkeypatch.setattr(bs4.dammit, "_chardet_dammit", fake_chardet)
+        data = b" " * 10000 + b'<meta charset="euc-jp">'
+
+        # By default, chardet sees the whole document.
+        detector = EncodingDetector(data, is_html=True)
+        assert list(detector.encodings) == ["utf-8", "windows-1252"]
+        assert seen == [data]
+
+        # With a sniff limit, chardet and the search for a declared
+        # encoding only see the start of the document.
+        del seen[:]
+        detector = EncodingDetector(data, is_html=True, sniff_limit=1000)
+        assert list(detector.encodings) == ["utf-8", "windows-1252"]
+        assert seen == [data[:1000]]
+
+        # An encoding declared near the start is still found.
+        data = data[10000:] + data[:10000]
+        dammit = UnicodeDammit(data, is_html=True, sniff_limit=1000)
+        assert dammit.original_encoding == "euc-jp"
+
+    def test_wrong_encoding_fails_on_prefix(self, monkeypatch):
+        # A large document whose first few bytes can't be decoded
+        # with an encoding doesn't get decoded in full.
+        decoded = []
+        original_to_unicode = UnicodeDammit._to_unicode
+
+        def to_unicode(self, data, encoding, errors="strict"):
+            decoded.append(encoding)
+            return original_to_unicode(self, data, encoding, errors)
+
+        monkeypatch.setattr(UnicodeDammit, "_to_unicode", to_unicode)
+        data = "\N{SNOWMAN}".encode("utf8") * 100000
+        dammit = UnicodeDammit(data, known_definite_encodings=["ascii"])
+        assert dammit.original_encoding == "utf-8"
+        assert dammit.unicode_markup == "\N{SNOWMAN}" * 100000
+        assert ("ascii", "strict") in dammit.tried_encodings
+        assert decoded == ["utf-8"]
+
+        # A document that goes bad after the prefix is still
+        # rejected.
+        del decoded[:]
+        data = b"a" * 100000 + "\N{SNOWMAN}".encode("utf8")
+        dammit = UnicodeDammit(data, known_definite_encodings=["ascii"])
+        assert dammit.original_encoding == "utf-8"
+        assert decoded == ["ascii", "utf-8"]
+
+
+class TestEncodingCache(object):
+    def test_cached_encoding_is_tried_first(self):
+        cache = EncodingCache()
+        data = '<meta charset="utf-8"><p>Sacr\N{LATIN SMALL LETTER E WITH ACUTE}</p>'
+        latin1 = data.encode("latin-1")
+
+        # The first time, the encoding is detected and remembered.
+        dammit = UnicodeDammit(
+            latin1, is_html=True, encoding_cache=cache, cache_key="example.com"
+        )
+        assert dammit.original_encoding == "windows-1252"
+        assert cache.get("example.com") == "windows-1252"
+
+        # The next time, it's tried first.
+        dammit = UnicodeDammit(
+            latin1, is_html=True, encoding_cache=cache, cache_key="example.com"
+        )
+        assert dammit.original_encoding == "windows-1252"
+        assert dammit.tried_encodings == [("windows-1252", "strict")]
+
+        # A known definite encoding still takes priority.
+        dammit = UnicodeDammit(
+            data.encode("utf8"),
+            known_definite_encodings=["utf-8"],
+            encoding_cache=cache,
+            cache_key="example.com",
+        )
+        assert dammit.original_encoding == "utf-8"
+        assert cache.get("example.com") == "utf-8"
+
+        # Without a cache key, the cache isn't used.
+        UnicodeDammit(latin1, encoding_cache=cache)
+        assert len(cache) == 1
+
+    def test_cached_encoding_that_fails_is_replaced(self):
+        cache = EncodingCache()
+        cache.set("example.com", "ascii")
+        data = "\N{SNOWMAN}".encode("utf8")
+        dammit = UnicodeDammit(data, encoding_cache=cache, cache_key="example.com")
+        assert dammit.original_encoding == "utf-8"
+        assert dammit.tried_encodings[0] == ("ascii", "strict")
+        assert cache.get("example.com") == "utf-8"
+
+    def test_least_recently_used_source_is_forgotten(self):
+        cache = EncodingCache(maxsize=2)
+        cache.set("a", "utf-8")
+        cache.set("b", "utf-8")
+        assert cache.get("a") == "utf-8"
+        cache.set("c", "euc-jp")
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.get("b") is None
+        cache.discard("a")
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
+
+        with pytest.raises(ValueError):
+            EncodingCache(maxsize=0)
+
+    def test_pickle(self):
+        cache = EncodingCache(maxsize=2)
+        cache.set("a", "utf-8")
+        copy = pickle.loads(pickle.dumps(cache))
+        assert copy.maxsize == 2
+        assert copy.get("a") == "utf-8"
+        copy.set("b", "euc-jp")
+        assert "b" not in cache
+
+
 class TestEntitySubstitution(object):
     """Standalone tests of the EntitySubstitution class."""
 
@@ -300,6 +468,32 @@ class TestEntitySubstitution(object):
     def test_substitute_html(self, original, substituted):
         assert self.sub.substitute_html(original) == substituted
 
+    @pytest.mark.parametrize(
+        "s",
+        [
+            "",
+            "plain text",
+            "a < b > c",
+            "AT&T",
+            "&amp; &lt; &#123; &#x7b; &nosuchentity;",
+            "<<&&>>",
+        ],
+    )
+    def test_ascii_fast_path(self, s):
+        # ASCII strings don't go through the big regular expressions,
+        # but the results are the same as if they had.
+        assert self.sub.substitute_html(s) == (
+            self.sub.CHARACTER_TO_HTML_ENTITY_WITH_AMPERSAND_RE.sub(
+                self.sub._substitute_html_entity, s
+            )
+        )
+        escaped = self.sub.ANY_ENTITY_RE.sub(self.sub._escape_entity_name, s)
+        assert self.sub.substitute_html5(s) == (
+            self.sub.CHARACTER_TO_HTML_ENTITY_RE.sub(
+                self.sub._substitute_html_entity, escaped
+            )
+        )
+
     def test_html5_entity(self):
         for entity, u in (
             # A few spot checks of our ability to recognize
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 import re
 import warnings
@@ -12,9 +13,11 @@ from typing import (
 )
 from bs4.element import Tag
 from bs4.filter import (
+    AttributeTransform,
     AttributeValueMatchRule,
     ElementFilter,
     MatchRule,
+    SoupReplacer,
     SoupStrainer,
     StringMatchRule,
     TagNameMatchRule,
@@ -460,6 +463,13 @@ class TestSoupStrainer(SoupTest):
         tag = Tag(prefix=prefix, name=name, attrs=attrs)
         if string:
             tag.string = string
+
+        # The compiled version of the SoupStrainer must agree with both.
+        compiled = strainer.compile()
+        assert compiled(prefix, name, attrs, tag) == strainer.matches_tag(tag)
+        assert compiled(prefix, name, attrs) == strainer.allow_tag_creation(
+            prefix, name, attrs
+        )
         return strainer.matches_tag(tag) and strainer.allow_tag_creation(
             prefix, name, attrs
         )
@@ -576,6 +586,159 @@ class TestSoupStrainer(SoupTest):
             string=["Wrong string", "Also wrong", re.compile("string")],
         ).matches_tag(tag)
 
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            dict(name="b"),
+            dict(name=["a", "b", "ns:c"]),
+            dict(name=[re.compile("^b"), re.compile("c$")]),
+            dict(name=[re.compile("(b)\\1"), re.compile("c")]),
+            dict(name=[re.compile("B", re.I), re.compile("^c")]),
+            dict(name=lambda x: isinstance(x, Tag) and x.name == "c"),
+            dict(name=lambda x: x == "ns:c"),
+            dict(name=True),
+            dict(name=False),
+            dict(id=True),
+            dict(id=False),
+            dict(id=[True, "2"]),
+            dict(id=[False, re.compile("2")]),
+            dict(id=None),
+            dict(class_="x"),
+            dict(class_="x y"),
+            dict(class_=["y x", "z"]),
+            dict(class_=re.compile("^x y$")),
+            dict(class_=[re.compile("^z"), re.compile("y$")]),
+            dict(class_=lambda x: x is None),
+            dict(class_=lambda x: x is not None and len(x) > 3),
+            dict(class_=True),
+            dict(name="b", id="1", class_=["x", "nope"]),
+            dict(name="c", string="text"),
+            dict(string="text"),
+            dict(),
+        ],
+    )
+    def test_compile(self, kwargs):
+        # The function returned by compile() gives the same answers as
+        # matches_tag() and allow_tag_creation().
+        strainer = SoupStrainer(**kwargs)
+        match = strainer.compile()
+        tags = [
+            Tag(name="b", attrs={"id": "1", "class": ["x", "y"]}),
+            Tag(name="bb", attrs={"class": ["x"]}),
+            Tag(name="c", prefix="ns", attrs={"id": "2", "class": []}),
+            Tag(name="c", attrs={"class": "x y", "data": "1"}),
+            Tag(name="d", attrs={"class": ["z", "x y"]}),
+        ]
+        tags[2].string = "text"
+        for tag in tags:
+            assert match(tag.prefix, tag.name, tag.attrs, tag) == strainer.matches_tag(
+                tag
+            )
+            assert match(tag.prefix, tag.name, tag.attrs) == strainer.allow_tag_creation(
+                tag.prefix, tag.name, tag.attrs
+            )
+        assert match(None, "b", None) == strainer.allow_tag_creation(None, "b", None)
+
+    def test_compile_combines_regular_expressions(self):
+        # Regular expressions are combined when it's safe, and checked
+        # one at a time when it's not.
+        search = SoupStrainer._compile_patterns(
+            [re.compile("^a"), re.compile("b$")]
+        )
+        assert search.__self__.pattern == "(?:^a)|(?:b$)"
+        assert search("ax") and search("xb") and not search("xa")
+
+        for patterns in (
+            [re.compile("(a)\\1"), re.compile("b")],
+            [re.compile("a"), re.compile("b", re.I)],
+            [re.compile("a"), re.compile("(?i)b")],
+        ):
+            search = SoupStrainer._compile_patterns(patterns)
+            assert not hasattr(search, "__self__")
+            assert search("aa") and search("b") and not search("c")
+        assert search("B")
+
+    def test_compiled_strainer_does_not_see_new_rules(self):
+        strainer = SoupStrainer("a")
+        match = strainer.compile()
+        strainer.name_rules.append(TagNameMatchRule(string="b"))
+        assert not match(None, "b", {})
+        assert strainer.compile()(None, "b", {})
+
+    def test_find_all_uses_compiled_strainer(self):
+        soup = self.soup('<a class="x y">1</a><b class="x">2</b><c>3</c>')
+        strainer = SoupStrainer(class_=["x y", "z"])
+        assert [tag.name for tag in soup.find_all(strainer)] == ["a"]
+        assert [x for x in strainer.filter(soup.descendants)] == [soup.a]
+
+        # A SoupStrainer with only string rules still matches strings.
+        assert soup.find_all(SoupStrainer(string=["1", "3"])) == ["1", "3"]
+
+        # A subclass that defines its own match() is respected.
+        class MyStrainer(SoupStrainer):
+            def match(self, element):
+                return element.name == "c"
+
+        assert soup.find_all(MyStrainer("a")) == [soup.c]
+
+    def test_parse_only_uses_compiled_strainer(self):
+        markup = '<a class="x y">1</a><b class="x">2</b><c id="3">3</c>'
+        soup = self.soup(markup, parse_only=SoupStrainer(["a", re.compile("^c")]))
+        assert soup.decode() == '<a class="x y">1</a><c id="3">3</c>'
+
+        # The compiled SoupStrainer isn't pickled along with the tree.
+        assert pickle.loads(pickle.dumps(soup)).decode() == soup.decode()
+
+        # A subclass that defines its own allow_tag_creation() is respected.
+        class MyStrainer(SoupStrainer):
+            def allow_tag_creation(self, nsprefix, name, attrs):
+                return name == "b"
+
+        soup = self.soup(markup, parse_only=MyStrainer("a"))
+        assert soup.decode() == '<b class="x">2</b>'
+
+    @pytest.mark.parametrize(
+        "strainer",
+        [
+            SoupStrainer("b"),
+            SoupStrainer(["b", "i"], id=True),
+            SoupStrainer(re.compile("^[bi]$")),
+            SoupStrainer(class_="x"),
+            SoupStrainer(string=re.compile("e")),
+        ],
+    )
+    def test_parse_only_skipping(self, strainer):
+        # When parse_only is set, strings, character references and
+        # tags outside of any allowed tag are thrown away as early as
+        # possible. The result is the same as if each one had been
+        # checked.
+        class CheckEverything(ElementFilter):
+            def allow_tag_creation(self, nsprefix, name, attrs):
+                return strainer.allow_tag_creation(nsprefix, name, attrs)
+
+            def allow_string_creation(self, string):
+                return strainer.allow_string_creation(string)
+
+        markup = """<!DOCTYPE html><html><head><title>one &amp; two</title></head>
+<body>&#147;quoted&#148; <!-- a comment --> <br>
+<p class="x">Some <b id="1">bold &eacute; text</b> and <i>italic</i>.</p>
+<div><b>nested <i>deeply</i></b><br/></div>tail</body></html>"""
+        expect = self.soup(markup, parse_only=CheckEverything())
+        soup = self.soup(markup, parse_only=strainer)
+        assert soup.decode() == expect.decode()
+        assert [str(x) for x in soup.contents] == [str(x) for x in expect.contents]
+
+    def test_parse_only_skipping_respects_subclasses(self):
+        # If a subclass allows strings that the SoupStrainer would
+        # have rejected, they're not thrown away early.
+        class KeepStrings(SoupStrainer):
+            def allow_string_creation(self, string):
+                return True
+
+        soup = self.soup("x<i>y</i>z<b>w</b>", parse_only=KeepStrings("b"))
+        assert soup.decode() == "xyz<b>w</b>"
+        assert soup.contents[:3] == ["x", "y", "z"]
+
     def test_allowing_tag_implies_allowing_its_contents(self):
         markup = "<a><b>one string<div>another string</div></b></a>"
 
@@ -655,3 +818,82 @@ and they lived at the bottom of a well.</p>
         )
         string_soup = self.soup(html_doc, parse_only=only_short_strings)
         assert "\n\n\nElsie,\nLacie and\nTillie\n...\n" == string_soup.decode()
+
+
+class TestSoupReplacer(SoupTest):
+    def test_single_pair(self):
+        replacer = SoupReplacer("b", "strong")
+        assert replacer.original_tag == "b"
+        assert replacer.replacement_tag == "strong"
+        assert replacer.tag_names == {"b": "strong"}
+        assert replacer.replace_if_needed("b") == "strong"
+        assert replacer.replace_if_needed("i") == "i"
+        assert repr(replacer) == "<SoupReplacer 'b' -> 'strong'>"
+
+    def test_mapping(self):
+        replacer = SoupReplacer({"b": "i", "i": "em"})
+        assert replacer.original_tag is None
+        assert replacer.replacement_tag is None
+        # Rules aren't chained.
+        assert replacer.replace_if_needed("b") == "i"
+        assert replacer.replace_if_needed("i") == "em"
+        assert replacer.replace_if_needed("p") == "p"
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError):
+            SoupReplacer("b")
+        with pytest.raises(ValueError):
+            SoupReplacer({"b": "strong"}, "em")
+
+    def test_replace_attributes(self):
+        replacer = SoupReplacer(
+            rename_attributes={"a": "b"}, drop_attributes=["c", "d"]
+        )
+        assert replacer.attribute_names == {"a": "b", "c": None, "d": None}
+        attrs = {"x": "1", "a": "2", "c": "3"}
+        assert replacer.replace_attributes(attrs) == {"x": "1", "b": "2"}
+        # The original dictionary is untouched.
+        assert attrs == {"x": "1", "a": "2", "c": "3"}
+
+        # If nothing needs to change, the same dictionary is returned.
+        untouched = {"x": "1"}
+        assert replacer.replace_attributes(untouched) is untouched
+
+    def test_parse_time_replacement(self):
+        replacer = SoupReplacer({"b": "i", "i": "em"})
+        soup = self.soup("<b>1</b><i>2</i><b/>", replacer=replacer)
+        assert soup.decode() == "<i>1</i><em>2</em><i></i>"
+
+    def test_attribute_transforms(self):
+        replacer = SoupReplacer()
+        replacer.set_attribute("p", "class", "test")
+        replacer.replace_attribute("a", "href", "#")
+        replacer.remove_attribute(SoupStrainer("img", alt="x"), "src")
+
+        # Transforms are indexed by tag name.
+        assert list(replacer.attribute_transforms) == ["p", "a", "img"]
+        assert replacer.general_attribute_transforms == []
+
+        markup = (
+            '<p>1</p><p class="a b">2</p><a>3</a><a href="/">4</a>'
+            '<img alt="x" src="1"/><img alt="y" src="2"/>'
+        )
+        soup = self.soup(markup, replacer=replacer)
+        # The new class value is split into a list like any other.
+        assert [p["class"] for p in soup.find_all("p")] == [["test"], ["test"]]
+        assert [a.get("href") for a in soup.find_all("a")] == [None, "#"]
+        assert [i.get("src") for i in soup.find_all("img")] == [None, "2"]
+
+    def test_attribute_transform_matching_any_tag(self):
+        replacer = SoupReplacer({"b": "strong"})
+        replacer.set_attribute(SoupStrainer(["b", "i"]), "data-x", "1")
+        assert len(replacer.general_attribute_transforms) == 1
+        soup = self.soup("<b>1</b><i>2</i><u>3</u>", replacer=replacer)
+        # The transform matches the tag's original name.
+        assert soup.decode() == '<strong data-x="1">1</strong><i data-x="1">2</i><u>3</u>'
+
+    def test_bad_attribute_transform(self):
+        with pytest.raises(ValueError):
+            AttributeTransform("frobnicate", "class", "x")
+        with pytest.raises(ValueError):
+            AttributeTransform(AttributeTransform.SET, "class")
@@ -131,6 +131,37 @@ class TestFormatter(SoupTest):
         assert HTMLFormatter.REGISTRY["html5"].substitute(s) == expect_html5
         assert HTMLFormatter.REGISTRY["html5-4.12"].substitute(s) == expect_html
 
+    def test_attribute_value_cache(self):
+        formatter = HTMLFormatter(entity_substitution=HTMLFormatter.substitute_html)
+        assert formatter.attribute_value("a&b") == "a&amp;b"
+        assert formatter._attribute_value_cache == {"a&b": "a&amp;b"}
+        assert formatter.attribute_value("a&b") == "a&amp;b"
+
+        # The cache doesn't grow without limit.
+        formatter.ATTRIBUTE_VALUE_CACHE_SIZE = 2
+        for value in ("1", "2", "3"):
+            formatter.attribute_value(value)
+        assert len(formatter._attribute_value_cache) <= 2
+
+        # A custom substitution function might not give the same
+        # output every time, so its output isn't cached.
+        calls = []
+
+        def substitute(s):
+            calls.append(s)
+            return s.upper()
+
+        formatter = HTMLFormatter(entity_substitution=substitute)
+        assert formatter._attribute_value_cache is None
+        formatter.attribute_value("a")
+        formatter.attribute_value("a")
+        assert calls == ["a", "a"]
+
+        soup = self.soup('<a class="x&y" href="/">1</a><a class="x&y" href="/">2</a>')
+        assert soup.decode(formatter="html") == (
+            '<a class="x&amp;y" href="/">1</a><a class="x&amp;y" href="/">2</a>'
+        )
+
     def test_entity_round_trip(self):
         # This is more an explanatory test and a way to avoid regressions than a test of functionality.
 
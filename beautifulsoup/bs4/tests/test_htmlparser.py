@@ -1,13 +1,17 @@
 """Tests to ensure that the html.parser tree builder generates good
 trees."""
 
+import io
 import pickle
 import pytest
+import bs4.dammit
+from bs4 import BeautifulSoup
 from bs4.builder._htmlparser import (
     _DuplicateAttributeHandler,
     BeautifulSoupHTMLParser,
     HTMLParserTreeBuilder,
 )
+from bs4.dammit import EncodingCache
 from bs4.exceptions import ParserRejectedMarkup
 from typing import Any
 from . import HTMLTreeBuilderSmokeTest
@@ -159,3 +163,112 @@ class TestHTMLParserTreeBuilder(HTMLTreeBuilderSmokeTest):
         markup = "<p>a &nosuchentity; b</p>"
         soup = self.soup(markup)
         assert "<p>a &amp;nosuchentity b</p>" == soup.p.decode()
+
+    def test_file_object_is_read_in_chunks(self):
+        class SmallChunks(HTMLParserTreeBuilder):
+            CHUNK_SIZE = 3
+
+        class CountingReader(io.BytesIO):
+            reads = 0
+
+            def read(self, size=-1):
+                assert size == SmallChunks.CHUNK_SIZE
+                self.reads += 1
+                return super().read(size)
+
+        data = "<p>Räksmörgås</p><p>éé</p>".encode("utf8")
+        fh = CountingReader(data)
+        soup = self.soup(fh, builder=SmallChunks)
+        assert fh.reads > 1
+        assert soup.decode() == self.soup(data).decode()
+        assert soup.original_encoding == "utf-8"
+
+    def test_file_object_encoding_changes_after_first_chunk(self):
+        # The first chunk of this document looks like UTF-8, but a
+        # later chunk isn't, so the whole document is decoded again,
+        # just as if it had been passed in as a bytestring.
+        class SmallChunks(HTMLParserTreeBuilder):
+            CHUNK_SIZE = 8
+
+        class Unseekable(io.BytesIO):
+            def seekable(self):
+                return False
+
+        data = b"<p>" + b"a" * 20 + b"</p><p>caf\xe9</p>"
+        expect = self.soup(data)
+        assert "caf\xe9" == expect.find_all("p")[1].string
+        for fh in (io.BytesIO(data), Unseekable(data)):
+            soup = self.soup(fh, builder=SmallChunks)
+            assert soup.decode() == expect.decode()
+            assert soup.original_encoding == expect.original_encoding
+            assert not soup.contains_replacement_characters
+
+    def test_encoding_cache(self):
+        cache = EncodingCache()
+        data = "<p>Sacr\N{LATIN SMALL LETTER E WITH ACUTE}</p>".encode("latin-1")
+
+        # The encoding that worked is remembered...
+        soup = self.soup(data, encoding_cache=cache, cache_key="example.com")
+        assert soup.original_encoding == "windows-1252"
+        assert cache.get("example.com") == "windows-1252"
+
+        # ...and tried first next time, for a bytestring or a file.
+        cache.set("example.com", "euc-jp")
+        for markup in (b"<p>hello</p>", io.BytesIO(b"<p>hello</p>")):
+            soup = self.soup(markup, encoding_cache=cache, cache_key="example.com")
+            assert soup.original_encoding == "euc-jp"
+
+        # Without a cache key, the cache isn't used.
+        soup = self.soup(b"<p>hello</p>", encoding_cache=cache)
+        assert soup.original_encoding == "utf-8"
+        assert len(cache) == 1
+
+    def test_sniff_limit(self, monkeypatch):
+        seen = []
+
+        def fake_chardet(data):
+            seen.append(data)
+            return None
+
+        monkeypatch.setattr(bs4.dammit, "_chardet_dammit", fake_chardet)
+        data = b"<p>" + b" " * 10000 + b"</p>"
+
+        # Only the start of the document is run through chardet,
+        # whether it's a bytestring or a file.
+        for markup in (data, io.BytesIO(data)):
+            del seen[:]
+            soup = self.soup(markup, sniff_limit=1000)
+            assert soup.original_encoding == "utf-8"
+            assert seen == [data[:1000]]
+
+    def test_iterparse_replacement_characters(self):
+        # iterparse can't go back and try another encoding, so it
+        # replaces the bytes it can't decode, and says so.
+        data = b"<p>" + b"a" * 20 + b"</p><p>caf\xe9</p>"
+        tags = list(
+            BeautifulSoup.iterparse(
+                io.BytesIO(data), "html.parser", emit="p", chunk_size=8,
+                release=False,
+            )
+        )
+        assert "caf\ufffd" == tags[1].string
+        assert tags[1].parent.contains_replacement_characters
+
+    def test_file_object_declared_encoding(self):
+        data = (
+            '<meta charset="iso-8859-1"><p>Räksmörgås</p>'.encode("iso-8859-1")
+        )
+        soup = self.soup(io.BytesIO(data))
+        assert soup.p.string == "Räksmörgås"
+        assert soup.original_encoding == "iso-8859-1"
+        assert soup.declared_html_encoding == "iso-8859-1"
+
+    def test_file_object_from_encoding(self):
+        data = "<p>Räksmörgås</p>".encode("utf-16")
+        soup = self.soup(io.BytesIO(data), from_encoding="utf-16")
+        assert soup.p.string == "Räksmörgås"
+
+    def test_text_file_object(self):
+        soup = self.soup(io.StringIO("<p>Räksmörgås</p>"))
+        assert soup.p.string == "Räksmörgås"
+        assert soup.original_encoding is None
@@ -50,6 +50,19 @@ class TestNavigableString(SoupTest):
         assert "foe" == comment.get_text(strip=True, types=Comment)
         assert "foe " == comment.get_text(types=(Comment, NavigableString))
 
+    def test_links_are_kept_in_slots(self):
+        soup = self.soup("<b>one</b>two")
+        string = soup.b.string
+        assert vars(string) == {}
+        assert string.next_element == "two"
+        assert string.parent is soup.b
+
+        # decompose() wipes out the links, as it does for a Tag.
+        string.decompose()
+        assert string.decomposed
+        with pytest.raises(AttributeError):
+            string.parent
+
     def test_string_has_immutable_name_property(self):
         # string.name is defined as None and can't be modified
         string = self.soup("s").string
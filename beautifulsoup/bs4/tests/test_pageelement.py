@@ -1,6 +1,7 @@
 """Tests of the bs4.element.PageElement class"""
 
 import copy
+import io
 import pickle
 import pytest
 import sys
@@ -10,6 +11,7 @@ from bs4 import BeautifulSoup
 from bs4.element import (
     AttributeValueList,
     Comment,
+    Tag,
 )
 from bs4.filter import SoupStrainer
 from . import (
@@ -79,6 +81,42 @@ class TestEncoding(SoupTest):
         soup = self.soup(html)
         assert html == repr(soup)
 
+    def test_iter_encode(self):
+        html = "<div>" + "<b>\N{SNOWMAN}</b>" * 100 + "</div>"
+        soup = self.soup(html)
+        chunks = list(soup.iter_encode(buffer_size=10))
+        assert len(chunks) > 1
+        assert b"".join(chunks) == soup.encode()
+
+        # A stateful encoding only writes its byte order mark once.
+        chunks = list(soup.div.iter_encode("utf-16", buffer_size=10))
+        assert b"".join(chunks).decode("utf-16") == soup.div.decode()
+
+        # Pretty-printing works the same as prettify().
+        chunks = list(soup.iter_encode(indent_level=0, buffer_size=10))
+        assert b"".join(chunks) == soup.prettify("utf8")
+
+    def test_write_to(self):
+        html = '<p class="a">\N{SNOWMAN}</p><br/>'
+        soup = self.soup(html)
+        fp = io.BytesIO()
+        soup.write_to(fp, encoding="ascii", buffer_size=1)
+        assert fp.getvalue() == soup.encode("ascii")
+
+        text_fp = io.StringIO()
+        soup.write_to(text_fp, encoding=None, indent_level=0, formatter="html")
+        assert text_fp.getvalue() == soup.prettify(formatter="html")
+
+    def test_write_to_xml_document(self):
+        soup = self.soup("<root><a>\N{SNOWMAN}</a></root>")
+        # Pretend this is an XML document, so that the XML declaration
+        # is added.
+        soup.is_xml = True
+        fp = io.BytesIO()
+        soup.write_to(fp, encoding="latin-1")
+        assert fp.getvalue() == soup.encode("latin-1")
+        assert fp.getvalue().startswith(b'<?xml version="1.0" encoding="latin-1"?>')
+
 
 class TestFormatters(SoupTest):
     """Test the formatting feature, used by methods like decode() and
@@ -403,6 +441,47 @@ class TestPersistence(SoupTest):
         assert "a b c".split() == div_copy["class"]
         assert isinstance(div_copy["class"], AttributeValueList)
 
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_copy_links(self, compact):
+        html = "<div id=1><p>a<b>b<i>c</i></b>d</p><br/>e</div>"
+        soup = self.soup(html, compact=compact)
+        div = soup.div
+        div_copy = copy.copy(div)
+        self.linkage_validator(div_copy)
+        assert type(div_copy) is type(div)
+        assert [str(x) for x in div.descendants] == [
+            str(x) for x in div_copy.descendants
+        ]
+        assert div_copy.br.is_empty_element
+        assert div.b.fingerprint() == div_copy.b.fingerprint()
+
+        # The copy can be modified without affecting the original.
+        div_copy.p.b.unwrap()
+        div_copy["id"] = "2"
+        self.linkage_validator(div_copy)
+        assert '<div id="1"><p>a<b>b<i>c</i></b>d</p><br/>e</div>' == str(div)
+        assert '<div id="2"><p>ab<i>c</i>d</p><br/>e</div>' == str(div_copy)
+
+    def test_copy_subclass(self):
+        # A Tag subclass with its own constructor is copied by
+        # calling the constructor.
+        class MyTag(Tag):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.constructed = True
+
+        soup = self.soup("<div><p>text</p></div>", element_classes={Tag: MyTag})
+        div_copy = copy.copy(soup.div)
+        assert isinstance(div_copy.p, MyTag)
+        assert div_copy.p.constructed
+        assert soup.div == div_copy
+
+    def test_copy_soup_with_index(self):
+        soup = self.soup("<div><p class='a'>1</p><p class='a'>2</p></div>", index=True)
+        soup_copy = copy.copy(soup)
+        assert ["1", "2"] == [p.string for p in soup_copy.find_all("p", class_="a")]
+        assert soup_copy.p is not soup.p
+
 
 class TestEquality(SoupTest):
 
@@ -435,3 +514,98 @@ class TestEquality(SoupTest):
         # NavigableStrings with the same contents hash to the value of
         # the contents.
         assert hash(first_string) == hash(second_string) == hash("string")
+
+    def test_fingerprint(self):
+        soup = self.soup(
+            '<div><p class="a b" id="x">text<b>bold</b></p></div>'
+            '<div><p id="x" class="a b">text<b>bold</b></p></div>'
+            '<div><p class="a b" id="x">text<b>BOLD</b></p></div>'
+        )
+        first, second, third = soup.find_all("div")
+        assert first.fingerprint() == second.fingerprint()
+        assert first.fingerprint() != third.fingerprint()
+        assert first == second
+        assert first != third
+        assert {first, second, third} == {first, third}
+
+    def test_fingerprint_follows_modification(self):
+        soup = self.soup("<div><p><b>bold</b></p></div><div><p><b>bold</b></p></div>")
+        first, second = soup.find_all("div")
+        assert first == second
+        original = first.fingerprint()
+
+        # Changing a descendant changes the fingerprint of every tag
+        # above it.
+        first.b.append("!")
+        assert first.fingerprint() != original
+        assert first != second
+        first.b.contents[-1].extract()
+        assert first.fingerprint() == original
+        assert first == second
+
+        first.b["class"] = "x"
+        assert first != second
+        del first.b["class"]
+        assert first == second
+
+        first.b.string.replace_with("bald")
+        assert first != second
+        first.b.string.replace_with("bo")
+        first.b.append("ld")
+        assert first != second
+        first.smooth()
+        assert first == second
+        assert first.fingerprint() == second.fingerprint()
+
+    def test_direct_changes_keep_hash_consistent_with_equality(self):
+        # Equal tags have equal hashes, even after changes made by
+        # assigning to Tag.name or modifying Tag.attrs directly.
+        soup = self.soup(
+            '<p id="a" class="x">text</p><p class="x">text</p>'
+            '<b id="a" class="x">text</b>'
+        )
+        p1, p2, b = soup.find_all(["p", "b"])
+        hash(p1), hash(p2), hash(b)
+        assert 3 == len({p1, p2, b})
+
+        b.name = "p"
+        assert p1 == b
+        assert hash(p1) == hash(b)
+
+        p2.attrs["id"] = "a"
+        assert p1 == p2
+        assert hash(p1) == hash(p2)
+
+        for tag in (p1, p2, b):
+            tag["class"].append("y")
+        assert p1 == p2 == b
+        assert 1 == len({p1, p2, b})
+
+    def test_fingerprint_unhashable_attribute_value(self):
+        soup = self.soup("<p>text</p><p>text</p>")
+        p1, p2 = soup.find_all("p")
+        p1["data"] = {"a": 1}
+        p2["data"] = {"a": 1}
+        assert p1 == p2
+        assert hash(p1) == hash(p2)
+        p2["data"] = {"a": 2}
+        assert hash(p1) != hash(p2)
+
+    def test_fingerprint_deeply_nested(self):
+        soup = self.soup("")
+        tag = soup
+        for i in range(sys.getrecursionlimit() + 10):
+            new_tag = soup.new_tag("b")
+            tag.append(new_tag)
+            tag = new_tag
+        assert isinstance(soup.fingerprint(), int)
+
+    def test_fingerprint_survives_pickle(self):
+        soup = self.soup("<div><p>text</p></div>")
+        fingerprint = soup.div.fingerprint()
+        soup2 = pickle.loads(pickle.dumps(soup))
+        assert fingerprint == soup2.div.fingerprint()
+
+        div = pickle.loads(pickle.dumps(soup.div))
+        assert soup.div == div
+        assert fingerprint == div.fingerprint()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Tests of Beautiful Soup as a whole."""
 
+import gc
 import logging
 import pickle
 import pytest
@@ -16,11 +17,13 @@ from bs4.builder import (
 )
 from bs4.element import (
     AttributeValueList,
+    CharsetMetaAttributeValue,
     XMLAttributeDict,
     Comment,
     PYTHON_SPECIFIC_ENCODINGS,
     Tag,
     NavigableString,
+    PageElement,
 )
 from bs4.filter import SoupStrainer
 from bs4.exceptions import (
@@ -33,9 +36,12 @@ from bs4._warnings import (
 
 from . import (
     default_builder,
+    HTML5LIB_PRESENT,
     LXML_PRESENT,
+    SOUP_SIEVE_PRESENT,
     SoupTest,
 )
+import copy
 import warnings
 from typing import Type
 
@@ -465,6 +471,286 @@ class TestSelectiveParsing(SoupTest):
         assert soup.encode() == b"<b>Yes</b><b>Yes <c>Yes</c></b>"
 
 
+class TestIterparse(SoupTest):
+    """Test the BeautifulSoup.iterparse() method."""
+
+    markup = "<list>\n <item>1</item>\n <item>2<b>x</b></item>\n <other/></list>"
+
+    def iterparse(self, source, **kwargs):
+        kwargs.setdefault("builder", default_builder)
+        return BeautifulSoup.iterparse(source, **kwargs)
+
+    def test_yields_tags_in_closing_order(self):
+        names = [tag.name for tag in self.iterparse(self.markup, release=False)]
+        assert names == ["item", "b", "item", "other", "list"]
+
+    def test_emit_by_name(self):
+        items = [
+            tag.decode() for tag in self.iterparse(self.markup, emit="item", chunk_size=3)
+        ]
+        assert items == ["<item>1</item>", "<item>2<b>x</b></item>"]
+
+    def test_emit_soupstrainer(self):
+        strainer = SoupStrainer("item", string="1")
+        items = [tag.decode() for tag in self.iterparse(self.markup, emit=strainer)]
+        assert items == ["<item>1</item>"]
+
+    def test_tag_is_yielded_before_the_rest_of_the_document_is_read(self):
+        seen = []
+
+        def chunks():
+            for chunk in ("<item>1</item>", "<item>2</item>", "<item>3"):
+                seen.append(chunk)
+                yield chunk
+
+        for tag in self.iterparse(chunks(), emit="item"):
+            if tag.string == "1":
+                assert len(seen) == 1
+
+    def test_release(self):
+        gen = self.iterparse(self.markup, emit="item", chunk_size=1)
+        first = next(gen)
+        soup = list(first.parents)[-1]
+        assert soup.list.decode() == "<list>\n<item>1</item></list>"
+        next(gen)
+        # The first item and the whitespace before it are gone.
+        assert soup.list.decode() == "<list>\n<item>2<b>x</b></item></list>"
+        assert first.parent is None
+        list(gen)
+        assert soup.decode() == "<list>\n<other></other></list>"
+
+    def test_released_tree_is_well_linked(self):
+        markup = "<a><item>1</item>x<item>2</item></a>y"
+        for tag in self.iterparse(markup, emit="item", chunk_size=1):
+            soup = list(tag.parents)[-1]
+        assert soup.decode() == "<a>x</a>y"
+        assert [str(s) for s in soup.descendants] == ["<a>x</a>", "x", "y"]
+        assert soup.a.next_element == "x"
+        assert soup.a.next_element.next_element == "y"
+
+    def test_file_and_bytes_source(self):
+        import io
+
+        data = "<item>Räksmörgås</item><item>é</item>".encode("utf8")
+        for source in (data, io.BytesIO(data)):
+            tags = list(self.iterparse(source, emit="item", chunk_size=5))
+            assert [t.string for t in tags] == ["Räksmörgås", "é"]
+
+    def test_from_encoding(self):
+        data = "<item>Räksmörgås</item>".encode("latin-1")
+        (tag,) = self.iterparse(data, from_encoding="latin-1", chunk_size=4)
+        assert tag.string == "Räksmörgås"
+
+    def test_builder_that_cannot_feed_incrementally(self):
+        class JoiningTreeBuilder(default_builder):
+            FEEDS_INCREMENTALLY = False
+
+            def feed_chunks(self, chunks):
+                return TreeBuilder.feed_chunks(self, chunks)
+
+            def feed(self, markup):
+                for _ in default_builder.feed_chunks(self, [markup]):
+                    pass
+
+        names = [
+            tag.name
+            for tag in self.iterparse(self.markup, builder=JoiningTreeBuilder)
+        ]
+        assert names == ["item", "b", "item", "other", "list"]
+
+
+class TestTagIndex(SoupTest):
+    """Test the index built by BeautifulSoup(index=True) and
+    BeautifulSoup.build_index()."""
+
+    markup = """<div id="main" class="page wide">
+<p class="intro">One <a href="1" class="ext">link</a></p>
+<p>Two <a href="2">link</a> <b id="x">bold</b></p>
+<ul><li class="item">A</li><li class="item last">B</li></ul>
+<div class="page"><p class="intro note">Three</p></div>
+</div>"""
+
+    queries = [
+        dict(name="p"),
+        dict(name="a"),
+        dict(name="div"),
+        dict(name="nosuchtag"),
+        dict(id="main"),
+        dict(id="x"),
+        dict(id="nosuchid"),
+        dict(class_="intro"),
+        dict(class_="page"),
+        dict(class_="item last"),
+        dict(name="p", class_="intro"),
+        dict(name="p", attrs={"class": "note"}),
+        dict(name="div", id="main"),
+        dict(name="a", href="2"),
+        dict(name=SoupStrainer("li", class_="item")),
+        dict(name="li", limit=1),
+    ]
+
+    def assert_matches_fresh_parse(self, soup):
+        # Every query gives the same answer as it would on a freshly
+        # parsed, unindexed copy of the document.
+        fresh = self.soup(soup.decode())
+        assert fresh._index is None
+        for query in self.queries:
+            assert [str(x) for x in soup.find_all(**query)] == [
+                str(x) for x in fresh.find_all(**query)
+            ], query
+            query = dict(query)
+            query.pop("limit", None)
+            assert str(soup.find(**query)) == str(fresh.find(**query))
+
+        # The index contains every tag in the tree, and nothing else.
+        assert not soup._index.stale
+        assert len(soup._index) == len(soup.find_all(True))
+
+    def test_index_gives_same_results_as_tree_walk(self):
+        soup = self.soup(self.markup, index=True)
+        self.assert_matches_fresh_parse(soup)
+
+    def test_index_is_used(self):
+        soup = self.soup(self.markup, index=True)
+        # Searching by name, id or class looks only at a few candidates.
+        soup._index.names["p"].clear()
+        assert soup.find_all("p") == []
+        # Other searches walk the tree as usual.
+        assert len(soup.find_all(string="Three")) == 1
+        assert len(soup.find_all("p", recursive=False)) == 0
+        assert len(soup.div.find_all("p")) == 3
+
+    def test_build_index(self):
+        soup = self.soup(self.markup)
+        assert soup._index is None
+        soup.build_index()
+        self.assert_matches_fresh_parse(soup)
+
+        # Calling build_index() again picks up changes the index
+        # can't track on its own.
+        soup.b.name = "i"
+        soup.a.attrs["class"] = ["page"]
+        soup.build_index()
+        assert soup.find_all("i") == [soup.find(id="x")]
+        self.assert_matches_fresh_parse(soup)
+
+    def test_index_follows_tree_modifications(self):
+        soup = self.soup(self.markup, index=True)
+
+        soup.find(id="x").extract()
+        self.assert_matches_fresh_parse(soup)
+
+        soup.find("li", class_="last").decompose()
+        self.assert_matches_fresh_parse(soup)
+
+        new_p = soup.new_tag("p", attrs={"class": "intro"})
+        soup.find("p").replace_with(new_p)
+        self.assert_matches_fresh_parse(soup)
+
+        # Insert a tag into the middle of the document.
+        soup.ul.insert(0, soup.new_tag("a", href="2", id="main"))
+        self.assert_matches_fresh_parse(soup)
+
+        # Add a tag to the end of the document.
+        soup.div.append(soup.new_tag("p", id="x"))
+        self.assert_matches_fresh_parse(soup)
+
+        # Move a tag from one place to another.
+        soup.ul.append(soup.find("p", class_="note"))
+        self.assert_matches_fresh_parse(soup)
+
+        soup.find("div", class_="page").unwrap()
+        self.assert_matches_fresh_parse(soup)
+
+        soup.li["class"] = "page"
+        del soup.find(id="main")["id"]
+        self.assert_matches_fresh_parse(soup)
+
+        soup.ul.clear()
+        self.assert_matches_fresh_parse(soup)
+
+    def test_index_ignores_detached_trees(self):
+        soup = self.soup(self.markup, index=True)
+        p = soup.p.extract()
+        p.append(soup.new_tag("a"))
+        p["class"] = "page"
+        assert p not in soup.find_all(class_="page")
+        assert len(soup.find_all("a")) == 1
+
+    def test_indexes_in_use_is_lowered_when_index_is_dropped(self):
+        gc.collect()
+        before = PageElement._indexes_in_use
+        soup = self.soup(self.markup, index=True)
+        assert PageElement._indexes_in_use == before + 1
+        del soup
+        gc.collect()
+        assert PageElement._indexes_in_use == before
+
+    def test_index_with_parse_only(self):
+        soup = self.soup(
+            self.markup, parse_only=SoupStrainer("p"), index=True
+        )
+        assert [p.a["href"] for p in soup.find_all("p") if p.a] == ["1", "2"]
+        assert soup.find_all("div") == []
+
+    def test_index_survives_pickle_and_copy(self):
+        soup = self.soup(self.markup, index=True)
+        for other in (pickle.loads(pickle.dumps(soup)), copy.copy(soup)):
+            assert other._index is not None
+            assert other.find_all("p") == soup.find_all("p")
+            assert other.find(id="x") == soup.find(id="x")
+
+    def test_iterparse_with_index(self):
+        markup = "<list><item id='a'/><item id='b'/><other/></list>"
+        soups = []
+        for tag in BeautifulSoup.iterparse(
+            markup, "html.parser", emit="item", index=True
+        ):
+            soups.append(list(tag.parents)[-1])
+        soup = soups[0]
+        # Released tags are removed from the index.
+        assert soup.find_all("item") == []
+        assert soup.find(id="a") is None
+        assert soup.find_all("other") == [soup.list.other]
+
+    @pytest.mark.skipif(not HTML5LIB_PRESENT, reason="html5lib not installed")
+    def test_index_with_html5lib(self):
+        # html5lib builds the tree out of order, so the index is
+        # built once parsing is complete.
+        markup = "<p>a<b>b<table><tr><td>c</table>d</b>e</p>" + self.markup
+        soup = BeautifulSoup(markup, "html5lib", index=True)
+        fresh = BeautifulSoup(markup, "html5lib")
+        for name in ("p", "b", "table", "td", "a", "div", "li"):
+            assert [str(x) for x in soup.find_all(name)] == [
+                str(x) for x in fresh.find_all(name)
+            ]
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_select_with_index(self):
+        soup = self.soup(self.markup, index=True)
+        fresh = self.soup(self.markup)
+        soup.ul.append(soup.new_tag("li", attrs={"class": "extra item"}))
+        fresh.ul.append(fresh.new_tag("li", attrs={"class": "extra item"}))
+        for selector in (
+            "p",
+            "#main",
+            "#nosuchid",
+            ".intro",
+            ".item",
+            "p.intro",
+            "div#main",
+            "P",
+            "li.item:first-child",
+            "ul > li",
+        ):
+            assert [str(x) for x in soup.select(selector)] == [
+                str(x) for x in fresh.select(selector)
+            ], selector
+        assert [str(x) for x in soup.select(".item", limit=1)] == [
+            str(fresh.li)
+        ]
+
+
 class TestNewTag(SoupTest):
     """Test the BeautifulSoup.new_tag() method."""
 
@@ -527,6 +813,16 @@ class TestNewString(SoupTest):
         assert isinstance(s, Comment)
 
 
+# Element classes used by TestPickle; they have to be defined at the
+# top level of a module to be pickled.
+class MyTag(Tag):
+    pass
+
+
+class MyString(NavigableString):
+    pass
+
+
 class TestPickle(SoupTest):
     # Test our ability to pickle the BeautifulSoup object itself.
 
@@ -545,6 +841,114 @@ class TestPickle(SoupTest):
         unpickled = pickle.loads(pickled)
         assert "some markup" == unpickled.string
 
+    def assert_same_tree(self, original, unpickled):
+        assert original.decode() == unpickled.decode()
+        for a, b in zip(original.descendants, unpickled.descendants):
+            assert type(a) is type(b)
+            if isinstance(a, Tag):
+                assert (a.name, a.attrs, a.sourceline, a.sourcepos) == (
+                    b.name,
+                    b.attrs,
+                    b.sourceline,
+                    b.sourcepos,
+                )
+                assert type(a.attrs) is type(b.attrs)
+        assert len(list(original.descendants)) == len(list(unpickled.descendants))
+        self.linkage_validator(unpickled)
+        self.assertConnectedness(unpickled)
+
+    def test_tree_is_pickled_without_markup(self):
+        markup = (
+            "<!DOCTYPE html><html><head>"
+            '<meta charset="utf-8"><title>A title</title></head>'
+            '<body><!--a comment--><p class="a b" id="first">Some <b>bold</b>'
+            " text<br/></p><script>if (a < b) {}</script><p></p>text</body></html>"
+        )
+        soup = self.soup(markup)
+        pickled = pickle.dumps(soup)
+        assert b"A title</title>" not in pickled
+        unpickled = pickle.loads(pickled)
+        self.assert_same_tree(soup, unpickled)
+        assert unpickled.markup is None
+        assert unpickled.builder.soup is None
+
+        # Multi-valued attributes and the <meta> charset keep their
+        # special types.
+        assert isinstance(unpickled.p["class"], AttributeValueList)
+        assert isinstance(unpickled.meta["charset"], CharsetMetaAttributeValue)
+        assert b'<meta charset="latin-1"/>' in unpickled.encode("latin-1")
+
+        # The unpickled tree can be modified like any other.
+        unpickled.b.extract()
+        unpickled.body.append(unpickled.new_tag("i"))
+        self.linkage_validator(unpickled)
+
+    def test_empty_document(self):
+        soup = self.soup("")
+        unpickled = pickle.loads(pickle.dumps(soup))
+        assert unpickled.contents == []
+        assert unpickled.decode() == ""
+
+    def test_deeply_nested_document(self):
+        # The tree is stored and restored without recursion.
+        soup = self.soup("<div>" * 2000 + "text" + "</div>" * 2000)
+        unpickled = pickle.loads(pickle.dumps(soup))
+        assert unpickled.decode() == soup.decode()
+        assert unpickled.find(string="text").parent.parent.name == "div"
+
+    def test_custom_element_classes(self):
+        soup = self.soup(
+            "<a><b>text</b></a>",
+            element_classes={Tag: MyTag, NavigableString: MyString},
+        )
+        unpickled = pickle.loads(pickle.dumps(soup))
+        self.assert_same_tree(soup, unpickled)
+        assert isinstance(unpickled.b, MyTag)
+        assert isinstance(unpickled.b.string, MyString)
+
+    def test_xml_namespaces(self):
+        markup = (
+            '<root xmlns="http://a/" xmlns:x="http://x/">'
+            '<x:child x:attr="1">text</x:child></root>'
+        )
+        soup = self.soup(markup)
+        for tag in soup.find_all(True):
+            tag.namespace = "http://a/"
+            tag.prefix = "x"
+        unpickled = pickle.loads(pickle.dumps(soup))
+        self.assert_same_tree(soup, unpickled)
+        assert [(t.namespace, t.prefix) for t in unpickled.find_all(True)] == [
+            ("http://a/", "x"),
+            ("http://a/", "x"),
+        ]
+
+    def test_index_survives_pickling(self):
+        soup = self.soup('<p id="a">1</p><p class="c">2</p>', index=True)
+        unpickled = pickle.loads(pickle.dumps(soup))
+        assert unpickled.find_all("p") == soup.find_all("p")
+        assert len(unpickled._index) == 2
+        assert unpickled.find_all(id="a")[0].string == "1"
+
+    def test_legacy_pickle_is_reparsed(self):
+        # Older versions of Beautiful Soup stored the markup instead
+        # of the tree.
+        soup = self.soup("<a>some markup</a>")
+        state = soup.__getstate__()
+        del state["_tree_state"]
+        state["markup"] = "<a>some markup</a>"
+        restored = BeautifulSoup.__new__(BeautifulSoup)
+        restored.__setstate__(state)
+        assert restored.a.string == "some markup"
+
+    def test_unknown_tree_state_version(self):
+        soup = self.soup("<a>some markup</a>")
+        state = soup.__getstate__()
+        version, *rest = state["_tree_state"]
+        state["_tree_state"] = (version + 1, *rest)
+        restored = BeautifulSoup.__new__(BeautifulSoup)
+        with pytest.raises(ValueError):
+            restored.__setstate__(state)
+
 
 class TestEncodingConversion(SoupTest):
     # Test Beautiful Soup's ability to decode and encode from various
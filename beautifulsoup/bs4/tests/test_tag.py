@@ -1,7 +1,15 @@
+import copy
+import io
+import pickle
 import warnings
+
+import pytest
+
 from bs4.element import (
     Comment,
+    CompactTag,
     NavigableString,
+    Tag,
 )
 from . import SoupTest
 
@@ -124,6 +132,43 @@ class TestTag(SoupTest):
         assert soup.a.get_text(",") == "a,r, , t "
         assert soup.a.get_text(",", strip=True) == "a,r,t"
 
+    def test_get_text_skip_tags(self):
+        soup = self.soup(
+            "<div>a<nav>skip <b>me</b></nav>b<aside>and me</aside><p>c</p></div>"
+        )
+        assert soup.div.get_text(",", skip_tags=["nav", "aside"]) == "a,b,c"
+        assert soup.div.get_text(skip_tags=set()) == "askip meband mec"
+
+        # Skipping a tag skips all of its strings, whatever their type.
+        assert soup.div.get_text(skip_tags=["nav"], types=None) == "aband mec"
+
+        # Skipping the last tag in the tree is no problem.
+        assert soup.get_text(skip_tags=["p"]) == "askip meband me"
+
+    def test_get_text_normalize_whitespace(self):
+        soup = self.soup("<p>  An \n\t example</p><p>\n\n</p><p>of  text </p>")
+        assert soup.get_text("|", normalize_whitespace=True) == "An example|of text"
+        assert soup.get_text("|", strip=True) == "An \n\t example|of  text"
+
+    @pytest.mark.parametrize("buffer_size", [1, 5, 10000])
+    def test_write_text(self, buffer_size):
+        soup = self.soup(
+            "<p>Some <b>bold</b> text</p><script>x</script><p>  more\n text</p>"
+        )
+        for kwargs in (
+            {},
+            dict(separator="|"),
+            dict(separator="|", strip=True),
+            dict(separator=" ", normalize_whitespace=True, skip_tags=["b"]),
+        ):
+            fp = io.StringIO()
+            soup.write_text(fp, buffer_size=buffer_size, **kwargs)
+            assert fp.getvalue() == soup.get_text(**kwargs)
+
+        fp = io.StringIO()
+        soup.p.b.write_text(fp, buffer_size=buffer_size)
+        assert fp.getvalue() == "bold"
+
     def test_get_text_ignores_special_string_containers(self):
         soup = self.soup("foo<!--IGNORE-->bar")
         assert soup.get_text() == "foobar"
@@ -239,3 +284,130 @@ class TestMultiValuedAttributes(SoupTest):
         soup = self.soup('<div id="1"><span id="2">a string</span></div>')
         soup.span.hidden = True
         assert '<div id="1">a string</div>' == str(soup.div)
+
+
+class TestCompactTag(SoupTest):
+    markup = (
+        '<html><head><title>A title</title><script>var x;</script></head>'
+        '<body><p class="a b">Some <b>bold</b> text<br><!--a comment--></p>'
+        "<p>More</p><pre> preformatted </pre></body></html>"
+    )
+
+    def test_compact_tree_works_like_normal_tree(self):
+        normal = self.soup(self.markup)
+        compact = self.soup(self.markup, compact=True)
+        assert all(isinstance(tag, CompactTag) for tag in compact.find_all())
+        assert normal.decode() == compact.decode()
+        assert normal.prettify() == compact.prettify()
+        assert normal.get_text() == compact.get_text()
+        assert normal == compact
+        assert compact.p["class"] == ["a", "b"]
+        assert compact.br.is_empty_element
+        assert compact.script.string == "var x;"
+        assert type(compact.script.string).__name__ == "Script"
+
+    def test_values_are_not_stored_per_tag(self):
+        soup = self.soup(self.markup, compact=True)
+        p1, p2 = soup.find_all("p")
+        # Nothing is stored in the instance dictionaries.
+        assert vars(p1) == {}
+        assert vars(p1.contents[0]) == {}
+
+        # Tags with the same name share a profile.
+        assert p1._profile is p2._profile
+        assert p1._profile is not soup.b._profile
+
+        # Tags with no attributes share an attribute dictionary.
+        assert soup.b._attrs is soup.br._attrs
+        assert soup.b.attrs == {}
+
+    def test_modification_is_not_shared(self):
+        soup = self.soup(self.markup, compact=True)
+        p1, p2 = soup.find_all("p")
+        p2.preserve_whitespace_tags = {"p"}
+        assert p1.preserve_whitespace_tags != {"p"}
+        assert p1._profile is not p2._profile
+
+        soup.b["id"] = "bold"
+        assert soup.b.attrs == {"id": "bold"}
+        assert soup.br.attrs == {}
+        del soup.b["id"]
+        assert soup.b.attrs == {}
+
+        soup.br.attrs = {"id": "br"}
+        assert '<br id="br"/>' == soup.br.decode()
+        assert soup.title.attrs == {}
+
+    def test_shared_attrs_are_copied_on_write(self):
+        soup = self.soup(self.markup, compact=True)
+        b, br, title, pre = soup.b, soup.br, soup.title, soup.pre
+        shared = b._attrs
+        assert br._attrs is shared
+
+        b.attrs["id"] = "bold"
+        br.attrs.update({"id": "br"}, title="x")
+        assert title.attrs.setdefault("id", "t") == "t"
+        attrs = pre.attrs
+        attrs |= {"id": "pre"}
+        attrs["class"] = "code"
+
+        assert b.attrs == {"id": "bold"}
+        assert br.attrs == {"id": "br", "title": "x"}
+        assert title.attrs == {"id": "t"}
+        assert pre.attrs == {"id": "pre", "class": "code"}
+        assert pre.attrs is attrs
+        assert shared == {}
+        assert soup.script._attrs is shared
+        assert '<b id="bold">' in soup.decode()
+
+        # Reading attrs, or changing it without adding anything,
+        # doesn't give the tag its own dictionary.
+        script = soup.script
+        assert script.attrs == {}
+        assert script.attrs.pop("id", None) is None
+        assert script._attrs is shared
+
+        # A dictionary that was handed out before the tag got another
+        # one doesn't replace it.
+        old = script.attrs
+        script["id"] = "js"
+        old["id"] = "stale"
+        assert script.attrs == {"id": "js"}
+
+    def test_new_tag(self):
+        soup = self.soup("", compact=True)
+        tag = soup.new_tag("a", href="/")
+        assert isinstance(tag, CompactTag)
+        assert tag.decode() == '<a href="/"></a>'
+        assert isinstance(soup.new_tag("b"), CompactTag)
+
+    def test_element_classes_take_priority(self):
+        class MyTag(Tag):
+            pass
+
+        soup = self.soup("<p>", compact=True, element_classes={Tag: MyTag})
+        assert type(soup.p) is MyTag
+
+    def test_copy_and_pickle(self):
+        soup = self.soup(self.markup, compact=True)
+        for clone in (copy.copy(soup), pickle.loads(pickle.dumps(soup))):
+            assert clone.compact
+            assert isinstance(clone.p, CompactTag)
+            assert clone.decode() == soup.decode()
+
+        tag_copy = copy.copy(soup.p)
+        assert tag_copy._profile is soup.p._profile
+        assert tag_copy == soup.p
+
+        tag = pickle.loads(pickle.dumps(soup.br))
+        assert tag.decode() == "<br/>"
+
+    def test_decompose(self):
+        soup = self.soup(self.markup, compact=True)
+        p = soup.p
+        b = p.b
+        p.decompose()
+        assert p.decomposed
+        assert b.decomposed
+        assert "<p>More</p>" == soup.body.p.decode()
+        assert "Some" not in soup.decode()
@@ -11,6 +11,7 @@ methods tested here.
 
 import pytest
 import re
+import sys
 import warnings
 from bs4 import BeautifulSoup
 from bs4.builder import builder_registry
@@ -23,6 +24,7 @@ from bs4.element import (
 )
 from bs4.filter import SoupStrainer
 from . import (
+    SOUP_SIEVE_PRESENT,
     SoupTest,
 )
 
@@ -122,6 +124,107 @@ class TestFindAll(SoupTest):
         assert hasattr(result, "source")
 
 
+class TestFindAllMany(SoupTest):
+    """Test the find_all_many() method."""
+
+    markup = (
+        '<p id="1">One <a href="x">link</a></p>'
+        '<p class="c">Two <a>anchor</a> <b id="b">bold</b></p>'
+        "<a>last</a>"
+    )
+
+    def test_matches_find_all(self):
+        soup = self.soup(self.markup)
+        queries = {
+            "links": "a",
+            "also_links": "a",
+            "ids": {"id": True},
+            "ps": SoupStrainer("p", class_="c"),
+            "bold_or_p": ["b", "p"],
+            "regex": re.compile("^(a|b)$"),
+            "strings": SoupStrainer(string=re.compile("^[A-Z]")),
+        }
+        results = soup.find_all_many(queries)
+        assert list(results) == list(queries)
+        assert results["links"] == soup.find_all("a")
+        assert results["also_links"] == soup.find_all("a")
+        assert results["ids"] == soup.find_all(attrs={"id": True})
+        assert results["ps"] == soup.find_all("p", class_="c")
+        assert results["bold_or_p"] == soup.find_all(["b", "p"])
+        assert results["regex"] == soup.find_all(re.compile("^(a|b)$"))
+        assert results["strings"] == ["One ", "Two "]
+        assert all(hasattr(r, "source") for r in results.values())
+
+    def test_limit(self):
+        soup = self.soup(self.markup)
+        results = soup.find_all_many({"a": "a", "p": "p", "b": "b"}, limit=1)
+        self.assert_selects(results["a"], ["link"])
+        assert results["p"] == [soup.p]
+        self.assert_selects(results["b"], ["bold"])
+
+        # A limit of 0 means no limit.
+        results = soup.find_all_many({"a": "a"}, limit=0)
+        self.assert_selects(results["a"], ["link", "anchor", "last"])
+
+    def test_not_recursive(self):
+        soup = self.soup(self.markup)
+        results = soup.find_all_many({"a": "a", "p": "p"}, recursive=False)
+        self.assert_selects(results["a"], ["last"])
+        assert len(results["p"]) == 2
+
+    def test_no_queries(self):
+        soup = self.soup(self.markup)
+        assert soup.find_all_many({}) == {}
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_selectors(self):
+        soup = self.soup(self.markup)
+        selectors = {
+            "child_links": "p > a",
+            "ids": "[id]",
+            "class_c": "p.c b#b",
+        }
+        results = soup.find_all_many({"links": "a"}, selectors=selectors)
+        assert list(results) == ["links"] + list(selectors)
+        assert results["links"] == soup.find_all("a")
+        for key, selector in selectors.items():
+            assert results[key] == soup.select(selector)
+
+        results = soup.find_all_many({}, selectors={"a": "a"}, limit=2)
+        self.assert_selects(results["a"], ["link", "anchor"])
+
+        results = soup.find_all_many({}, selectors={"a": "a"}, recursive=False)
+        self.assert_selects(results["a"], ["last"])
+
+    def test_selector_like_query_is_rejected(self):
+        soup = self.soup(self.markup)
+        for query in ("div > p#q", "p.c", "a, b", "[id]"):
+            with pytest.raises(ValueError):
+                soup.find_all_many({"css": query})
+
+        # A SoupStrainer can still look for a tag with an unusual name.
+        results = soup.find_all_many({"name": SoupStrainer("p.c")})
+        assert results["name"] == []
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_selector_name_must_be_unique(self):
+        soup = self.soup(self.markup)
+        with pytest.raises(ValueError):
+            soup.find_all_many({"a": "a"}, selectors={"a": "a"})
+
+    def test_every_tag(self):
+        # As with find_all(), None and True match every tag.
+        soup = self.soup(self.markup)
+        results = soup.find_all_many({"none": None, "true": True, "a": "a"})
+        assert results["none"] == soup.find_all(None)
+        assert results["true"] == soup.find_all(True)
+        assert len(results["none"]) == 6
+        assert results["a"] == soup.find_all("a")
+
+        results = soup.find_all_many({"none": None}, limit=2)
+        assert results["none"] == soup.find_all(True, limit=2)
+
+
 class TestFindAllBasicNamespaces(SoupTest):
     def test_find_by_namespaced_name(self):
         soup = self.soup('<mathml:msqrt>4</mathml:msqrt><a svg:fill="red">')
@@ -426,6 +529,53 @@ class TestSmooth(SoupTest):
         assert "Comment 1" == div.contents[1]
         assert "Comment 2" == div.contents[2]
 
+    def test_smooth_links(self):
+        soup = self.soup("<p>a<b>b</b>c</p><p>d</p>")
+        p1, p2 = soup.find_all("p")
+        b = p1.b
+        b.append("2")
+        b.append("3")
+        p1.append("e")
+        p1.append(Comment("f"))
+        p1.append("g")
+        p2.insert(0, "0")
+        soup.append("h")
+        soup.append("i")
+        old = p1.contents[2]
+
+        soup.smooth()
+        self.linkage_validator(soup)
+        assert ["a", b, "ce", "f", "g"] == p1.contents
+        assert "b23" == b.string
+        assert "0d" == p2.string
+        assert "hi" == soup.contents[-1]
+        assert "<p>a<b>b23</b>ce<!--f-->g</p><p>0d</p>hi" == soup.decode()
+        assert [p1.index(child) for child in p1.contents] == [0, 1, 2, 3, 4]
+
+        # The strings that were merged are no longer part of the tree.
+        assert None is old.parent
+        assert None is old.next_element
+
+    def test_smooth_long_run(self):
+        soup = self.soup("<div></div>")
+        for i in range(1000):
+            soup.div.append(str(i % 10))
+        soup.div.smooth()
+        assert ["0123456789" * 100] == soup.div.contents
+        self.linkage_validator(soup)
+
+    def test_smooth_deeply_nested(self):
+        soup = self.soup("")
+        tag = soup
+        for i in range(sys.getrecursionlimit() + 10):
+            new_tag = soup.new_tag("b")
+            tag.append(new_tag)
+            tag = new_tag
+        tag.append("a")
+        tag.append("b")
+        soup.smooth()
+        assert "ab" == tag.string
+
 
 class TestIndex(SoupTest):
     """Test Tag.index"""
@@ -446,6 +596,78 @@ class TestIndex(SoupTest):
         with pytest.raises(ValueError):
             tree.index(1)
 
+    def assert_positions(self, tag):
+        for i, element in enumerate(tag.contents):
+            assert tag.index(element) == i
+
+    def test_index_wide_tag(self):
+        tbody = self.soup("<tbody>%s</tbody>" % ("<tr></tr>" * 200)).tbody
+        self.assert_positions(tbody)
+        assert tbody._child_positions is not None
+        with pytest.raises(ValueError):
+            tbody.index(self.soup("<tr></tr>").tr)
+        with pytest.raises(ValueError):
+            tbody.index(1)
+
+        # After an insertion the map can't keep up with, the children
+        # are scanned a few times before the map is rebuilt.
+        tbody.insert(100, self.soup("<tr></tr>").tr)
+        assert tbody._child_positions is None
+        for i in range(tbody._SCANS_BEFORE_TRACKING):
+            assert tbody.index(tbody.contents[i]) == i
+            assert tbody._child_positions is None
+        self.assert_positions(tbody)
+        assert tbody._child_positions is not None
+
+        # Below the threshold, the children are scanned.
+        tbody.POSITION_TRACKING_THRESHOLD = None
+        tbody._child_positions = None
+        self.assert_positions(tbody)
+        assert tbody._child_positions is None
+
+    def test_index_wide_tag_after_modification(self):
+        soup = self.soup("<tbody>%s</tbody>" % ("<tr></tr>" * 200))
+        tbody = soup.tbody
+        rows = list(tbody.contents)
+
+        # Removing children, appending children, and replacing children
+        # all keep the map up to date.
+        for row in rows[::3]:
+            row.extract()
+        for row in rows[1::3]:
+            row.replace_with(soup.new_tag("td"), "text")
+        tbody.append(soup.new_tag("th"))
+        rows[2].insert_after(soup.new_tag("th"))
+        rows[-3].extend(["a", soup.new_tag("b")])
+        rows[-3].unwrap()
+        self.assert_positions(tbody)
+
+        # So does moving a child around within the tag.
+        tbody.insert(10, tbody.contents[-1])
+        tbody.insert(len(tbody.contents), tbody.contents[0])
+        self.assert_positions(tbody)
+
+        # If .contents is modified directly, the map notices its
+        # mistakes.
+        tbody.index(tbody.contents[-1])
+        tbody.contents.insert(0, tbody.contents.pop())
+        tbody.contents.remove(tbody.contents[50])
+        self.assert_positions(tbody)
+
+        tbody.clear()
+        assert tbody.contents == []
+
+    def test_wide_tag_pickle(self):
+        import pickle
+
+        soup = self.soup("%s" % ("<tr></tr>" * 200))
+        self.assert_positions(soup)
+        assert soup._child_positions is not None
+        loaded = pickle.loads(pickle.dumps(soup))
+        self.assert_positions(loaded)
+        loaded.contents[100].extract()
+        self.assert_positions(loaded)
+
 
 class TestParentOperations(SoupTest):
     """Test navigation and searching through an element's parents."""
@@ -1359,6 +1581,13 @@ class TestTreeModification(SoupTest):
         # p2 is unaffected.
         assert False is p2.decomposed
 
+    def test_decomposed_does_not_search(self):
+        # Checking whether a tag has been decomposed doesn't turn into
+        # a search for a tag called "_decomposed".
+        soup = self.soup("<p></p>")
+        soup.p.append(soup.new_tag("_decomposed"))
+        assert False is soup.p.decomposed
+
     def test_decompose_string(self):
         soup = self.soup("<div><p>String 1</p><p>String 2</p></p>")
         div = soup.div